@@ -0,0 +1,73 @@
+"""Micro-benchmark for the notification decoder.
+
+Replays notification streams split at BLE MTU boundaries through the
+streaming decoder and through the previous json.loads-per-chunk loop.
+
+    python -m benchmarks.decoder
+"""
+from __future__ import annotations
+
+import json
+import timeit
+
+from custom_components.wallbox_ble.protocol import WallboxBLEFrameDecoder
+
+STATUS_RESPONSE = {
+    "id": 17,
+    "r": {"st": 1, "cur": 16, "mxI": 32, "l": 0, "pw": 11040, "en": 12.345, "ses": 3, "fw": "6.2.13"},
+}
+SESSIONS_RESPONSE = {
+    "id": 18,
+    "r": [{"id": i, "st": 1690000000 + i * 3600, "en": 7.5 + i, "d": 3600, "usr": "user"} for i in range(40)],
+}
+
+
+def record(message, mtu, framed):
+    data = json.dumps(message, separators=(",", ":")).encode()
+    if framed:
+        data = b"EaE" + bytes([len(data) & 0xFF]) + data
+        data += bytes([sum(data) & 0xFF])
+    return [data[i : i + mtu] for i in range(0, len(data), mtu)]
+
+
+def legacy_decode(chunks):
+    data = bytearray()
+    messages = []
+    for chunk in chunks:
+        data += chunk
+        try:
+            messages.append(json.loads(data))
+            data = bytearray()
+        except ValueError:
+            pass
+    return messages
+
+
+def streaming_decode(chunks):
+    decoder = WallboxBLEFrameDecoder()
+    messages = []
+    for chunk in chunks:
+        messages += decoder.feed(chunk)
+    return messages
+
+
+def main():
+    for name, message in (("status", STATUS_RESPONSE), ("sessions", SESSIONS_RESPONSE)):
+        for mtu in (20, 244):
+            chunks = record(message, mtu, framed=False)
+            assert legacy_decode(chunks) == streaming_decode(chunks) == [message]
+            framed_chunks = record(message, mtu, framed=True)
+            assert streaming_decode(framed_chunks) == [message]
+
+            number = 2000
+            legacy = timeit.timeit(lambda: legacy_decode(chunks), number=number) / number
+            streaming = timeit.timeit(lambda: streaming_decode(chunks), number=number) / number
+            framed = timeit.timeit(lambda: streaming_decode(framed_chunks), number=number) / number
+            print(
+                f"{name:9} mtu={mtu:<4} chunks={len(chunks):<4} "
+                f"legacy={legacy * 1e6:8.1f}us streaming={streaming * 1e6:8.1f}us framed={framed * 1e6:8.1f}us"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""Micro-benchmark for the request frame encoder.
+
+Compares WallboxBLEFrameEncoder with the previous json.dumps and bytes
+concatenation path for a status poll, a current write and a schedule write
+longer than 255 bytes, which the previous path could not encode.
+
+    python -m benchmarks.encoder
+"""
+from __future__ import annotations
+
+import json
+import timeit
+
+from custom_components.wallbox_ble.protocol import WallboxBLEApiConst, WallboxBLEFrameEncoder
+
+SCHEDULE = [{"id": i, "start": "0000", "stop": "0600", "days": [1, 1, 1, 1, 1, 0, 0]} for i in range(10)]
+
+REQUESTS = (
+    ("status", WallboxBLEApiConst.GET_STATUS, None),
+    ("current", WallboxBLEApiConst.SET_MAX_CHARGING_CURRENT, 16),
+    ("schedule", WallboxBLEApiConst.SET_SCHEDULE, SCHEDULE),
+)
+
+
+def legacy_encode(method, parameter, request_id):
+    payload = {"met": method, "par": parameter, "id": request_id}
+    data = json.dumps(payload, separators=[",", ":"])
+    data = bytes(data, "utf8")
+    data = b"EaE" + bytes([len(data)]) + data
+    return data + bytes([sum(c for c in data) % 256])
+
+
+def main():
+    encoder = WallboxBLEFrameEncoder()
+    number = 20000
+    for name, method, parameter in REQUESTS:
+        data = encoder.encode(method, parameter, 123)
+        try:
+            assert legacy_encode(method, parameter, 123) == data
+            legacy = timeit.timeit(lambda: legacy_encode(method, parameter, 123), number=number) / number
+            legacy = f"{legacy * 1e6:8.2f}us"
+        except ValueError:
+            legacy = "  failed"
+        encoded = timeit.timeit(lambda: encoder.encode(method, parameter, 123), number=number) / number
+        print(f"{name:9} bytes={len(data):<5} legacy={legacy} encoder={encoded * 1e6:8.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""Property based fuzzer for the notification frame decoder.
+
+Generates streams of valid, malformed, split and merged frames from a seed
+and checks properties of WallboxBLEFrameDecoder on each of them:
+
+ - valid frames are decoded exactly, however they are split or merged
+ - corrupted framed frames never raise and never produce a message that
+   was not sent
+ - the decoder decodes valid frames again once the corruption has passed
+
+    python -m benchmarks.fuzz --cases 10000 --seed 1
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import time
+
+from custom_components.wallbox_ble.protocol import FRAME_HEADER, WallboxBLEFrameDecoder
+
+# Frames sent after corruption before the decoder must be back in sync
+RESYNC_FRAMES = 3
+
+
+def random_value(rng: random.Random, depth=0):
+    kind = rng.randrange(7 if depth < 2 else 4)
+    if kind == 0:
+        return rng.randrange(-1000, 100000)
+    if kind == 1:
+        return round(rng.uniform(-100, 100), 3)
+    if kind == 2:
+        # Braces, quotes and escapes inside strings must not confuse the scanner
+        return "".join(rng.choice('ab{}"\\\\/ é\n') for _ in range(rng.randrange(12)))
+    if kind == 3:
+        return rng.choice([None, True, False])
+    if kind == 4:
+        return [random_value(rng, depth + 1) for _ in range(rng.randrange(4))]
+    return {f"k{index}": random_value(rng, depth + 1) for index in range(rng.randrange(5))}
+
+
+def random_message(rng: random.Random, request_id: int) -> dict:
+    message = {"id": request_id, "r": random_value(rng)}
+    if rng.random() < 0.3:
+        # Long responses overflow the one byte length field
+        message["pad"] = "x" * rng.randrange(200, 700)
+    return message
+
+
+def encode(message: dict, framed=True) -> bytes:
+    data = json.dumps(message, separators=(",", ":")).encode()
+    if not framed:
+        return data
+    data = FRAME_HEADER + bytes([len(data) & 0xFF]) + data
+    return data + bytes([sum(data) & 0xFF])
+
+
+def corrupt(rng: random.Random, frame: bytes) -> bytes:
+    """A framed frame with its checksum, length or bytes broken, or cut short."""
+    kind = rng.randrange(4)
+    data = bytearray(frame)
+    if kind == 0:
+        data[-1] = (data[-1] + rng.randrange(1, 256)) & 0xFF
+    elif kind == 1:
+        index = rng.randrange(len(FRAME_HEADER) + 1, len(data) - 1)
+        data[index] = (data[index] + rng.randrange(1, 256)) & 0xFF
+    elif kind == 2:
+        data[len(FRAME_HEADER)] = (data[len(FRAME_HEADER)] + rng.randrange(1, 256)) & 0xFF
+    else:
+        del data[rng.randrange(len(FRAME_HEADER) + 1, len(data) - 1) :]
+    return bytes(data)
+
+
+def chunk(rng: random.Random, stream: bytes) -> list[bytes]:
+    """Split a stream at random points, as notifications of a random MTU would."""
+    chunks = []
+    position = 0
+    size = rng.choice([1, 7, 20, 64, 182, 244, 512])
+    while position < len(stream):
+        length = rng.randrange(1, size + 1) if rng.random() < 0.5 else size
+        chunks.append(stream[position : position + length])
+        position += length
+    return chunks
+
+
+def check_valid(rng: random.Random) -> str | None:
+    """Valid frames, framed or bare, arbitrarily split and merged."""
+    framed = rng.random() < 0.8
+    messages = [random_message(rng, index) for index in range(1, rng.randrange(2, 8))]
+    stream = b"".join(encode(message, framed) for message in messages)
+    decoder = WallboxBLEFrameDecoder()
+    decoded = [message for data in chunk(rng, stream) for message in decoder.feed(data)]
+    if decoded != messages:
+        return f"decoded {len(decoded)} of {len(messages)} valid frames"
+    return None
+
+
+def check_corrupt(rng: random.Random) -> str | None:
+    """Framed frames with some corrupted, followed by valid ones."""
+    messages = [random_message(rng, index) for index in range(1, rng.randrange(3, 10))]
+    frames = [encode(message) if rng.random() < 0.6 else corrupt(rng, encode(message)) for message in messages]
+    tail = [random_message(rng, 1000 + index) for index in range(RESYNC_FRAMES)]
+    stream = b"".join(frames) + b"".join(encode(message) for message in tail)
+    decoder = WallboxBLEFrameDecoder()
+    try:
+        decoded = [message for data in chunk(rng, stream) for message in decoder.feed(data)]
+    except Exception as err:  # noqa: BLE001
+        return f"raised {err!r}"
+    sent = messages + tail
+    if any(message not in sent for message in decoded):
+        return "decoded a message that was not sent"
+    if decoded[-1:] != tail[-1:]:
+        return "did not resynchronise after corruption"
+    return None
+
+
+CHECKS = (check_valid, check_corrupt)
+
+
+def fuzz(cases, seed=0) -> list[tuple[int, str, str]]:
+    """Run cases of every check, returns (case seed, check, failure) for each failure."""
+    failures = []
+    for case in range(cases):
+        for check in CHECKS:
+            case_seed = seed * 1_000_003 + case
+            failure = check(random.Random(f"{check.__name__}/{case_seed}"))
+            if failure is not None:
+                failures.append((case_seed, check.__name__, failure))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    failures = fuzz(args.cases, args.seed)
+    elapsed = time.perf_counter() - started
+    for case_seed, name, failure in failures[:20]:
+        print(f"{name} case {case_seed}: {failure}")
+    print(f"{args.cases * len(CHECKS)} cases, {len(failures)} failures in {elapsed:.1f}s")
+    raise SystemExit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
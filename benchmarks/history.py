@@ -0,0 +1,84 @@
+"""Benchmark results tracked across runs.
+
+Each run is appended to a JSON lines history file together with the
+benchmark name and its arguments. A run is compared with the median of the
+last runs of the same benchmark and arguments, metrics ending in
+``per_second`` regress when they drop, metrics ending in ``_ms`` when they
+rise.
+"""
+from __future__ import annotations
+
+import json
+import math
+import os
+import statistics
+import subprocess
+import time
+
+# Runs of the same benchmark the median is taken over
+BASELINE_RUNS = 5
+
+# Fraction a metric may get worse than the baseline before it is a regression
+DEFAULT_TOLERANCE = 0.2
+
+
+def revision() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def load(path) -> list[dict]:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as file:
+        return [json.loads(line) for line in file if line.strip()]
+
+
+def append(path, benchmark, args: dict, results: dict) -> dict:
+    run = {
+        "benchmark": benchmark,
+        "args": args,
+        "time": time.time(),
+        "revision": revision(),
+        "results": results,
+    }
+    with open(path, "a", encoding="utf-8") as file:
+        file.write(json.dumps(run) + "\n")
+    return run
+
+
+def higher_is_better(metric) -> bool | None:
+    if metric.endswith("per_second"):
+        return True
+    if metric.endswith("_ms"):
+        return False
+    return None
+
+
+def compare(history: list[dict], benchmark, args: dict, results: dict, tolerance=DEFAULT_TOLERANCE) -> list[str]:
+    """Regressions of results against the median of the last runs with the same arguments."""
+    runs = [run for run in history if run["benchmark"] == benchmark and run["args"] == args][-BASELINE_RUNS:]
+    regressions = []
+    for metric, value in results.items():
+        direction = higher_is_better(metric)
+        baseline = [run["results"][metric] for run in runs if isinstance(run["results"].get(metric), (int, float))]
+        baseline = [sample for sample in baseline if not math.isnan(sample)]
+        if direction is None or not baseline or math.isnan(value):
+            continue
+        median = statistics.median(baseline)
+        if direction and value < median * (1 - tolerance):
+            regressions.append(f"{metric} dropped to {value:.2f} from {median:.2f}")
+        elif not direction and value > median * (1 + tolerance):
+            regressions.append(f"{metric} rose to {value:.2f} from {median:.2f}")
+    return regressions
+
+
+def track(path, benchmark, args: dict, results: dict, tolerance=DEFAULT_TOLERANCE) -> list[str]:
+    """Compare results with the history in path, then add them to it."""
+    regressions = compare(load(path), benchmark, args, results, tolerance)
+    append(path, benchmark, args, results)
+    return regressions
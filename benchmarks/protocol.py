@@ -0,0 +1,131 @@
+"""End-to-end protocol benchmark against the simulated charger.
+
+Measures request throughput, request latency percentiles and reconnect
+time of WallboxBLEApiClient over a WallboxBLESimulator link.
+
+    python -m benchmarks.protocol --mtu 20 --latency 0.02 --concurrency 4
+
+With --history results are compared with earlier runs of the same arguments
+and appended to the file, the exit status is 1 on a regression.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from custom_components.wallbox_ble.api import WallboxBLEApiConst
+from custom_components.wallbox_ble.capture import WallboxBLECapture
+
+from . import history
+from .simulator import SimulatedApiClient, WallboxBLESimulator
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return float("nan")
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def measure_requests(client, requests, concurrency, method=WallboxBLEApiConst.GET_STATUS):
+    latencies = []
+    failures = 0
+    remaining = iter(range(requests))
+
+    async def worker():
+        nonlocal failures
+        for _ in remaining:
+            start = time.perf_counter()
+            ok, _ = await client.request(method)
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                failures += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests_per_second": requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.fmean(latencies) * 1000 if latencies else float("nan"),
+        "failures": failures,
+    }
+
+
+async def measure_reconnects(client, simulator, reconnects):
+    """Time reconnects after a connection that was up past the stable threshold,
+    which reconnect right away, and after one that dropped at once, which back off."""
+    results = {}
+    for case, hold in (("warm", client.stable_connection_time), ("backoff", 0.0)):
+        durations = []
+        for _ in range(reconnects):
+            await asyncio.sleep(hold)
+            simulator.drop_connection()
+            durations.append(await client.wait_connected(timeout=120))
+        results[f"{case}_reconnect_p50_ms"] = percentile(durations, 0.50) * 1000
+        results[f"{case}_reconnect_max_ms"] = max(durations) * 1000
+    return results
+
+
+async def run(args):
+    simulator = WallboxBLESimulator(
+        mtu=args.mtu,
+        latency=args.latency,
+        loss=args.loss,
+        reorder=args.reorder,
+        connect_latency=args.connect_latency,
+        seed=args.seed,
+    )
+    client = SimulatedApiClient(simulator, request_window=args.window)
+    client.stable_connection_time = args.stable_time
+    if args.capture:
+        client.capture = WallboxBLECapture("simulator")
+    client.start()
+    await client.wait_connected()
+
+    results = await measure_requests(client, args.requests, args.concurrency)
+    results.update(await measure_reconnects(client, simulator, args.reconnects))
+    client.client_task.cancel()
+    if args.capture:
+        with open(args.capture, "w", encoding="utf-8") as file:
+            file.write(client.capture.dumps())
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mtu", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.01, help="one-way notification latency in seconds")
+    parser.add_argument("--loss", type=float, default=0.0, help="probability of dropping a notification chunk")
+    parser.add_argument("--reorder", type=float, default=0.0, help="probability of holding back a whole response")
+    parser.add_argument("--connect-latency", type=float, default=0.05)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--window", type=int, default=4, help="client request window")
+    parser.add_argument("--reconnects", type=int, default=3)
+    parser.add_argument("--stable-time", type=float, default=0.5, help="client stable connection threshold in seconds")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--capture", help="record the raw traffic of the run to this capture file")
+    parser.add_argument("--history", help="JSON lines file to track results across runs in")
+    parser.add_argument("--tolerance", type=float, default=history.DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    for name, value in results.items():
+        print(f"{name:20} {value:10.2f}")
+    if args.history:
+        tracked = {key: value for key, value in vars(args).items() if key not in ("capture", "history", "tolerance")}
+        # Backoff reconnects are jittered on purpose, too noisy to compare
+        compared = {key: value for key, value in results.items() if not key.startswith("backoff_")}
+        regressions = history.track(args.history, "protocol", tracked, compared, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
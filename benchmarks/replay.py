@@ -0,0 +1,79 @@
+"""Replay a recorded capture through the frame decoder.
+
+Feeds the notifications of a capture, recorded with the capture service or
+``python -m benchmarks.protocol --capture``, to WallboxBLEFrameDecoder at the
+recorded pace or faster. Reports how many frames were decoded, how many
+requests got their response and the response latency as recorded.
+
+    python -m benchmarks.replay wallbox_ble_aabbccddeeff_1700000000.capture --speed 0
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import time
+
+from custom_components.wallbox_ble.capture import RX, TX, WallboxBLECapture, async_replay
+from custom_components.wallbox_ble.protocol import WallboxBLEFrameDecoder
+
+from . import history
+from .protocol import percentile
+
+
+async def replay(capture: WallboxBLECapture, speed) -> dict:
+    requests = WallboxBLEFrameDecoder()
+    responses = WallboxBLEFrameDecoder()
+    sent = {}
+    latencies = []
+    unsolicited = 0
+
+    def handle(at, direction, data):
+        nonlocal unsolicited
+        decoder = requests if direction == TX else responses
+        for message in decoder.feed(data):
+            if direction == TX:
+                sent[message.get("id")] = at
+            elif (started := sent.pop(message.get("id"), None)) is not None:
+                latencies.append(at - started)
+            else:
+                unsolicited += 1
+
+    started = time.perf_counter()
+    await async_replay(capture, handle, speed)
+    elapsed = time.perf_counter() - started
+    received = sum(len(data) for data in capture.chunks(RX))
+    return {
+        "frames": responses.frames,
+        "decode_errors": responses.errors,
+        "answered": len(latencies),
+        "unanswered": len(sent),
+        "unsolicited": unsolicited,
+        "rx_mb_per_second": received / elapsed / 1e6 if elapsed else float("nan"),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("capture")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed, 0 for as fast as possible")
+    parser.add_argument("--history", help="JSON lines file to track results across runs in")
+    parser.add_argument("--tolerance", type=float, default=history.DEFAULT_TOLERANCE)
+    args = parser.parse_args()
+
+    with open(args.capture, encoding="utf-8") as file:
+        capture = WallboxBLECapture.loads(file.read())
+    results = asyncio.run(replay(capture, args.speed))
+    for name, value in results.items():
+        print(f"{name:20} {value:10.2f}")
+    if args.history:
+        tracked = {"capture": args.capture, "speed": args.speed}
+        regressions = history.track(args.history, "replay", tracked, results, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        raise SystemExit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""In-process simulator of the Wallbox UART GATT service.
+
+WallboxBLESimulator plays the charger side of the protocol: it decodes EaE
+framed requests written to the RX characteristic and notifies responses on
+the TX characteristic, split into MTU sized chunks. Latency, notification
+loss and reordering are configurable so link quality can be varied.
+SimulatedApiClient is a WallboxBLEApiClient that connects to a simulator
+instead of a real charger.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import time
+
+from custom_components.wallbox_ble.api import WallboxBLEApiClient, WallboxBLEApiConst
+from custom_components.wallbox_ble.protocol import FRAME_HEADER, WallboxBLEFrameDecoder
+
+# Setter method codes and the getter that reads back what they wrote
+PAIRED_METHODS = {
+    getattr(WallboxBLEApiConst, name): getattr(WallboxBLEApiConst, "GET_" + name[len("SET_") :])
+    for name in dir(WallboxBLEApiConst)
+    if name.startswith("SET_") and hasattr(WallboxBLEApiConst, "GET_" + name[len("SET_") :])
+}
+KNOWN_METHODS = {
+    value for name, value in vars(WallboxBLEApiConst).items() if name.isupper() and isinstance(value, str) and "UUID" not in name
+}
+
+
+class FakeCharacteristic:
+    def __init__(self, uuid):
+        self.uuid = uuid
+
+
+class FakeService:
+    def __init__(self, uuid, characteristics):
+        self.uuid = uuid
+        self.characteristics = {uuid: FakeCharacteristic(uuid) for uuid in characteristics}
+
+    def get_characteristic(self, uuid):
+        return self.characteristics.get(uuid)
+
+
+class FakeServices:
+    def __init__(self, services):
+        self.services = {service.uuid: service for service in services}
+
+    def get_service(self, uuid):
+        return self.services.get(uuid)
+
+
+def encode_frame(message, framed=True) -> bytes:
+    data = json.dumps(message, separators=(",", ":")).encode()
+    if not framed:
+        return data
+    data = FRAME_HEADER + bytes([len(data) & 0xFF]) + data
+    return data + bytes([sum(data) & 0xFF])
+
+
+class WallboxBLESimulator:
+    """The charger side of the UART protocol."""
+
+    def __init__(
+        self,
+        mtu=20,
+        latency=0.0,
+        loss=0.0,
+        reorder=0.0,
+        connect_latency=0.0,
+        framed=True,
+        seed=None,
+    ):
+        self.mtu = mtu
+        self.latency = latency
+        self.loss = loss
+        self.reorder = reorder
+        self.connect_latency = connect_latency
+        self.framed = framed
+        self.random = random.Random(seed)
+        self.client = None
+        self.requests = 0
+        self.status = {"st": 0, "cur": 16, "mxI": 32, "l": 0, "pw": 0, "en": 0.0}
+        self.config = {
+            WallboxBLEApiConst.GET_MAX_AVAILABLE_CURRENT: 32,
+            WallboxBLEApiConst.GET_SERIAL_NUMBER: "123456",
+            WallboxBLEApiConst.GET_CHARGER_VERSIONS: {"fw": "6.2.13"},
+            WallboxBLEApiConst.GET_MAC_ADDRESSES: {"bt": "00:11:22:33:44:55"},
+        }
+        self.sessions = []
+
+    async def connect(self, disconnected_callback):
+        await asyncio.sleep(self.connect_latency)
+        self.client = WallboxBLESimulatorClient(self, disconnected_callback)
+        return self.client
+
+    def drop_connection(self):
+        """Simulate the link going away, as when the charger moves out of range."""
+        if self.client is not None:
+            self.client.drop()
+
+    def push_status(self):
+        """Send the status unasked, as firmware that pushes state changes does."""
+        if self.client is not None and self.client.is_connected:
+            self.client.schedule_response({"met": WallboxBLEApiConst.GET_STATUS, "r": dict(self.status)})
+
+    def respond(self, method, parameter):
+        """Apply a request to the simulated charger and return the response value."""
+        if method == WallboxBLEApiConst.GET_STATUS:
+            return dict(self.status)
+        if method == WallboxBLEApiConst.LOCK:
+            self.status["l"] = int(parameter)
+            self.status["st"] = 6 if parameter else 0
+            return 1
+        if method == WallboxBLEApiConst.SET_MAX_CHARGING_CURRENT:
+            self.status["cur"] = min(int(parameter), self.config[WallboxBLEApiConst.GET_MAX_AVAILABLE_CURRENT])
+            return 1
+        if method == WallboxBLEApiConst.START_STOP_CHARGING:
+            self.status["st"] = 1 if parameter else 4
+            return 1
+        if method == WallboxBLEApiConst.GET_SESSIONS_INFO:
+            return {"count": len(self.sessions)}
+        if method == WallboxBLEApiConst.GET_SESSION:
+            index = parameter if isinstance(parameter, int) else 0
+            return self.sessions[index] if 0 <= index < len(self.sessions) else None
+        if method in PAIRED_METHODS:
+            self.config[PAIRED_METHODS[method]] = parameter
+            return 1
+        if method in KNOWN_METHODS:
+            return self.config.get(method, 0)
+        return None
+
+    def chunks(self, message) -> list[bytes]:
+        data = encode_frame(message, self.framed)
+        return [data[i : i + self.mtu] for i in range(0, len(data), self.mtu)]
+
+
+class WallboxBLESimulatorClient:
+    """Stands in for a connected BleakClient."""
+
+    def __init__(self, simulator, disconnected_callback):
+        self.simulator = simulator
+        self.disconnected_callback = disconnected_callback
+        self.is_connected = True
+        self.notify_callback = None
+        self.decoder = WallboxBLEFrameDecoder()
+        self.services = FakeServices(
+            [
+                FakeService(
+                    WallboxBLEApiConst.UART_SERVICE_UUID,
+                    (WallboxBLEApiConst.UART_RX_CHAR_UUID, WallboxBLEApiConst.UART_TX_CHAR_UUID),
+                )
+            ]
+        )
+
+    @property
+    def mtu_size(self):
+        return self.simulator.mtu + 3
+
+    async def pair(self):
+        return True
+
+    async def start_notify(self, uuid, callback):
+        self.notify_callback = callback
+
+    async def write_gatt_char(self, char, data, response=False):
+        if not self.is_connected:
+            raise ConnectionError("Not connected")
+        for message in self.decoder.feed(data):
+            self.simulator.requests += 1
+            result = self.simulator.respond(message.get("met"), message.get("par"))
+            self.schedule_response({"id": message.get("id"), "r": result})
+
+    def schedule_response(self, message):
+        """Send a response after the link latency.
+
+        Notifications on one characteristic arrive in order, so reordering holds
+        back whole responses and lets later ones overtake them. Loss drops
+        single chunks, which corrupts the frame they belong to.
+        """
+        simulator = self.simulator
+        delay = simulator.latency
+        if simulator.random.random() < simulator.reorder:
+            delay += simulator.latency + 0.001
+        chunks = [chunk for chunk in simulator.chunks(message) if simulator.random.random() >= simulator.loss]
+        asyncio.get_running_loop().call_later(delay, self.notify, chunks)
+
+    def notify(self, chunks):
+        if self.is_connected and self.notify_callback is not None:
+            for chunk in chunks:
+                self.notify_callback(WallboxBLEApiConst.UART_TX_CHAR_UUID, bytearray(chunk))
+
+    def drop(self):
+        if self.is_connected:
+            self.is_connected = False
+            self.disconnected_callback(self)
+
+    async def disconnect(self):
+        self.is_connected = False
+        return True
+
+
+class SimulatedApiClient(WallboxBLEApiClient):
+    """A WallboxBLEApiClient connected to a WallboxBLESimulator."""
+
+    def __init__(self, simulator: WallboxBLESimulator, **kwargs):
+        super().__init__(None, "00:00:00:00:00:00", **kwargs)
+        self.simulator = simulator
+
+    async def connect(self, disconnected_callback):
+        return await self.simulator.connect(disconnected_callback)
+
+    async def wait_connected(self, timeout=5.0) -> float:
+        start = time.monotonic()
+        # A dropped link is only torn down once the supervisor gets to run
+        while self.connected_event.is_set() and not self.ready:
+            await asyncio.sleep(0)
+        await asyncio.wait_for(self.connection_established(), timeout)
+        return time.monotonic() - start
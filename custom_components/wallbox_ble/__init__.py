@@ -1,35 +1,44 @@
 from __future__ import annotations
 
+import time
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_PASSWORD, CONF_USERNAME, Platform
 from homeassistant.core import HomeAssistant
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .api import WallboxBLEApiClient
-from .const import DOMAIN
+from .const import DOMAIN, LOGGER
 from .coordinator import WallboxBLEDataUpdateCoordinator
+from .services import async_setup_services
 
 PLATFORMS: list[Platform] = [
     Platform.LOCK,
     Platform.NUMBER,
     Platform.SENSOR,
     Platform.SWITCH,
+    Platform.UPDATE,
 ]
 
 
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
+    started = time.monotonic()
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator = await WallboxBLEDataUpdateCoordinator.create(
         hass=hass,
         address=entry.unique_id,
     )
-    # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
-    await coordinator.async_config_entry_first_refresh()
+    coordinator.async_join_site(entry.options)
+    async_setup_services(hass)
+    # Entities start from the restored snapshot, the first real refresh runs
+    # once the charger is connected instead of holding up startup
+    entry.async_create_background_task(hass, coordinator.async_first_refresh(), f"{DOMAIN} first refresh")
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+    LOGGER.debug("Set up %s in %.3fs", entry.title, time.monotonic() - started)
 
     return True
 
@@ -37,7 +46,7 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
     if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        hass.data[DOMAIN].pop(entry.entry_id).async_stop()
     return unloaded
 
 
@@ -3,260 +3,392 @@ from __future__ import annotations
 
 import random
 import asyncio
-import json
-import contextlib
-
-from bleak import BleakClient
-from bleak_retry_connector import establish_connection
-from bleak.exc import BleakDBusError
-
-from dbus_fast.aio import MessageBus
-from dbus_fast.auth import AuthExternal
-from dbus_fast.constants import BusType
-from dbus_fast.message import Message
-from dbus_fast.service import ServiceInterface, method
-
-from homeassistant.components.bluetooth import async_ble_device_from_address
-
-from .const import LOGGER
-
-
-class WallboxBLEApiConst:
-    UART_SERVICE_UUID = "331a36f5-2459-45ea-9d95-6142f0c4b307"
-    UART_RX_CHAR_UUID = "a9da6040-0823-4995-94ec-9ce41ca28833"
-    UART_TX_CHAR_UUID = "a73e9a10-628f-4494-a099-12efaf72258f"
-
-    GET_AUTOLOCK = "g_alo"
-    GET_BATTERY_CONFIG = "r_socr"
-    GET_CHARGER_VERSIONS = "fw_v_"
-    GET_DISCHARGE_SESSION = "r_dis"
-    GET_DYNAMIC_GRID_CODE = "ggcds"
-    GET_DYNAMIC_GRID_CODE_REGULATIONS = "r_gcdl"
-    GET_DYNAMIC_GRID_CODE_FEATURES = "r_gcdf"
-    GET_DYNAMIC_GRID_CODE_LOGS = "r_gcli"
-    GET_DYNAMIC_GRID_CODE_LOGS_DETAIL = "r_gcld"
-    GET_DYNAMIC_GRID_CODE_LOGS_SIZE = "r_gcls"
-    GET_DYNAMIC_GRID_CODE_ALERT = "r_gcai"
-    GET_DYNAMIC_GRID_CODE_ALERT_SIZE = "r_gcas"
-    GET_ECO_SMART_CONFIGURATION = "g_ecos"
-    GET_GESTURE_CONFIGURATION = "ggsta"
-    GET_GRID_CODE = "r_gcd"
-    GET_HALO_CONFIG = "g_halocfg"
-    GET_HOTSPOT_UPDATE_STATUS = "r_hup"
-    GET_IP_MODE = "gimod"
-    GET_LOCK_STATUS = "r_lck"
-    GET_MAC_ADDRESSES = "g_mac"
-    GET_MAX_AVAILABLE_CURRENT = "r_fsI"
-    GET_MID_CONFIGURATION = "g_mid"
-    GET_MOBILE_CONNECTIVITY = "gmcon"
-    GET_NETWORKS_STATUS = "gnsta"
-    GET_OCPP = "g_ocpp"
-    GET_POWER_BOOST = "r_hsh"
-    GET_POWER_BOOST_STATUS = "r_dca"
-    GET_POWER_INFUSION = "g_pwi"
-    GET_POWER_SHARING = "g_psh"
-    GET_PROXY_MODE = "gpmod"
-    GET_SCHEDULE = "r_sch"
-    GET_SERIAL_NUMBER = "r_sn_"
-    GET_SESSIONS_INFO = "r_ses"
-    GET_SESSION = "r_log"
-    GET_STATUS = "r_dat"
-    GET_TIMEZONE = "g_tzn"
-    GET_GROUNDING_STATUS = "r_wel"
-    GET_WIFI_NETWORKS = "gwnet"
-    GET_WIFI_STATUS = "gwsta"
-    LOCK = "w_lck"
-    REBOOT = "rebot"
-    SET_AUTOLOCK = "s_alo"
-    SET_BATTERY_CONFIG = "w_socr"
-    SEND_TRANSACTION_DATA = "w_td"
-    SET_DATA_TRANSACTION_STATUS = "s_dts"
-    SET_DYNAMIC_GRID_CODE = "sgcds"
-    SET_DYNAMIC_GRID_CODE_REGULATION = "w_gcdr"
-    SET_DYNAMIC_GRID_CODE_FEATURE = "w_gcdf"
-    SET_ECO_SMART_CONFIGURATION = "s_ecos"
-    SET_GESTURE_CONFIGURATION = "sgsta"
-    SET_GRID_CODE = "w_gcd"
-    SET_HALO_CONFIG = "s_halocfg"
-    SET_HOTSPOT_UPDATE = "s_hup"
-    SET_HOTSPOT_UPDATE_INFO = "s_deb"
-    SET_IP_MODE = "simod"
-    SET_MAX_CHARGING_CURRENT = "w_mxI"
-    SET_MID_CONFIGURATION = "s_mid"
-    SET_MOBILE_CONNECTIVITY = "smcon"
-    SET_MOBILE_CONNECTIVITY_STATUS = "smcen"
-    SET_MULTIUSER = "s_mus"
-    SET_OCPP = "s_ocpp"
-    SET_POWER_BOOST = "w_hsh"
-    SET_POWER_INFUSION = "s_pwi"
-    SET_POWER_SHARING = "s_psh"
-    SET_PROXY_MODE = "spmod"
-    SET_SCHEDULE = "w_sch"
-    SET_TIME = "Wtime"
-    SET_TIMEZONE = "s_tzn"
-    SET_USER = "suser"
-    SET_USER_LIST = "sulis"
-    SET_GROUNDING_STATUS = "w_wel"
-    SET_WIFI = "swcon"
-    SET_WIFI_STATUS = "swsta"
-    SOFTWARE_CHECK = "gupdc"
-    START_STOP_CHARGING = "w_cha"
-    UNLOCK_MOBILE_SIM = "smpuk"
-    UPDATE_SOFTWARE_PROGRESS = "supdp"
-    UPDATE_SOFTWARE = "supds"
-
-    STATUS_CODES = [
-        "READY",  # 0
-        "CHARGING",  # 1
-        "CONNECTED_WAITING_CAR",  # 2
-        "CONNECTED_WAITING_SCHEDULE",  # 3
-        "PAUSED",  # 4
-        "SCHEDULE_END",  # 5
-        "LOCKED",  # 6
-        "ERROR",  # 7
-        "CONNECTED_WAITING_CURRENT_ASSIGNATION",  # 8
-        "UNCONFIGURED_POWER_SHARING",  # 9
-        "QUEUE_BY_POWER_BOOST",  # 10
-        "DISCHARGING",  # 11
-        "CONNECTED_WAITING_ADMIN_AUTH_FOR_MID",  # 12
-        "CONNECTED_MID_SAFETY_MARGIN_EXCEEDED",  # 13
-        "OCPP_UNAVAILABLE",  # 14
-        "OCPP_CHARGE_FINISHING",  # 15
-        "OCPP_RESERVED",  # 16
-        "UPDATING",  # 17
-        "QUEUE_BY_ECO_SMART",  # 18
-    ]
-
-
-class AgentInterface(ServiceInterface):
-    def __init__(self, name):
-        super().__init__(name)
-
-    @method()
-    def RequestAuthorization(self, device: 'o'):
-        LOGGER.debug(f"Initial pairing! Got RequestAuthorization for {device}")
-        return
+import time
+from datetime import timedelta
+
+from bleak_retry_connector import BleakClientWithServiceCache, establish_connection
+from bleak.exc import BleakError
+
+from homeassistant.components.bluetooth import async_ble_device_from_address, async_last_service_info
+from homeassistant.const import EVENT_HOMEASSISTANT_STOP
+from homeassistant.helpers.storage import Store
+
+from .cache import FOREVER, WallboxBLEResponseCache
+from .capture import RX, TX
+from .const import (
+    CACHE_SAVE_DELAY,
+    DOMAIN,
+    LOGGER,
+    PAIRING_AGENT_DATA_KEY,
+    RECONNECT_MAX_DELAY,
+    RECONNECT_MIN_DELAY,
+    READ_RETRIES,
+    REQUEST_WINDOW,
+    RESPONSE_TIMEOUT,
+    STABLE_CONNECTION_TIME,
+    WRITE_TIMEOUT,
+)
+from .pairing import WallboxBLEPairingAgent
+from .protocol import (
+    ATT_HEADER_SIZE,
+    DEFAULT_WRITE_SIZE,
+    WallboxBLEApiConst,
+    WallboxBLEFrameDecoder,
+    WallboxBLEFrameEncoder,
+    split_writes,
+)
+from .stats import WallboxBLELinkStats
+
+
+# Methods without side effects, safe to send again after a timeout
+READ_METHODS = frozenset(value for name, value in vars(WallboxBLEApiConst).items() if name.startswith("GET_"))
+
+# How long a response to a parameterless read stays valid
+CACHE_TTLS = {
+    WallboxBLEApiConst.GET_SERIAL_NUMBER: FOREVER,
+    WallboxBLEApiConst.GET_MAC_ADDRESSES: FOREVER,
+    WallboxBLEApiConst.GET_CHARGER_VERSIONS: timedelta(hours=24),
+    WallboxBLEApiConst.GET_MAX_AVAILABLE_CURRENT: timedelta(hours=1),
+    WallboxBLEApiConst.GET_GROUNDING_STATUS: timedelta(hours=1),
+    WallboxBLEApiConst.GET_MID_CONFIGURATION: timedelta(hours=1),
+    WallboxBLEApiConst.GET_OCPP: timedelta(hours=1),
+    WallboxBLEApiConst.GET_TIMEZONE: timedelta(hours=1),
+    WallboxBLEApiConst.GET_AUTOLOCK: timedelta(minutes=15),
+    WallboxBLEApiConst.GET_ECO_SMART_CONFIGURATION: timedelta(minutes=15),
+    WallboxBLEApiConst.GET_HALO_CONFIG: timedelta(minutes=15),
+    WallboxBLEApiConst.GET_POWER_BOOST: timedelta(minutes=15),
+    WallboxBLEApiConst.GET_POWER_SHARING: timedelta(minutes=15),
+    WallboxBLEApiConst.GET_SCHEDULE: timedelta(minutes=15),
+}
+
+# Cached reads made stale by a successful write. Writes that only change what
+# r_dat reports, like LOCK or SET_MAX_CHARGING_CURRENT, have nothing to drop.
+INVALIDATES = {
+    WallboxBLEApiConst.SET_AUTOLOCK: (WallboxBLEApiConst.GET_AUTOLOCK,),
+    WallboxBLEApiConst.SET_ECO_SMART_CONFIGURATION: (WallboxBLEApiConst.GET_ECO_SMART_CONFIGURATION,),
+    WallboxBLEApiConst.SET_GROUNDING_STATUS: (WallboxBLEApiConst.GET_GROUNDING_STATUS,),
+    WallboxBLEApiConst.SET_HALO_CONFIG: (WallboxBLEApiConst.GET_HALO_CONFIG,),
+    WallboxBLEApiConst.SET_MID_CONFIGURATION: (WallboxBLEApiConst.GET_MID_CONFIGURATION,),
+    WallboxBLEApiConst.SET_OCPP: (WallboxBLEApiConst.GET_OCPP,),
+    WallboxBLEApiConst.SET_POWER_BOOST: (WallboxBLEApiConst.GET_POWER_BOOST,),
+    WallboxBLEApiConst.SET_POWER_SHARING: (WallboxBLEApiConst.GET_POWER_SHARING, WallboxBLEApiConst.GET_MAX_AVAILABLE_CURRENT),
+    WallboxBLEApiConst.SET_SCHEDULE: (WallboxBLEApiConst.GET_SCHEDULE,),
+    WallboxBLEApiConst.SET_TIMEZONE: (WallboxBLEApiConst.GET_TIMEZONE,),
+    WallboxBLEApiConst.UPDATE_SOFTWARE: (WallboxBLEApiConst.GET_CHARGER_VERSIONS,),
+    WallboxBLEApiConst.REBOOT: tuple(CACHE_TTLS),
+}
+
+
+def storage_key(kind, address):
+    return f"{DOMAIN}.{kind}.{address.replace(':', '').lower()}"
 
 
 class WallboxBLEApiClient:
+    def __init__(self, hass, address, request_window=REQUEST_WINDOW, broker=None, pairing_agent=None):
+        self.client = None
+        self.rx_char = None
+        self.bonded = False
+        self.connect_time = None
+        self.stable_connection_time = STABLE_CONNECTION_TIME
+        self.connected_event = asyncio.Event()
+        self.decoder = WallboxBLEFrameDecoder()
+        self.encoder = WallboxBLEFrameEncoder()
+        self.write_lock = asyncio.Lock()
+        self.pending = {}
+        self.request_methods = {}
+        self.push_callback = None
+        self.connected_callback = None
+        # A WallboxBLECapture recording the raw traffic, when set
+        self.capture = None
+        self.pushes = 0
+        self.request_window = asyncio.Semaphore(request_window)
+        self.next_request_id = 0
+        self.write_timeout = WRITE_TIMEOUT
+        self.response_timeout = RESPONSE_TIMEOUT
+        self.read_retries = READ_RETRIES
+        self.stats = WallboxBLELinkStats()
+        self.response_timing = {}
+        self.frame_started_at = 0.0
+        self.frame_chunks = 0
+        self.hass = hass
+        self.address = address
+        self.broker = broker
+        self.pairing_agent = pairing_agent or WallboxBLEPairingAgent()
+        self.cache = WallboxBLEResponseCache(CACHE_TTLS, INVALIDATES)
+        self.cache_store = None
+        self.client_task = None
+
+    async def ensure_bonded(self, client, device):
+        """Pair unless the device is already bonded."""
+        details = device.details if isinstance(device.details, dict) else {}
+        if self.bonded or details.get("props", {}).get("Paired"):
+            self.bonded = True
+            return
 
-    async def pair_client(self):
-        bus = await MessageBus(bus_type=BusType.SYSTEM, negotiate_unix_fd=True).connect()
-
-        interface = AgentInterface('org.bluez.Agent1')
-        bus.export('/wallbox/agent', interface)
-
-        introspection = await bus.introspect('org.bluez', '/org/bluez')
-        obj = bus.get_proxy_object('org.bluez', '/org/bluez', introspection)
-        agent_manager = obj.get_interface('org.bluez.AgentManager1')
-
-        await agent_manager.call_register_agent("/wallbox/agent", "NoInputNoOutput")
-
-        await self.client.pair()
-
-        bus.disconnect()
+        try:
+            await self.pairing_agent.async_pair(client)
+        except NotImplementedError:
+            # The backend, such as an older proxy, bonds on its own or not at all
+            LOGGER.debug("Pairing is not supported by this backend, going on unbonded")
+        self.bonded = True
+
+    async def connect(self, disconnected_callback):
+        """Connect and bond, returns the connected client."""
+
+        def ble_device_callback():
+            return async_ble_device_from_address(self.hass, self.address, connectable=True)
+
+        device = ble_device_callback()
+        if not device:
+            raise BleakError("No device found")
+        client = await establish_connection(
+            BleakClientWithServiceCache,
+            device,
+            self.address,
+            disconnected_callback=disconnected_callback,
+            ble_device_callback=lambda: ble_device_callback() or device,
+        )
+        try:
+            await self.ensure_bonded(client, device)
+        except Exception:
+            await client.disconnect()
+            raise
+        return client
 
     async def run_ble_client(self):
-        async def callback_handler(sender, data):
-            await self.rx_queue.put(data)
+        def callback_handler(sender, data):
+            self.handle_notification(data)
 
         disconnected_event = asyncio.Event()
 
         def disconnected_callback(client):
             LOGGER.debug("Disconnected!")
+            self.fail_pending_requests()
             disconnected_event.set()
 
+        backoff = RECONNECT_MIN_DELAY
         while True:
             LOGGER.debug("Connecting...")
+            connecting_at = time.monotonic()
+            connected_at = None
 
             try:
-                device = async_ble_device_from_address(self.hass, self.address, connectable=True)
-                if not device:
-                    raise Exception("No device found")
-                async with BleakClient(device, disconnected_callback=disconnected_callback) as self.client:
-                    LOGGER.debug("Connected!")
-                    try:
-                        await self.client.pair()
-                    except NotImplementedError:
-                        # Ugly hack until we wait for HA pairing support to land
-                        await self.client._backend._client.bluetooth_device_pair(self.client._backend._address_as_int)
-                    await self.client.start_notify(WallboxBLEApiConst.UART_TX_CHAR_UUID, callback_handler)
+                if self.broker is not None:
+                    # Waits for a slot on the adapter, when a turn is over the
+                    # broker ends the connection as if it dropped
+                    await self.broker.acquire_connection(self.address, self.adapter(), disconnected_event.set)
+                    connecting_at = time.monotonic()
+                client = await self.connect(disconnected_callback)
+                try:
+                    uart_service = client.services.get_service(WallboxBLEApiConst.UART_SERVICE_UUID)
+                    self.rx_char = uart_service.get_characteristic(WallboxBLEApiConst.UART_RX_CHAR_UUID)
+                    await client.start_notify(WallboxBLEApiConst.UART_TX_CHAR_UUID, callback_handler)
+
+                    connected_at = time.monotonic()
+                    self.connect_time = connected_at - connecting_at
+                    self.client = client
+                    self.connected_event.set()
+                    LOGGER.debug("Connected in %.2fs!", self.connect_time)
+                    if self.connected_callback is not None:
+                        self.connected_callback()
                     await disconnected_event.wait()
+                finally:
+                    self.client = None
+                    self.rx_char = None
+                    self.connected_event.clear()
+                    await client.disconnect()
             except Exception as e:
-                LOGGER.debug(f"Error: {type(e)}, {e}")
-                await asyncio.sleep(1.0)
+                LOGGER.debug("Error: %s, %s", type(e), e)
+            finally:
+                if self.broker is not None:
+                    self.broker.release_connection(self.address)
 
-            self.client = None
             disconnected_event.clear()
+            if connected_at is not None and time.monotonic() - connected_at >= self.stable_connection_time:
+                # Warm reconnect after a connection that was up for a while
+                backoff = RECONNECT_MIN_DELAY
+                continue
+
+            # A connection that never came up or dropped right away may have lost its bond
+            self.bonded = False
+            delay = random.uniform(RECONNECT_MIN_DELAY, backoff)
+            backoff = min(backoff * 2, RECONNECT_MAX_DELAY)
+            LOGGER.debug("Reconnecting in %.1fs", delay)
+            await asyncio.sleep(delay)
+
+    def adapter(self):
+        """Source of the adapter or proxy the charger is reached through."""
+        service_info = async_last_service_info(self.hass, self.address, connectable=True)
+        return service_info.source if service_info else None
 
     async def connection_established(self):
-        while True:
-            if self.client and self.client.is_connected:
-                return
-            asyncio.sleep(0.1)
+        await self.connected_event.wait()
 
     @classmethod
-    async def create(cls, hass, address):
-        self = WallboxBLEApiClient()
-        self.client = None
-        self.rx_queue = asyncio.Queue()
-        self.hass = hass
-        self.address = address
-        self.client_task = asyncio.create_task(self.run_ble_client())
+    async def create(cls, hass, address, request_window=REQUEST_WINDOW, broker=None):
+        pairing_agent = hass.data.get(PAIRING_AGENT_DATA_KEY)
+        if pairing_agent is None:
+            pairing_agent = hass.data[PAIRING_AGENT_DATA_KEY] = WallboxBLEPairingAgent()
+            hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, pairing_agent.close)
+        self = cls(hass, address, request_window, broker, pairing_agent)
+        self.cache_store = Store(hass, 1, storage_key("cache", address))
+        self.cache.restore(await self.cache_store.async_load() or {})
+        self.start()
         return self
 
-    async def get_parsed_response(self, request_id):
-        data = bytearray()
+    def start(self):
+        self.client_task = asyncio.create_task(self.run_ble_client())
+
+    def stop(self):
+        if self.client_task is not None:
+            self.client_task.cancel()
+
+    def handle_notification(self, data):
+        """Decode notification chunks and route each response to its waiter."""
+        now = time.monotonic()
+        if self.capture is not None:
+            self.capture.record(RX, data)
+        if not self.decoder.buffer:
+            self.frame_started_at = now
+            self.frame_chunks = 0
+        self.frame_chunks += 1
+
+        messages = self.decoder.feed(data)
+        for message in messages:
+            LOGGER.debug("Got %s", message)
+            request_id = message.get("id")
+            future = self.pending.get(request_id)
+            if future is None or future.done():
+                self.handle_unsolicited(message)
+                continue
+            self.response_timing[request_id] = (self.frame_started_at, self.frame_chunks)
+            future.set_result(message.get("r"))
+        if messages:
+            self.frame_started_at = now
+            self.frame_chunks = 0
+
+    def handle_unsolicited(self, message):
+        """Pass status frames nobody waits for, pushed or late, to push_callback."""
+        method = message.get("met") or self.request_methods.get(message.get("id"))
+        status = message.get("r")
+        if (
+            self.push_callback is not None
+            and isinstance(status, dict)
+            and (method == WallboxBLEApiConst.GET_STATUS or (method is None and "st" in status))
+        ):
+            self.pushes += 1
+            self.push_callback(status)
+        else:
+            LOGGER.debug("Dropping response without a waiter: %s", message)
+
+    def fail_pending_requests(self):
+        self.decoder.reset()
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(BleakError("Disconnected"))
+
+    def allocate_request_id(self):
         while True:
-            try:
-                data += await self.rx_queue.get()
-                parsed_data = json.loads(data)
-                LOGGER.debug(f"Got {parsed_data=}")
-                if parsed_data["id"] == request_id:
-                    return parsed_data.get("r")
-                else:
-                    data = bytearray()
-            except:
-                pass
-
-    def clear_rx_queue(self):
-        self.rx_queue = asyncio.Queue()
+            self.next_request_id = self.next_request_id % 999 + 1
+            if self.next_request_id not in self.pending:
+                return self.next_request_id
 
     @property
     def ready(self):
         return self.client and self.client.is_connected
 
     async def request(self, method, parameter=None):
-        if not self.ready:
-            LOGGER.debug(f"NOT CONNECTED! {self.client}")
-            return False, None
-
-        request_id = random.randint(1, 999)
-
-        uart_service = self.client.services.get_service(WallboxBLEApiConst.UART_SERVICE_UUID)
-        rx_char = uart_service.get_characteristic(WallboxBLEApiConst.UART_RX_CHAR_UUID)
-
-        payload = {"met": method, "par": parameter, "id": request_id}
-
-        data = json.dumps(payload, separators=[",", ":"])
-        data = bytes(data, "utf8")
-        data = b"EaE" + bytes([len(data)]) + data
-        data = data + bytes([sum(c for c in data) % 256])
-
-        self.clear_rx_queue()
-        try:
-            await asyncio.wait_for(self.client.write_gatt_char(rx_char, data, True), 2)
-        except Exception as e:
-            LOGGER.error(f"Failed to write to Bluetooth {e=}")
-            return False, None
-
-        try:
-            response = await asyncio.wait_for(self.get_parsed_response(request_id), 2)
-            LOGGER.debug("Got response!")
-            return True, response
-        except asyncio.TimeoutError:
-            LOGGER.debug("No response!")
-            return False, None
+        cacheable = self.cache.cacheable(method, parameter)
+        if cacheable:
+            hit, response = self.cache.get(method)
+            if hit:
+                return True, response
+
+        ok, response = await self.send_request(method, parameter)
+        if ok:
+            if cacheable:
+                self.cache.put(method, response)
+                if self.cache_store is not None:
+                    self.cache_store.async_delay_save(self.cache.as_dict, CACHE_SAVE_DELAY)
+            else:
+                self.cache.written(method)
+        return ok, response
+
+    async def send_request(self, method, parameter=None):
+        """Send a request, retrying reads that timed out."""
+        stats = self.stats.method(method)
+        attempts = 1 + (self.read_retries if method in READ_METHODS else 0)
+        for attempt in range(attempts):
+            if attempt:
+                stats.retries += 1
+            ok, response, timed_out = await self.send_request_once(method, parameter, stats)
+            if ok or not timed_out:
+                break
+        if not ok:
+            stats.failures += 1
+        return ok, response
+
+    async def write_frame(self, data):
+        """Write a frame, split into writes that fit the link MTU."""
+        mtu = getattr(self.client, "mtu_size", None)
+        write_size = mtu - ATT_HEADER_SIZE if mtu else DEFAULT_WRITE_SIZE
+        # Chunks of concurrent requests must not interleave
+        async with self.write_lock:
+            for chunk in split_writes(data, write_size):
+                if self.capture is not None:
+                    self.capture.record(TX, chunk)
+                await self.client.write_gatt_char(self.rx_char, chunk, True)
+
+    async def send_request_once(self, method, parameter, stats):
+        """Returns (ok, response, timed_out)."""
+        async with self.request_window:
+            if not self.ready:
+                LOGGER.debug("NOT CONNECTED! %s", self.client)
+                return False, None, False
+
+            request_id = self.allocate_request_id()
+            self.request_methods[request_id] = method
+
+            data = self.encoder.encode(method, parameter, request_id)
+
+            future = asyncio.get_running_loop().create_future()
+            self.pending[request_id] = future
+            stats.requests += 1
+            started = time.monotonic()
+            try:
+                try:
+                    await asyncio.wait_for(self.write_frame(data), self.write_timeout)
+                except Exception as e:
+                    LOGGER.error("Failed to write to Bluetooth %r", e)
+                    return False, None, False
+                written = time.monotonic()
+                stats.write.add(written - started)
+
+                try:
+                    response = await asyncio.wait_for(future, self.response_timeout)
+                except asyncio.TimeoutError:
+                    LOGGER.debug("No response to %s after %.1fs", method, self.response_timeout)
+                    stats.timeouts += 1
+                    return False, None, True
+                except BleakError:
+                    LOGGER.debug("Disconnected while waiting for %s", method)
+                    return False, None, False
+
+                stats.round_trip.add(time.monotonic() - started)
+                first_notification, chunks = self.response_timing.get(request_id, (None, 0))
+                if first_notification is not None:
+                    stats.first_notification.add(max(first_notification - written, 0.0))
+                stats.chunks += chunks
+                LOGGER.debug("Got response!")
+                return True, response, False
+            finally:
+                self.pending.pop(request_id, None)
+                self.response_timing.pop(request_id, None)
+                if not (future.done() and not future.cancelled() and future.exception() is None):
+                    if not self.pending:
+                        # Nothing else is in flight, so whatever is buffered belongs
+                        # to a reply that was lost part way
+                        self.decoder.reset()
 
     async def async_get_data(self):
         """Get data from the API."""
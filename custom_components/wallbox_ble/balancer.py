@@ -0,0 +1,208 @@
+"""Site load balancing between Wallbox BLE chargers."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+import time
+
+from .const import LOGGER
+
+# Lowest current a charger can charge at, chargers that cannot get it are paused
+MIN_CURRENT = 6
+
+# Status codes where the car wants current: charging and waiting for an assignment
+DEMAND_STATUS_CODES = (1, 8)
+
+# Increases smaller than this many amps are not written
+BALANCE_DEADBAND = 1
+
+# Seconds between two increases of one charger, decreases are never delayed
+BALANCE_INCREASE_INTERVAL = 30.0
+
+# Default seconds between a change and the recomputed allotments
+BALANCE_REACTION_TIME = 5.0
+
+# Amps kept free below the site limit
+BALANCE_MARGIN = 1
+
+
+def allocate(available: float, maximums: dict[str, int]) -> dict[str, int]:
+    """Split available amps between chargers, each up to its maximum.
+
+    Every charger that gets current gets at least MIN_CURRENT. When there is
+    not enough for all of them, chargers are dropped from the end of maximums.
+    """
+    chargers = list(maximums)
+    while chargers and available < MIN_CURRENT * len(chargers):
+        chargers.pop()
+
+    allotments = dict.fromkeys(maximums, 0)
+    remaining = available
+    # Water filling, the chargers with the lowest maximum are settled first
+    for index, address in enumerate(sorted(chargers, key=lambda address: maximums[address])):
+        share = int(remaining // (len(chargers) - index))
+        allotments[address] = max(min(share, maximums[address]), MIN_CURRENT)
+        remaining -= allotments[address]
+    return allotments
+
+
+class WallboxBLESiteMember:
+    """A charger on a balanced site."""
+
+    __slots__ = ("address", "write", "charging", "demand", "max_current", "setpoint", "paused", "last_increase", "writes")
+
+    def __init__(self, address, write: Callable[[int], Awaitable[bool]]):
+        self.address = address
+        self.write = write
+        self.charging = False
+        self.demand = False
+        self.max_current = 0
+        self.setpoint = None
+        self.paused = False
+        self.last_increase = 0.0
+        self.writes = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "charging": self.charging,
+            "demand": self.demand,
+            "max_current": self.max_current,
+            "setpoint": self.setpoint,
+            "paused": self.paused,
+            "writes": self.writes,
+        }
+
+
+class WallboxBLESiteBalancer:
+    """Keeps the chargers of a site under the site current limit.
+
+    The site current includes the chargers, so the current of everything else
+    on the site is the measurement minus the setpoints of charging chargers.
+    What is left of the limit is split between the chargers that want current.
+    Allotments are recomputed reaction_time after a change, or right away when
+    the site is over its limit. Decreases are written before increases,
+    increases only when they exceed the deadband and not more often than the
+    rate limit.
+
+    write(current) is called with 0 to pause a charger and with a current to
+    set it, resuming it if the balancer paused it.
+    """
+
+    def __init__(self, limit, reaction_time=BALANCE_REACTION_TIME, margin=BALANCE_MARGIN):
+        self.limit = limit
+        self.reaction_time = reaction_time
+        self.margin = margin
+        self.deadband = BALANCE_DEADBAND
+        self.increase_interval = BALANCE_INCREASE_INTERVAL
+        self.site_current = None
+        self.members: dict[str, WallboxBLESiteMember] = {}
+        self.lock = asyncio.Lock()
+        self.timer = None
+        self.unsubscribe = None
+        self.rebalances = 0
+
+    def add(self, address, write) -> WallboxBLESiteMember:
+        member = self.members[address] = WallboxBLESiteMember(address, write)
+        return member
+
+    def remove(self, address):
+        self.members.pop(address, None)
+        if not self.members:
+            self.cancel()
+            if self.unsubscribe is not None:
+                self.unsubscribe()
+                self.unsubscribe = None
+
+    def update_site(self, current):
+        """Record a site current measurement."""
+        self.site_current = current
+        self.schedule(urgent=current is not None and current > self.limit)
+
+    def update_charger(self, address, status_code, setpoint, max_current):
+        """Record the status polled from a charger."""
+        member = self.members.get(address)
+        if member is None:
+            return
+        demand = status_code in DEMAND_STATUS_CODES or (member.paused and status_code == 4)
+        changed = demand != member.demand or (setpoint != member.setpoint and not member.paused)
+        member.charging = status_code == 1
+        member.demand = demand
+        member.max_current = max_current
+        if not member.paused:
+            member.setpoint = setpoint
+        if changed:
+            self.schedule()
+
+    def schedule(self, urgent=False):
+        """Rebalance after the reaction time, or right away if urgent."""
+        loop = asyncio.get_running_loop()
+        if urgent:
+            if self.timer is not None:
+                self.timer.cancel()
+            self.timer = None
+            loop.create_task(self.async_rebalance())
+        elif self.timer is None:
+            self.timer = loop.call_later(self.reaction_time, self._rebalance_later)
+
+    def _rebalance_later(self):
+        self.timer = None
+        asyncio.get_running_loop().create_task(self.async_rebalance())
+
+    def cancel(self):
+        if self.timer is not None:
+            self.timer.cancel()
+            self.timer = None
+
+    def targets(self) -> dict[str, int]:
+        members = [member for member in self.members.values() if member.demand]
+        drawn = sum(member.setpoint or 0 for member in members if member.charging)
+        available = self.limit - self.margin - (self.site_current - drawn)
+        # Chargers that are charging keep their current before paused ones resume
+        members.sort(key=lambda member: member.paused)
+        return allocate(available, {member.address: member.max_current for member in members})
+
+    async def async_rebalance(self):
+        if self.site_current is None:
+            return
+        async with self.lock:
+            self.rebalances += 1
+            targets = self.targets()
+            now = time.monotonic()
+            decreases = []
+            increases = []
+            for address, target in targets.items():
+                member = self.members[address]
+                current = 0 if member.paused else member.setpoint or 0
+                if target < current:
+                    decreases.append((member, target))
+                elif target > current and (
+                    member.paused
+                    or (target - current >= self.deadband and now - member.last_increase >= self.increase_interval)
+                ):
+                    increases.append((member, target))
+
+            for member, target in decreases:
+                await self._write(member, target)
+            for member, target in increases:
+                if await self._write(member, target):
+                    member.last_increase = now
+
+    async def _write(self, member, target) -> bool:
+        LOGGER.debug("Balancing %s to %dA", member.address, target)
+        if not await member.write(target):
+            return False
+        member.writes += 1
+        if target:
+            member.paused = False
+            member.setpoint = target
+        else:
+            member.paused = True
+        return True
+
+    def as_dict(self) -> dict:
+        return {
+            "limit": self.limit,
+            "site_current": self.site_current,
+            "rebalances": self.rebalances,
+            "writes": sum(member.writes for member in self.members.values()),
+        }
@@ -0,0 +1,54 @@
+"""Response cache for slow-changing Wallbox BLE reads."""
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+FOREVER = timedelta.max
+
+
+class WallboxBLEResponseCache:
+    """Read-through cache keyed on method code with a TTL per method.
+
+    Entries are stamped with wall clock time so they can be persisted and are
+    still valid after a Home Assistant restart.
+    """
+
+    def __init__(self, ttls: dict[str, timedelta], invalidates: dict[str, tuple[str, ...]]):
+        self.ttls = ttls
+        self.invalidates = invalidates
+        self.entries: dict[str, tuple[float, object]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def cacheable(self, method, parameter) -> bool:
+        return parameter is None and method in self.ttls
+
+    def get(self, method):
+        """Return (True, response) on a fresh hit, (False, None) otherwise."""
+        entry = self.entries.get(method)
+        if entry is not None:
+            stored, response = entry
+            ttl = self.ttls[method]
+            if ttl is FOREVER or time.time() - stored < ttl.total_seconds():
+                self.hits += 1
+                return True, response
+            del self.entries[method]
+        self.misses += 1
+        return False, None
+
+    def put(self, method, response):
+        self.entries[method] = (time.time(), response)
+
+    def written(self, method):
+        """Drop the entries made stale by a successful write of method."""
+        for stale in self.invalidates.get(method, ()):
+            self.entries.pop(stale, None)
+
+    def as_dict(self) -> dict:
+        return {method: [stored, response] for method, (stored, response) in self.entries.items()}
+
+    def restore(self, data: dict):
+        for method, (stored, response) in data.items():
+            if method in self.ttls:
+                self.entries[method] = (stored, response)
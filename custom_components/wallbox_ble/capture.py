@@ -0,0 +1,84 @@
+"""Recording and replay of raw Wallbox BLE UART traffic."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import json
+import time
+
+CAPTURE_FORMAT = "wallbox-ble-capture"
+CAPTURE_VERSION = 1
+
+# Directions of a record: GATT writes to the charger and notifications from it
+TX = "tx"
+RX = "rx"
+
+# Records kept by one capture, later ones are counted as dropped
+CAPTURE_LIMIT = 100_000
+
+
+class WallboxBLECapture:
+    """Raw writes and notifications of a link, stamped with the seconds since the capture started.
+
+    Stored as JSON lines, a header followed by one line per record with the
+    bytes in hex, so captures can be read and edited by hand.
+    """
+
+    def __init__(self, address=None, limit=CAPTURE_LIMIT):
+        self.address = address
+        self.limit = limit
+        self.started = time.monotonic()
+        self.records: list[tuple[float, str, bytes]] = []
+        self.dropped = 0
+
+    def record(self, direction, data):
+        if len(self.records) >= self.limit:
+            self.dropped += 1
+            return
+        self.records.append((time.monotonic() - self.started, direction, bytes(data)))
+
+    def dumps(self) -> str:
+        header = {"format": CAPTURE_FORMAT, "version": CAPTURE_VERSION, "address": self.address, "dropped": self.dropped}
+        lines = [json.dumps(header)]
+        lines.extend(
+            json.dumps({"t": round(at, 6), "d": direction, "data": data.hex()}) for at, direction, data in self.records
+        )
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def loads(cls, text: str) -> WallboxBLECapture:
+        lines = [line for line in text.splitlines() if line.strip()]
+        header = json.loads(lines[0]) if lines else {}
+        if header.get("format") != CAPTURE_FORMAT:
+            raise ValueError("Not a Wallbox BLE capture")
+        if header.get("version", CAPTURE_VERSION) > CAPTURE_VERSION:
+            raise ValueError(f"Unsupported capture version {header['version']}")
+        capture = cls(header.get("address"))
+        capture.dropped = header.get("dropped", 0)
+        for line in lines[1:]:
+            record = json.loads(line)
+            capture.records.append((float(record["t"]), record["d"], bytes.fromhex(record["data"])))
+        return capture
+
+    def chunks(self, direction) -> list[bytes]:
+        return [data for _, record_direction, data in self.records if record_direction == direction]
+
+    @property
+    def duration(self) -> float:
+        return self.records[-1][0] if self.records else 0.0
+
+
+async def async_replay(capture: WallboxBLECapture, handler: Callable[[float, str, bytes], object], speed=1.0):
+    """Pass every record to handler(at, direction, data) at its recorded time.
+
+    speed scales the time between records, 10 replays ten times faster and 0
+    as fast as possible.
+    """
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    for at, direction, data in capture.records:
+        if speed:
+            delay = started + at / speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        handler(at, direction, data)
@@ -0,0 +1,185 @@
+"""Write command queue for Wallbox BLE."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import timedelta
+
+from .const import LOGGER
+from .protocol import WallboxBLEApiConst
+
+# Methods whose order relative to other commands matters. A newer command for
+# one of these only replaces a queued one when nothing was queued in between.
+ORDERED_METHODS = frozenset(
+    {
+        WallboxBLEApiConst.LOCK,
+        WallboxBLEApiConst.START_STOP_CHARGING,
+        WallboxBLEApiConst.REBOOT,
+        WallboxBLEApiConst.UPDATE_SOFTWARE,
+    }
+)
+
+# Commands kept while the charger is out of reach and how long they stay
+# valid. Anything else fails right away when there is no connection.
+JOURNAL_EXPIRY = {
+    WallboxBLEApiConst.LOCK: timedelta(hours=1),
+    WallboxBLEApiConst.START_STOP_CHARGING: timedelta(minutes=15),
+    WallboxBLEApiConst.SET_MAX_CHARGING_CURRENT: timedelta(hours=1),
+}
+
+# Journal replay outcomes
+OUTCOME_SENT = "sent"
+OUTCOME_FAILED = "failed"
+OUTCOME_EXPIRED = "expired"
+
+
+class WallboxBLECommand:
+    __slots__ = ("method", "parameter", "waiters", "expires")
+
+    def __init__(self, method, parameter, expires=None):
+        self.method = method
+        self.parameter = parameter
+        self.waiters: list[asyncio.Future] = []
+        self.expires = expires
+
+    def resolve(self, ok):
+        for future in self.waiters:
+            if not future.done():
+                future.set_result(ok)
+
+
+def find_merge_target(commands: list[WallboxBLECommand], method) -> WallboxBLECommand | None:
+    """The queued command a new one for method replaces, if any."""
+    for index in range(len(commands) - 1, -1, -1):
+        command = commands[index]
+        if command.method == method:
+            if method in ORDERED_METHODS and index != len(commands) - 1:
+                return None
+            return command
+    return None
+
+
+class WallboxBLECommandQueue:
+    """Sends write commands one at a time in the order they were submitted.
+
+    A command that is still queued is replaced by a newer one for the same
+    method, so dragging a slider only writes the last value. Everyone who
+    submitted a replaced command gets the result of the command that was sent.
+    Once the queue runs empty, on_idle is called to refresh the state.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str, object], Awaitable[bool]],
+        on_idle: Callable[[], object] | None = None,
+    ):
+        self.send = send
+        self.on_idle = on_idle
+        self.queue: list[WallboxBLECommand] = []
+        self.task = None
+        self.sent = 0
+        self.merged = 0
+
+    async def submit(self, method, parameter) -> bool:
+        future = asyncio.get_running_loop().create_future()
+        command = find_merge_target(self.queue, method)
+        if command is None:
+            command = WallboxBLECommand(method, parameter)
+            self.queue.append(command)
+        else:
+            command.parameter = parameter
+            self.merged += 1
+        command.waiters.append(future)
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+        return await asyncio.shield(future)
+
+    async def run(self):
+        try:
+            while self.queue:
+                command = self.queue.pop(0)
+                try:
+                    ok = await self.send(command.method, command.parameter)
+                except Exception as err:
+                    for future in command.waiters:
+                        if not future.done():
+                            future.set_exception(err)
+                    continue
+                self.sent += 1
+                command.resolve(ok)
+        finally:
+            self.task = None
+            for command in self.queue:
+                for future in command.waiters:
+                    future.cancel()
+            self.queue.clear()
+        if self.on_idle is not None:
+            self.on_idle()
+
+
+class WallboxBLECommandJournal:
+    """Commands issued while the charger is out of reach.
+
+    Commands merge like in the queue and are kept in a store until they are
+    replayed after a reconnect or expire, so they also survive a restart.
+    """
+
+    def __init__(self, store):
+        self.store = store
+        self.commands: list[WallboxBLECommand] = []
+
+    async def async_load(self, now):
+        data = await self.store.async_load() or []
+        self.commands = [
+            WallboxBLECommand(item["method"], item["parameter"], item["expires"])
+            for item in data
+            if item["expires"] > now
+        ]
+
+    def as_list(self) -> list[dict]:
+        return [
+            {"method": command.method, "parameter": command.parameter, "expires": command.expires}
+            for command in self.commands
+        ]
+
+    def pending(self, method) -> WallboxBLECommand | None:
+        return find_merge_target(self.commands, method)
+
+    def add(self, method, parameter, now) -> asyncio.Future:
+        """Journal a command, the future gets whether it was sent once it is replayed."""
+        future = asyncio.get_running_loop().create_future()
+        expires = now + JOURNAL_EXPIRY[method].total_seconds()
+        command = find_merge_target(self.commands, method)
+        if command is None:
+            command = WallboxBLECommand(method, parameter, expires)
+            self.commands.append(command)
+        else:
+            command.parameter = parameter
+            command.expires = expires
+        command.waiters.append(future)
+        self.store.async_delay_save(self.as_list, 0)
+        return future
+
+    async def async_replay(self, send, connected: Callable[[], bool], now) -> list[tuple[WallboxBLECommand, str]]:
+        """Send the journaled commands in order, returns each command with its outcome.
+
+        Stops, keeping the rest, if the connection drops again on the way.
+        """
+        outcomes = []
+        while self.commands:
+            # Taken off first, so commands added meanwhile do not merge into it
+            command = self.commands.pop(0)
+            if command.expires <= now:
+                outcome = OUTCOME_EXPIRED
+                command.resolve(False)
+            else:
+                ok = await send(command.method, command.parameter)
+                if not ok and not connected():
+                    self.commands.insert(0, command)
+                    break
+                outcome = OUTCOME_SENT if ok else OUTCOME_FAILED
+                command.resolve(ok)
+            LOGGER.debug("Replayed %s(%s): %s", command.method, command.parameter, outcome)
+            outcomes.append((command, outcome))
+        self.store.async_delay_save(self.as_list, 0)
+        return outcomes
@@ -0,0 +1,114 @@
+"""Configuration profiles of Wallbox BLE chargers."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+from .const import LOGGER
+from .protocol import WallboxBLEApiConst
+
+# Version of the configuration document, profiles of a newer version are refused
+CONFIG_VERSION = 1
+
+
+@dataclass(frozen=True)
+class WallboxBLEConfigSetting:
+    """A setting and the methods that read and write it."""
+
+    key: str
+    get: str
+    set: str
+
+
+CONFIG_SETTINGS = (
+    WallboxBLEConfigSetting(
+        "eco_smart", WallboxBLEApiConst.GET_ECO_SMART_CONFIGURATION, WallboxBLEApiConst.SET_ECO_SMART_CONFIGURATION
+    ),
+    WallboxBLEConfigSetting("power_sharing", WallboxBLEApiConst.GET_POWER_SHARING, WallboxBLEApiConst.SET_POWER_SHARING),
+    WallboxBLEConfigSetting("power_boost", WallboxBLEApiConst.GET_POWER_BOOST, WallboxBLEApiConst.SET_POWER_BOOST),
+    WallboxBLEConfigSetting("halo", WallboxBLEApiConst.GET_HALO_CONFIG, WallboxBLEApiConst.SET_HALO_CONFIG),
+    WallboxBLEConfigSetting("schedule", WallboxBLEApiConst.GET_SCHEDULE, WallboxBLEApiConst.SET_SCHEDULE),
+    WallboxBLEConfigSetting("ocpp", WallboxBLEApiConst.GET_OCPP, WallboxBLEApiConst.SET_OCPP),
+    WallboxBLEConfigSetting("timezone", WallboxBLEApiConst.GET_TIMEZONE, WallboxBLEApiConst.SET_TIMEZONE),
+    WallboxBLEConfigSetting("autolock", WallboxBLEApiConst.GET_AUTOLOCK, WallboxBLEApiConst.SET_AUTOLOCK),
+)
+
+_SETTINGS = {setting.key: setting for setting in CONFIG_SETTINGS}
+
+
+def profile_settings(profile: dict) -> dict:
+    """The settings of a profile, a configuration document or bare settings."""
+    if "settings" in profile:
+        version = profile.get("version", CONFIG_VERSION)
+        if version > CONFIG_VERSION:
+            raise ValueError(f"Unsupported configuration version {version}")
+        profile = profile["settings"]
+    unknown = set(profile) - set(_SETTINGS)
+    if unknown:
+        raise ValueError(f"Unknown settings {', '.join(sorted(unknown))}")
+    return profile
+
+
+def merge_setting(current, desired):
+    """The value a setting gets, settings objects only change the keys desired has."""
+    if isinstance(current, dict) and isinstance(desired, dict):
+        return {**current, **desired}
+    return desired
+
+
+def diff_config(current: dict, profile: dict) -> dict:
+    """The settings of profile that differ from the current document, with the value to write.
+
+    Settings the charger did not report are left out.
+    """
+    settings = current["settings"]
+    changes = {}
+    for key, desired in profile_settings(profile).items():
+        if key not in settings:
+            continue
+        value = merge_setting(settings[key], desired)
+        if value != settings[key]:
+            changes[key] = value
+    return changes
+
+
+async def async_read_config(client) -> dict:
+    """Read every setting into one configuration document."""
+    # The client pipelines these up to its request window
+    results = await asyncio.gather(*(client.request(setting.get) for setting in CONFIG_SETTINGS))
+    return {
+        "version": CONFIG_VERSION,
+        "settings": {
+            setting.key: data for setting, (ok, data) in zip(CONFIG_SETTINGS, results) if ok and data is not None
+        },
+    }
+
+
+async def async_apply_config(client, profile: dict, dry_run=False) -> dict:
+    """Write the settings of profile that differ from what the charger has."""
+    current = await async_read_config(client)
+    changes = diff_config(current, profile)
+    failed = []
+    if changes and not dry_run:
+        results = await asyncio.gather(
+            *(client.request(_SETTINGS[key].set, value) for key, value in changes.items())
+        )
+        failed = [key for key, (ok, _) in zip(changes, results) if not ok]
+    LOGGER.debug("Applied configuration %s, failed %s", list(changes), failed)
+    return {"changes": changes, "failed": failed}
+
+
+async def async_run_limited(jobs: dict[str, Callable[[], Awaitable[dict]]], limit: int) -> dict[str, dict]:
+    """Run jobs with at most limit at a time, a job that raises reports its error."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(job):
+        async with semaphore:
+            try:
+                return await job()
+            except Exception as err:  # pylint: disable=broad-except
+                return {"error": str(err) or type(err).__name__}
+
+    results = await asyncio.gather(*(run(job) for job in jobs.values()))
+    return dict(zip(jobs, results))
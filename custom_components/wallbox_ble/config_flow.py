@@ -12,9 +12,11 @@ from homeassistant.components.bluetooth import (
     async_discovered_service_info,
 )
 from homeassistant.const import CONF_ADDRESS
+from homeassistant.core import callback
 from homeassistant.helpers import selector
 
-from .const import DOMAIN, LOGGER
+from .balancer import BALANCE_REACTION_TIME
+from .const import CONF_REACTION_TIME, CONF_SITE_LIMIT, CONF_SITE_SENSOR, DOMAIN, LOGGER
 
 
 class BlueprintFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -28,6 +30,11 @@ class BlueprintFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self._discovery_info: BluetoothServiceInfo | None = None
         self._discovered_devices: dict[str, BluetoothServiceInfo] = {}
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        return WallboxBLEOptionsFlowHandler(config_entry)
+
     async def async_step_bluetooth(self, discovery_info: BluetoothServiceInfo) -> FlowResult:
         """Handle the bluetooth discovery step."""
         await self.async_set_unique_id(discovery_info.address)
@@ -84,3 +91,34 @@ class BlueprintFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     async def _async_get_or_create_entry(self):
         device = async_ble_device_from_address(self.hass, self.unique_id, connectable=True)
         return self.async_create_entry(title=device.name, data={})
+
+
+class WallboxBLEOptionsFlowHandler(config_entries.OptionsFlow):
+    """Site load balancing options."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input: dict | None = None) -> config_entries.FlowResult:
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        options = self.config_entry.options
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(
+                {
+                    vol.Optional(
+                        CONF_SITE_SENSOR, description={"suggested_value": options.get(CONF_SITE_SENSOR)}
+                    ): selector.EntitySelector(selector.EntitySelectorConfig(domain="sensor", device_class="current")),
+                    vol.Optional(CONF_SITE_LIMIT, default=options.get(CONF_SITE_LIMIT, 25)): selector.NumberSelector(
+                        selector.NumberSelectorConfig(min=6, max=1000, unit_of_measurement="A", mode="box")
+                    ),
+                    vol.Optional(
+                        CONF_REACTION_TIME, default=options.get(CONF_REACTION_TIME, BALANCE_REACTION_TIME)
+                    ): selector.NumberSelector(
+                        selector.NumberSelectorConfig(min=1, max=300, unit_of_measurement="s", mode="box")
+                    ),
+                }
+            ),
+        )
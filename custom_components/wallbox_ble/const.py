@@ -5,4 +5,56 @@ LOGGER: Logger = getLogger(__package__)
 
 NAME = "Wallbox BLE"
 DOMAIN = "wallbox_ble"
+# hass.data key of the broker shared by all chargers
+FLEET_DATA_KEY = f"{DOMAIN}_fleet"
+# hass.data key of the pairing agent shared by all chargers
+PAIRING_AGENT_DATA_KEY = f"{DOMAIN}_pairing_agent"
+# hass.data key of the site load balancers, by site current sensor
+BALANCER_DATA_KEY = f"{DOMAIN}_balancers"
+
+# Options of the site load balancer
+CONF_SITE_SENSOR = "site_current_sensor"
+CONF_SITE_LIMIT = "site_current_limit"
+CONF_REACTION_TIME = "reaction_time"
 VERSION = "0.0.1"
+
+# Number of requests allowed in flight on one BLE link at the same time
+REQUEST_WINDOW = 4
+
+# Seconds to batch cache updates before writing them to storage
+CACHE_SAVE_DELAY = 60
+# Seconds to batch snapshot updates before writing them to storage
+SNAPSHOT_SAVE_DELAY = 60
+
+# Jittered exponential backoff between reconnect attempts, in seconds
+RECONNECT_MIN_DELAY = 1.0
+RECONNECT_MAX_DELAY = 60.0
+# A connection that stayed up this long is reconnected without backoff
+STABLE_CONNECTION_TIME = 30.0
+
+# Seconds to wait for a GATT write and for the response to a request
+WRITE_TIMEOUT = 2.0
+RESPONSE_TIMEOUT = 2.0
+# Extra attempts for read requests that timed out
+READ_RETRIES = 1
+
+# Seconds to wait after a command for more before refreshing the state
+COMMAND_REFRESH_DELAY = 1.0
+# Seconds a command journaled while disconnected waits for its replay before
+# the caller is told it is still pending
+JOURNAL_WAIT = 5.0
+# Event fired with the outcome of every replayed journal command
+COMMAND_EVENT = f"{DOMAIN}_command"
+
+# Chargers configured at the same time by the configuration services
+CONFIG_CONCURRENCY = 4
+# Seconds a configuration service waits for a charger to connect
+CONFIG_CONNECT_TIMEOUT = 120.0
+
+# Volts per phase, to estimate charging power from current
+NOMINAL_VOLTAGE = 230
+
+# Seconds between session log syncs, a sync also runs when a charge ends
+SESSION_SYNC_INTERVAL = 3600
+# Seconds between checks for a firmware update
+FIRMWARE_CHECK_INTERVAL = 86400
@@ -1,18 +1,56 @@
 from __future__ import annotations
 
-from datetime import timedelta
+import asyncio
+import dataclasses
+import time
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.helpers.event import async_call_later
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_state_change_event
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import (
     DataUpdateCoordinator,
     UpdateFailed,
 )
-from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.exceptions import ConfigEntryAuthFailed, HomeAssistantError
+
+from .api import WallboxBLEApiClient, WallboxBLEApiConst, storage_key
+from .balancer import WallboxBLESiteBalancer
+from .capture import WallboxBLECapture
+from .commands import JOURNAL_EXPIRY, WallboxBLECommandJournal, WallboxBLECommandQueue
+from .config import async_apply_config, async_read_config
+from .const import (
+    BALANCER_DATA_KEY,
+    COMMAND_EVENT,
+    COMMAND_REFRESH_DELAY,
+    CONFIG_CONNECT_TIMEOUT,
+    CONF_REACTION_TIME,
+    CONF_SITE_LIMIT,
+    CONF_SITE_SENSOR,
+    DOMAIN,
+    FIRMWARE_CHECK_INTERVAL,
+    FLEET_DATA_KEY,
+    JOURNAL_WAIT,
+    LOGGER,
+    SESSION_SYNC_INTERVAL,
+    SNAPSHOT_SAVE_DELAY,
+)
+from .energy import SESSION_START, WallboxBLEEnergyMeter
+from .firmware import WallboxBLEFirmwareUpdater
+from .fleet import PRIORITY_ACTIVE, PRIORITY_IDLE, WallboxBLEFleetBroker
+from .scheduler import ACTIVE_STATUS_CODES, IDLE_MIN_INTERVAL, UPDATING_STATUS_CODE, WallboxBLEPollScheduler
+from .sessions import WallboxBLESessionLog
+from .snapshot import WallboxBLESnapshotReader
+from .statistics import async_import_energy_statistics
+from .status import OPTIMISTIC_VALUES, WallboxBLEOverlay, WallboxBLEStatus
 
-from .api import WallboxBLEApiClient, WallboxBLEApiConst
-from .const import DOMAIN, LOGGER
+
+def site_current(state: State | None) -> float | None:
+    try:
+        return float(state.state)
+    except (AttributeError, ValueError):
+        return None
 
 
 class WallboxBLEDataUpdateCoordinator(DataUpdateCoordinator):
@@ -29,50 +67,362 @@ class WallboxBLEDataUpdateCoordinator(DataUpdateCoordinator):
             hass=hass,
             logger=LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=10),
+            update_interval=IDLE_MIN_INTERVAL,
+            # Refreshes requested after commands are merged into one poll
+            request_refresh_debouncer=Debouncer(hass, LOGGER, cooldown=COMMAND_REFRESH_DELAY, immediate=False),
         )
+        self.commands = WallboxBLECommandQueue(self._async_send_parameter, self.async_request_refresh)
+        self.scheduler = WallboxBLEPollScheduler()
         self.hass = hass
-        self.locked = False
-        self.charge_current = 0
+        # The last status, replaced as a whole and never modified in place
+        self.state = WallboxBLEStatus()
+        self.overlay = WallboxBLEOverlay()
         self.max_charge_current = 0
-        self.status = ""
-        self.status_code = 0
         self.available = False
+        # Names of the fields that changed in the last update
+        self.changed: set[str] = set()
+        self.last_session_sync = -SESSION_SYNC_INTERVAL
+        self.last_firmware_check = -FIRMWARE_CHECK_INTERVAL
+        self.site = None
+        self.site_sensor = None
+        self.paused_by_site = False
 
     @classmethod
     async def create(cls, hass, address):
         self = WallboxBLEDataUpdateCoordinator(hass)
-        self.wb = await WallboxBLEApiClient.create(hass, address)
+        self.address = address
+        self.fleet = hass.data.setdefault(FLEET_DATA_KEY, WallboxBLEFleetBroker())
+        self.fleet.register(address)
+        self.wb = await WallboxBLEApiClient.create(hass, address, broker=self.fleet)
+        self.snapshot_reader = WallboxBLESnapshotReader(self.wb)
+        self.firmware = WallboxBLEFirmwareUpdater(
+            self.wb, self.async_handle_firmware_progress, self.async_handle_firmware_finished
+        )
+        self.wb.push_callback = self.async_handle_push
+        self.sessions = WallboxBLESessionLog(self.wb, Store(hass, 1, storage_key("sessions", address)))
+        await self.sessions.async_load()
+        self.energy = WallboxBLEEnergyMeter()
+        self.energy.add_sessions(self.sessions.records)
+        self.sessions.add_listener(self.async_handle_sessions)
+        # Backfill whatever the last run did not get to import
+        async_import_energy_statistics(hass, address, self.sessions.records)
+        self.journal = WallboxBLECommandJournal(Store(hass, 1, storage_key("journal", address)))
+        await self.journal.async_load(time.time())
+        self.wb.connected_callback = self.async_handle_connected
+        self.snapshot_store = Store(hass, 1, storage_key("snapshot", address))
+        self.restore_snapshot(await self.snapshot_store.async_load())
         return self
 
-    async def async_refresh_later(self, delay):
-        async def wrap(*_):
-            await self.async_refresh()
+    def restore_snapshot(self, data):
+        """Start from the snapshot the last run saved, until the charger answers."""
+        if not data:
+            return
+        snapshot = self.snapshot_reader.restore(data)
+        if snapshot.status is not None:
+            self.state = WallboxBLEStatus.from_dict(snapshot.status)
+            self.available = True
+        if snapshot.max_available_current is not None:
+            self.max_charge_current = snapshot.max_available_current
+        self.data = dataclasses.replace(snapshot)
+
+    def async_save_snapshot(self):
+        self.snapshot_store.async_delay_save(
+            lambda: dataclasses.asdict(self.snapshot_reader.snapshot), SNAPSHOT_SAVE_DELAY
+        )
+
+    async def async_first_refresh(self):
+        """Refresh as soon as the charger is connected."""
+        await self.wb.connection_established()
+        await self.async_refresh()
+
+    def async_schedule_session_sync(self):
+        """Sync the session log in the background, without holding up polls."""
+        if self.sessions.lock.locked():
+            return
+        self.last_session_sync = time.monotonic()
+        self.hass.async_create_background_task(self.sessions.async_sync(), f"{DOMAIN} session sync")
+
+    def async_schedule_firmware_check(self):
+        self.last_firmware_check = time.monotonic()
+
+        async def check():
+            await self.firmware.async_check()
+            self.changed = {"firmware"}
+            self.async_update_listeners()
+
+        self.hass.async_create_background_task(check(), f"{DOMAIN} firmware check")
+
+    async def async_install_firmware(self) -> bool:
+        ok = await self.firmware.async_install()
+        self.changed = {"firmware"}
+        self.async_update_listeners()
+        return ok
+
+    @callback
+    def async_handle_firmware_progress(self):
+        self.changed = {"firmware"}
+        self.async_update_listeners()
+
+    @callback
+    def async_handle_firmware_finished(self):
+        """Poll the status and versions of the new firmware."""
+        self.wb.cache.written(WallboxBLEApiConst.UPDATE_SOFTWARE)
+        self.changed = {"firmware"}
+        self.async_update_listeners()
+        self.update_interval = self.scheduler.command_sent()
+        self.async_schedule_firmware_check()
+        self.hass.async_create_task(self.async_request_refresh())
+
+    def async_stop(self):
+        if self.firmware.task is not None:
+            self.firmware.task.cancel()
+        self.wb.stop()
+        self.fleet.unregister(self.address)
+        self.async_leave_site()
+
+    def async_join_site(self, options):
+        """Join the load balanced site of the configured site current sensor."""
+        sensor = options.get(CONF_SITE_SENSOR)
+        if not sensor:
+            return
+        balancers = self.hass.data.setdefault(BALANCER_DATA_KEY, {})
+        balancer = balancers.get(sensor)
+        if balancer is None:
+            balancer = balancers[sensor] = WallboxBLESiteBalancer(options.get(CONF_SITE_LIMIT, 25))
+
+            @callback
+            def site_changed(event):
+                balancer.update_site(site_current(event.data["new_state"]))
+
+            balancer.unsubscribe = async_track_state_change_event(self.hass, [sensor], site_changed)
+            balancer.update_site(site_current(self.hass.states.get(sensor)))
+        # The chargers of a site share one limit, the last one set up wins
+        balancer.limit = options.get(CONF_SITE_LIMIT, balancer.limit)
+        balancer.reaction_time = options.get(CONF_REACTION_TIME, balancer.reaction_time)
+        balancer.add(self.address, self.async_set_allotment)
+        self.site = balancer
+        self.site_sensor = sensor
+
+    def async_leave_site(self):
+        if self.site is None:
+            return
+        self.site.remove(self.address)
+        if not self.site.members:
+            self.hass.data[BALANCER_DATA_KEY].pop(self.site_sensor, None)
+        self.site = None
+
+    async def async_set_allotment(self, current):
+        """Apply the current allotted by the site balancer, 0 pauses charging."""
+        if not current:
+            self.paused_by_site = await self.async_set_parameter(WallboxBLEApiConst.START_STOP_CHARGING, 0)
+            return self.paused_by_site
+        if not await self.async_set_parameter(WallboxBLEApiConst.SET_MAX_CHARGING_CURRENT, current):
+            return False
+        if self.paused_by_site:
+            if not await self.async_set_parameter(WallboxBLEApiConst.START_STOP_CHARGING, 1):
+                return False
+            self.paused_by_site = False
+        return True
+
+    @property
+    def status_code(self) -> int:
+        return self.state.status_code
+
+    @property
+    def status(self) -> str:
+        return self.state.status
+
+    @property
+    def charge_current(self) -> int:
+        return self.optimistic("charge_current")
 
-        async_call_later(self.hass, delay, wrap)
+    def optimistic(self, name):
+        """A status value, or the value written for it until the charger confirms it."""
+        return self.overlay.get(self.state, name, time.monotonic())
+
+    def set_available(self, available):
+        if available != self.available:
+            self.changed.add("available")
+        self.available = available
 
     async def _async_update_data(self):
+        self.changed = set()
+        if self.firmware.in_progress:
+            # The link is left to the update, its progress is polled instead
+            self.update_interval = self.scheduler.update(UPDATING_STATUS_CODE)
+            return dataclasses.replace(self.snapshot_reader.snapshot)
         if not self.wb.ready:
-            return {}
+            self.set_available(False)
+            self.update_interval = self.scheduler.failed()
+            return dataclasses.replace(self.snapshot_reader.snapshot)
 
-        if self.max_charge_current == 0:
-            ok, data = await self.wb.async_get_max_charge_current()
-            if ok:
-                self.max_charge_current = data
-                LOGGER.debug(f"SET {self.max_charge_current=}")
+        previous = dataclasses.replace(self.snapshot_reader.snapshot)
+        async with self.fleet.poll(self.address):
+            refreshed, snapshot = await self.snapshot_reader.async_read()
+        self.changed |= {
+            key for key in refreshed - {"status"} if getattr(snapshot, key) != getattr(previous, key)
+        }
 
-        ok, data = await self.wb.async_get_data()
-        if ok:
+        if "max_available_current" in refreshed:
+            if snapshot.max_available_current != self.max_charge_current:
+                self.changed.add("max_charge_current")
+            self.max_charge_current = snapshot.max_available_current
+            LOGGER.debug("SET max_charge_current=%s", self.max_charge_current)
+
+        if refreshed:
+            self.async_save_snapshot()
+
+        if "status" in refreshed:
             LOGGER.debug("Update done")
-            self.status_code = data.get("st", 0)
-            self.locked = self.status_code == 6
-            self.charge_current = data.get("cur", 6)
-            self.status = WallboxBLEApiConst.STATUS_CODES[self.status_code]
-            self.available = True
-            return data
+            self.apply_status(snapshot.status)
+            self.update_interval = self.scheduler.update(self.status_code)
         else:
-            self.available = False
+            self.set_available(False)
+            self.update_interval = self.scheduler.failed()
+        return snapshot
+
+    def apply_status(self, data):
+        state = WallboxBLEStatus.from_dict(data)
+        self.changed |= self.state.diff(state)
+        previous_status_code = self.status_code
+        self.state = state
+        if self.overlay.update(state, time.monotonic()):
+            self.changed.add("overlay")
+        self.set_available(True)
+        self.energy.update(state.status_code, state.energy, state.power, time.monotonic())
+        self.fleet.set_priority(
+            self.address, PRIORITY_ACTIVE if self.status_code in ACTIVE_STATUS_CODES else PRIORITY_IDLE
+        )
+        if self.site is not None:
+            self.site.update_charger(self.address, self.status_code, state.charge_current, self.max_charge_current)
+
+        if self.status_code == UPDATING_STATUS_CODE:
+            self.firmware.watch()
+        elif time.monotonic() - self.last_firmware_check >= FIRMWARE_CHECK_INTERVAL:
+            self.async_schedule_firmware_check()
+
+        session_ended = previous_status_code == 1 and self.status_code != 1
+        if session_ended or time.monotonic() - self.last_session_sync >= SESSION_SYNC_INTERVAL:
+            self.async_schedule_session_sync()
+
+    @callback
+    def async_handle_sessions(self, records):
+        """Count new session records and import the hours they cover."""
+        self.energy.add_sessions(records)
+        starts = [record[SESSION_START] for record in records if isinstance(record.get(SESSION_START), (int, float))]
+        if starts:
+            since = int(min(starts) // 3600 * 3600)
+            async_import_energy_statistics(self.hass, self.address, self.sessions.records, since)
+        self.changed = {"sessions"}
+        self.async_update_listeners()
+
+    @callback
+    def async_handle_push(self, status):
+        """Publish a status the charger sent without being polled."""
+        LOGGER.debug("Pushed status %s", status)
+        self.changed = set()
+        snapshot = self.snapshot_reader.push("status", status)
+        self.async_save_snapshot()
+        self.apply_status(status)
+        self.update_interval = self.scheduler.pushed(self.status_code)
+        # Also moves the next poll out to the new interval
+        self.async_set_updated_data(snapshot)
 
     async def async_set_parameter(self, parameter, value):
+        """Queue a write, a refresh follows once the queue is empty.
+
+        While it is sent the value it sets is shown optimistically. Commands
+        that can wait are journaled while the charger is out of reach and
+        replayed on reconnect. None means it is still journaled.
+        """
+        optimistic = OPTIMISTIC_VALUES.get(parameter) if self.wb.ready else None
+        if optimistic is not None:
+            name, convert = optimistic
+            self.overlay.set(name, convert(value), time.monotonic())
+            self.changed = {"overlay"}
+            self.async_update_listeners()
+        ok = await self._async_submit_parameter(parameter, value)
+        if optimistic is not None and not ok and self.overlay.discard(name):
+            self.changed = {"overlay"}
+            self.async_update_listeners()
+        return ok
+
+    async def _async_submit_parameter(self, parameter, value):
+        if not self.wb.ready and parameter in JOURNAL_EXPIRY:
+            LOGGER.debug("Not connected, journaling %s(%s)", parameter, value)
+            future = self.journal.add(parameter, value, time.time())
+            self.changed = {"journal"}
+            self.async_update_listeners()
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), JOURNAL_WAIT)
+            except asyncio.TimeoutError:
+                return None
+        return await self.commands.submit(parameter, value)
+
+    @callback
+    def async_handle_connected(self):
+        if self.journal.commands:
+            self.hass.async_create_background_task(self.async_replay_journal(), f"{DOMAIN} journal replay")
+
+    async def async_replay_journal(self):
+        """Send the commands journaled while disconnected and report how each went."""
+        outcomes = await self.journal.async_replay(self.commands.submit, lambda: bool(self.wb.ready), time.time())
+        for command, outcome in outcomes:
+            self.hass.bus.async_fire(
+                COMMAND_EVENT,
+                {"address": self.address, "method": command.method, "parameter": command.parameter, "outcome": outcome},
+            )
+        self.changed = {"journal"}
+        self.async_update_listeners()
+
+    async def async_configure(self, profile=None, dry_run=False) -> dict:
+        """Read the configuration, with a profile write the settings that differ.
+
+        Waits for the connection, then reads and writes in one poll slot.
+        """
+        await asyncio.wait_for(self.wb.connection_established(), CONFIG_CONNECT_TIMEOUT)
+        async with self.fleet.poll(self.address):
+            if profile is None:
+                return await async_read_config(self.wb)
+            result = await async_apply_config(self.wb, profile, dry_run)
+        if result["changes"] and not dry_run:
+            await self.async_request_refresh()
+        return result
+
+    async def async_write_schedule(self, schedule) -> bool:
+        """Write the on-board charging schedule, returns False when it already was."""
+        await asyncio.wait_for(self.wb.connection_established(), CONFIG_CONNECT_TIMEOUT)
+        async with self.fleet.poll(self.address):
+            ok, current = await self.wb.request(WallboxBLEApiConst.GET_SCHEDULE)
+            if ok and current == schedule:
+                return False
+            ok, _ = await self.wb.request(WallboxBLEApiConst.SET_SCHEDULE, schedule)
+        if not ok:
+            raise HomeAssistantError("Writing the charging schedule failed")
+        await self.async_request_refresh()
+        return True
+
+    async def async_capture(self, duration) -> dict:
+        """Record the raw traffic of the link for duration seconds into a capture file."""
+        if self.wb.capture is not None:
+            raise HomeAssistantError("A capture is already running")
+        capture = self.wb.capture = WallboxBLECapture(self.address)
+        try:
+            await asyncio.sleep(duration)
+        finally:
+            self.wb.capture = None
+        name = f"{DOMAIN}_{self.address.replace(':', '').lower()}_{int(time.time())}.capture"
+        path = self.hass.config.path(name)
+
+        def write():
+            with open(path, "w", encoding="utf-8") as file:
+                file.write(capture.dumps())
+
+        await self.hass.async_add_executor_job(write)
+        return {"path": path, "records": len(capture.records), "dropped": capture.dropped}
+
+    async def _async_send_parameter(self, parameter, value):
         ok, _ = await self.wb.request(parameter, value)
+        if ok:
+            self.update_interval = self.scheduler.command_sent()
         return ok
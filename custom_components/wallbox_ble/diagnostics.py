@@ -0,0 +1,62 @@
+"""Diagnostics support for Wallbox BLE."""
+from __future__ import annotations
+
+import dataclasses
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import DOMAIN
+
+TO_REDACT = {"address", "unique_id"}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    wb = coordinator.wb
+    site = None
+    if coordinator.site is not None:
+        site = {**coordinator.site.as_dict(), "charger": coordinator.site.members[coordinator.address].as_dict()}
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "link": {
+            "connected": bool(wb.ready),
+            "connect_time": wb.connect_time,
+            "in_flight": len(wb.pending),
+            "pushes": wb.pushes,
+            "write_timeout": wb.write_timeout,
+            "response_timeout": wb.response_timeout,
+            "read_retries": wb.read_retries,
+            "decoder": {"frames": wb.decoder.frames, "errors": wb.decoder.errors},
+        },
+        "cache": {"hits": wb.cache.hits, "misses": wb.cache.misses, "entries": sorted(wb.cache.entries)},
+        "poll_interval": coordinator.update_interval.total_seconds(),
+        "requests": wb.stats.as_dict(),
+        "commands": {
+            "sent": coordinator.commands.sent,
+            "merged": coordinator.commands.merged,
+            "journal": coordinator.journal.as_list(),
+        },
+        "sessions": {
+            "count": coordinator.sessions.count,
+            "cursor": coordinator.sessions.cursor,
+            "stored": len(coordinator.sessions.records),
+        },
+        "fleet": {
+            "chargers": len(coordinator.fleet.members),
+            "polls_per_minute": coordinator.fleet.as_dict()["polls_per_minute"],
+            "fairness": coordinator.fleet.fairness,
+            "charger": coordinator.fleet.register(coordinator.address).as_dict(),
+        },
+        "site": site,
+        "snapshot": dataclasses.asdict(coordinator.snapshot_reader.snapshot),
+        "firmware": {
+            "installed": coordinator.firmware.installed,
+            "latest": coordinator.firmware.latest,
+            "progress": coordinator.firmware.progress,
+            "progress_polls": coordinator.firmware.polls,
+        },
+    }
@@ -0,0 +1,111 @@
+"""Energy accounting for Wallbox BLE."""
+from __future__ import annotations
+
+from collections import defaultdict
+
+# Keys of a GET_SESSION record: start as a unix timestamp, energy in kWh and
+# duration in seconds
+SESSION_START = "st"
+SESSION_ENERGY = "en"
+SESSION_DURATION = "d"
+
+HOUR = 3600
+
+
+def session_energy(record: dict) -> float:
+    try:
+        return float(record.get(SESSION_ENERGY) or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def hourly_energy(records) -> dict[int, float]:
+    """kWh per hour, by the unix timestamp the hour starts at.
+
+    The energy of a session is spread evenly over the hours it ran.
+    """
+    hours = defaultdict(float)
+    for record in records:
+        start = record.get(SESSION_START)
+        energy = session_energy(record)
+        if not isinstance(start, (int, float)) or not energy:
+            continue
+        duration = record.get(SESSION_DURATION) or 0
+        end = start + max(duration, 0)
+        if end <= start:
+            hours[int(start - start % HOUR)] += energy
+            continue
+        position = start
+        while position < end:
+            hour = position - position % HOUR
+            until = min(end, hour + HOUR)
+            hours[int(hour)] += energy * (until - position) / (end - start)
+            position = until
+    return hours
+
+
+def cumulative_energy(records, since: int | None = None) -> list[tuple[int, float]]:
+    """(hour start, total kWh at the end of the hour) for every hour with energy.
+
+    Totals count from the first session, only hours from since on are returned.
+    """
+    points = []
+    total = 0.0
+    for hour, energy in sorted(hourly_energy(records).items()):
+        total += energy
+        if since is None or hour >= since:
+            points.append((hour, round(total, 3)))
+    return points
+
+
+class WallboxBLEEnergyMeter:
+    """Cumulative energy and power of a charger.
+
+    The total is the energy of every session in the session log plus what
+    the status reports for the session that is running. A session that
+    ended is kept as unlogged energy until its record arrives, so the total
+    never drops in between.
+    """
+
+    def __init__(self):
+        self.logged = 0.0
+        self.unlogged = 0.0
+        self.live = 0.0
+        self.charging = False
+        self.power = None
+        self.sample = None
+
+    @property
+    def total(self) -> float:
+        return round(self.logged + self.unlogged + self.live, 3)
+
+    def add_sessions(self, records):
+        for record in records:
+            energy = session_energy(record)
+            self.logged += energy
+            self.unlogged -= min(energy, self.unlogged)
+
+    def update(self, status_code, energy, power, now):
+        """Record a status, energy in kWh of the running session, power in W or None."""
+        charging = status_code == 1
+        if charging and energy is not None:
+            if energy < self.live:
+                # The counter restarted, a new session began
+                self.unlogged += self.live
+                self.live = 0.0
+                self.sample = None
+            if power is None and self.sample is not None:
+                sampled_at, sampled_energy = self.sample
+                if now > sampled_at:
+                    power = (energy - sampled_energy) * 3_600_000 / (now - sampled_at)
+            self.live = energy
+            self.sample = (now, energy)
+        elif not charging:
+            if self.charging:
+                self.unlogged += self.live
+                self.live = 0.0
+            self.sample = None
+            if power is None:
+                power = 0.0
+        self.charging = charging
+        self.power = power
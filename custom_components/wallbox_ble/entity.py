@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from homeassistant.core import callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
@@ -8,12 +9,44 @@ from .coordinator import WallboxBLEDataUpdateCoordinator
 
 
 class WallboxBLEEntity(CoordinatorEntity):
-    def __init__(self, coordinator: WallboxBLEDataUpdateCoordinator) -> None:
+    def __init__(self, coordinator: WallboxBLEDataUpdateCoordinator, entity_description) -> None:
         super().__init__(coordinator)
-        self._attr_unique_id = coordinator.config_entry.entry_id
+        self.entity_description = entity_description
+        key = entity_description.unique_key
+        entry_id = coordinator.config_entry.entry_id
+        # The original entities use the bare entry id, later ones are suffixed with their key
+        self._attr_unique_id = entry_id if key is None else f"{entry_id}_{key}"
         self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, self.unique_id)},
+            identifiers={(DOMAIN, entry_id)},
             name=NAME,
             model=VERSION,
             manufacturer=NAME,
         )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write the state only when a field it depends on changed."""
+        fields = self.entity_description.fields
+        changed = self.coordinator.changed
+        if fields is None or "available" in changed or not fields.isdisjoint(changed):
+            super()._handle_coordinator_update()
+
+
+def async_add_supported_entities(coordinator: WallboxBLEDataUpdateCoordinator, descriptions, entity_class, async_add_entities):
+    """Add an entity for each description once the charger reports what it needs."""
+    added = set()
+
+    @callback
+    def add_supported():
+        new = [
+            description
+            for description in descriptions
+            if description.key not in added and description.supported_fn(coordinator)
+        ]
+        if new:
+            added.update(description.key for description in new)
+            async_add_entities(entity_class(coordinator, description) for description in new)
+
+    add_supported()
+    if len(added) < len(descriptions):
+        coordinator.config_entry.async_on_unload(coordinator.async_add_listener(add_supported))
@@ -0,0 +1,138 @@
+"""Firmware updates of Wallbox BLE chargers."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+import time
+
+from .const import LOGGER
+from .protocol import WallboxBLEApiConst
+
+# Seconds between two progress polls of a running update
+PROGRESS_MIN_INTERVAL = 2.0
+PROGRESS_MAX_INTERVAL = 30.0
+# Percent of progress aimed at between two progress polls
+PROGRESS_STEP = 5
+
+# Seconds after which an update that does not finish is no longer watched
+UPDATE_TIMEOUT = 3600.0
+
+VERSION_KEYS = ("fw", "version", "ver", "sw")
+PROGRESS_KEYS = ("progress", "p", "pct", "percent")
+
+
+def parse_version(data) -> str | None:
+    """The firmware version in a GET_CHARGER_VERSIONS or SOFTWARE_CHECK response."""
+    if isinstance(data, dict):
+        for key in VERSION_KEYS:
+            if data.get(key) is not None:
+                return str(data[key])
+        return None
+    if isinstance(data, (str, int, float)) and not isinstance(data, bool):
+        return str(data)
+    return None
+
+
+def parse_progress(data) -> int | None:
+    """Percent done in an UPDATE_SOFTWARE_PROGRESS response."""
+    if isinstance(data, dict):
+        data = next((data[key] for key in PROGRESS_KEYS if data.get(key) is not None), None)
+    if isinstance(data, bool) or not isinstance(data, (int, float)):
+        return None
+    return int(min(max(data, 0), 100))
+
+
+def next_progress_interval(interval, advanced, elapsed) -> float:
+    """Seconds until the next progress poll.
+
+    Aims at PROGRESS_STEP percent per poll at the rate seen since progress
+    last moved, and backs off while it stalls.
+    """
+    if advanced > 0:
+        interval = PROGRESS_STEP * elapsed / advanced
+    else:
+        interval *= 2
+    return min(max(interval, PROGRESS_MIN_INTERVAL), PROGRESS_MAX_INTERVAL)
+
+
+class WallboxBLEFirmwareUpdater:
+    """Checks for, installs and watches firmware updates.
+
+    While an update runs its progress is polled at an adaptive rate,
+    on_progress is called when it moves and on_finished once the update is
+    done or no longer answers.
+    """
+
+    def __init__(
+        self,
+        client,
+        on_progress: Callable[[], None] | None = None,
+        on_finished: Callable[[], None] | None = None,
+    ):
+        self.client = client
+        self.on_progress = on_progress
+        self.on_finished = on_finished
+        self.installed = None
+        self.latest = None
+        self.progress = None
+        self.task = None
+        self.polls = 0
+
+    @property
+    def in_progress(self) -> bool:
+        return self.task is not None
+
+    async def async_check(self):
+        """Read the installed version and ask the charger for the latest one."""
+        ok, data = await self.client.request(WallboxBLEApiConst.GET_CHARGER_VERSIONS)
+        if ok:
+            self.installed = parse_version(data) or self.installed
+        ok, data = await self.client.request(WallboxBLEApiConst.SOFTWARE_CHECK)
+        if ok:
+            # A check without a version means the installed one is the latest
+            self.latest = parse_version(data) or self.installed
+        LOGGER.debug("Firmware %s installed, %s latest", self.installed, self.latest)
+
+    async def async_install(self) -> bool:
+        ok, _ = await self.client.request(WallboxBLEApiConst.UPDATE_SOFTWARE)
+        if ok:
+            self.watch()
+        return ok
+
+    def watch(self):
+        """Watch the progress of a running update, unless already watching."""
+        if self.task is None:
+            self.task = asyncio.get_running_loop().create_task(self.async_watch())
+
+    async def async_watch(self):
+        started = last_at = time.monotonic()
+        last = self.progress or 0
+        interval = PROGRESS_MIN_INTERVAL
+        try:
+            while time.monotonic() - started < UPDATE_TIMEOUT:
+                await asyncio.sleep(interval)
+                ok, data = await self.client.request(WallboxBLEApiConst.UPDATE_SOFTWARE_PROGRESS)
+                self.polls += 1
+                progress = parse_progress(data) if ok else None
+                now = time.monotonic()
+                if progress is None:
+                    # The charger restarts into the new firmware at the end
+                    if last > 0 and not self.client.ready:
+                        break
+                    interval = next_progress_interval(interval, 0, now - last_at)
+                    continue
+                interval = next_progress_interval(interval, progress - last, now - last_at)
+                if progress != last:
+                    last, last_at = progress, now
+                if progress != self.progress:
+                    self.progress = progress
+                    if self.on_progress is not None:
+                        self.on_progress()
+                if progress >= 100:
+                    break
+        finally:
+            self.task = None
+            self.progress = None
+        LOGGER.debug("Firmware update done after %d progress polls", self.polls)
+        if self.on_finished is not None:
+            self.on_finished()
@@ -0,0 +1,199 @@
+"""Connection and airtime broker shared by all Wallbox BLE chargers."""
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+import heapq
+import itertools
+import time
+
+from .stats import RollingHistogram
+
+# Connections held on one adapter or proxy at the same time. ESPHome proxies
+# have three connection slots by default.
+FLEET_CONNECTIONS_PER_ADAPTER = 3
+
+# Polls running on one adapter at the same time
+FLEET_POLLS_PER_ADAPTER = 1
+
+# Seconds a charger holds a connection slot before it yields to a waiting one
+FLEET_TURN_TIME = 60.0
+
+# Poll priorities, lower goes first
+PRIORITY_ACTIVE = 0
+PRIORITY_IDLE = 1
+
+
+class WallboxBLEFleetMember:
+    """Airtime accounting of one charger."""
+
+    __slots__ = ("address", "adapter", "priority", "last_grant", "polls", "airtime", "wait", "on_yield")
+
+    def __init__(self, address):
+        self.address = address
+        self.adapter = None
+        self.priority = PRIORITY_IDLE
+        self.last_grant = 0.0
+        self.polls = 0
+        self.airtime = 0.0
+        self.wait = RollingHistogram()
+        self.on_yield = None
+
+    def as_dict(self) -> dict:
+        return {
+            "adapter": self.adapter,
+            "priority": self.priority,
+            "polls": self.polls,
+            "airtime_s": round(self.airtime, 3),
+            "wait": self.wait.as_dict(),
+        }
+
+
+class _SlotPool:
+    """A limited number of slots granted by priority, then least recently served."""
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.holders: dict[str, float] = {}
+        self.waiters = []
+        self.order = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for *_, future in self.waiters if not future.done())
+
+    async def acquire(self, member: WallboxBLEFleetMember):
+        if len(self.holders) < self.capacity and not self.waiting:
+            self.holders[member.address] = time.monotonic()
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.waiters, (member.priority, member.last_grant, next(self.order), member.address, future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release(member.address)
+            raise
+
+    def release(self, address):
+        if self.holders.pop(address, None) is None:
+            return
+        while self.waiters and len(self.holders) < self.capacity:
+            *_, address, future = heapq.heappop(self.waiters)
+            if future.done():
+                continue
+            self.holders[address] = time.monotonic()
+            future.set_result(None)
+
+
+class WallboxBLEFleetBroker:
+    """Shares adapters between the configured chargers.
+
+    Each adapter has a cap on held connections and on concurrent polls. Slots
+    go to the highest priority waiter first, and between equal priorities to
+    the charger that was served longest ago, so busy chargers cannot starve
+    the others.
+    """
+
+    def __init__(self, connections_per_adapter=FLEET_CONNECTIONS_PER_ADAPTER, polls_per_adapter=FLEET_POLLS_PER_ADAPTER):
+        self.connections_per_adapter = connections_per_adapter
+        self.polls_per_adapter = polls_per_adapter
+        self.turn_time = FLEET_TURN_TIME
+        self.members: dict[str, WallboxBLEFleetMember] = {}
+        self.connections: dict[str, _SlotPool] = {}
+        self.polls: dict[str, _SlotPool] = {}
+        self.started = time.monotonic()
+
+    def register(self, address) -> WallboxBLEFleetMember:
+        member = self.members.get(address)
+        if member is None:
+            member = self.members[address] = WallboxBLEFleetMember(address)
+        return member
+
+    def unregister(self, address):
+        member = self.members.pop(address, None)
+        if member is not None and member.adapter is not None:
+            self.release_connection(address)
+
+    def set_priority(self, address, priority):
+        self.register(address).priority = priority
+
+    async def acquire_connection(self, address, adapter, on_yield=None):
+        """Wait for a connection slot on adapter.
+
+        on_yield is called when the charger has had its turn and another one is
+        waiting for a slot, the caller should then disconnect.
+        """
+        member = self.register(address)
+        member.adapter = adapter
+        pool = self.connections.setdefault(adapter, _SlotPool(self.connections_per_adapter))
+        await pool.acquire(member)
+        member.on_yield = on_yield
+        self.rotate(adapter)
+
+    def release_connection(self, address):
+        member = self.members.get(address)
+        if member is None or member.adapter is None:
+            return
+        member.on_yield = None
+        pool = self.connections.get(member.adapter)
+        if pool is not None:
+            pool.release(address)
+        self.rotate(member.adapter)
+
+    def rotate(self, adapter):
+        """Ask chargers that had their turn to make room for waiting ones."""
+        pool = self.connections.get(adapter)
+        if pool is None or not pool.waiting:
+            return
+        now = time.monotonic()
+        for address, granted in pool.holders.items():
+            member = self.members.get(address)
+            if member is not None and member.on_yield is not None and now - granted >= self.turn_time:
+                on_yield, member.on_yield = member.on_yield, None
+                on_yield()
+
+    @asynccontextmanager
+    async def poll(self, address):
+        """Hold a poll slot on the charger's adapter for the duration of the block."""
+        member = self.register(address)
+        adapter = member.adapter
+        pool = self.polls.setdefault(adapter, _SlotPool(self.polls_per_adapter))
+        requested = time.monotonic()
+        await pool.acquire(member)
+        granted = time.monotonic()
+        member.wait.add(granted - requested)
+        try:
+            yield
+        finally:
+            pool.release(address)
+            finished = time.monotonic()
+            member.last_grant = finished
+            member.polls += 1
+            member.airtime += finished - granted
+            if adapter is not None:
+                self.rotate(adapter)
+
+    @property
+    def fairness(self) -> float | None:
+        """Jain's fairness index of airtime between chargers, 1.0 is an equal share."""
+        airtime = [member.airtime for member in self.members.values()]
+        total = sum(airtime)
+        if not total:
+            return None
+        return total * total / (len(airtime) * sum(value * value for value in airtime))
+
+    def as_dict(self) -> dict:
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "polls_per_minute": sum(member.polls for member in self.members.values()) * 60 / elapsed,
+            "fairness": self.fairness,
+            "adapters": {
+                str(adapter): {
+                    "connections": list(pool.holders),
+                    "waiting": pool.waiting,
+                }
+                for adapter, pool in self.connections.items()
+            },
+            "chargers": {address: member.as_dict() for address, member in self.members.items()},
+        }
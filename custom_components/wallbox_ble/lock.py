@@ -1,39 +1,19 @@
 from __future__ import annotations
 
-from homeassistant.components.lock import LockEntity, LockEntityDescription
+from homeassistant.components.lock import LockEntity
 
-from .api import WallboxBLEApiConst
-from .const import DOMAIN, LOGGER
-from .coordinator import WallboxBLEDataUpdateCoordinator
-from .entity import WallboxBLEEntity
-
-ENTITY_DESCRIPTIONS = (
-    LockEntityDescription(
-        key="wallbox_ble",
-        name="Lock",
-    ),
-)
+from .const import DOMAIN
+from .entity import WallboxBLEEntity, async_add_supported_entities
+from .registry import LOCKS, WallboxBLELockEntityDescription
 
 
 async def async_setup_entry(hass, entry, async_add_devices):
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_devices(
-        WallboxBLELock(
-            coordinator=coordinator,
-            entity_description=entity_description,
-        )
-        for entity_description in ENTITY_DESCRIPTIONS
-    )
+    async_add_supported_entities(coordinator, LOCKS, WallboxBLELock, async_add_devices)
 
 
 class WallboxBLELock(WallboxBLEEntity, LockEntity):
-    def __init__(
-        self,
-        coordinator: WallboxBLEDataUpdateCoordinator,
-        entity_description: LockEntityDescription,
-    ) -> None:
-        super().__init__(coordinator)
-        self.entity_description = entity_description
+    entity_description: WallboxBLELockEntityDescription
 
     @property
     def available(self):
@@ -41,16 +21,21 @@ class WallboxBLELock(WallboxBLEEntity, LockEntity):
 
     @property
     def is_locked(self) -> bool:
-        return self.coordinator.locked
+        return self.coordinator.optimistic("locked")
+
+    @property
+    def is_locking(self) -> bool:
+        command = self.coordinator.journal.pending(self.entity_description.method)
+        return command is not None and command.parameter == 1
+
+    @property
+    def is_unlocking(self) -> bool:
+        command = self.coordinator.journal.pending(self.entity_description.method)
+        return command is not None and command.parameter == 0
 
     async def async_lock(self, **_: any) -> None:
-        if await self.coordinator.async_set_parameter(WallboxBLEApiConst.LOCK, 1):
-            self.coordinator.locked = True
-            self.async_schedule_update_ha_state()  # Locking is slow, so we fake it
-            await self.coordinator.async_refresh_later(1)
+        # Locking is slow, the coordinator shows it locked until the charger confirms
+        await self.coordinator.async_set_parameter(self.entity_description.method, 1)
 
     async def async_unlock(self, **_: any) -> None:
-        if await self.coordinator.async_set_parameter(WallboxBLEApiConst.LOCK, 0):
-            self.coordinator.locked = False
-            self.async_schedule_update_ha_state()  # Unlocking is even slower, so we fake it
-            await self.coordinator.async_refresh_later(1)
+        await self.coordinator.async_set_parameter(self.entity_description.method, 0)
@@ -0,0 +1,75 @@
+"""BlueZ pairing agent shared by all Wallbox BLE chargers."""
+from __future__ import annotations
+
+import asyncio
+
+from dbus_fast import DBusError
+from dbus_fast.aio import MessageBus
+from dbus_fast.constants import BusType
+from dbus_fast.service import ServiceInterface, method
+
+from .const import LOGGER
+
+AGENT_PATH = "/wallbox/agent"
+
+
+class AgentInterface(ServiceInterface):
+    def __init__(self, name):
+        super().__init__(name)
+
+    @method()
+    def RequestAuthorization(self, device: 'o'):
+        LOGGER.debug("Initial pairing! Got RequestAuthorization for %s", device)
+        return
+
+
+class WallboxBLEPairingAgent:
+    """A NoInputNoOutput agent registered with BlueZ once per process.
+
+    The system bus connection stays open so the agent keeps answering pairing
+    requests, chargers that are already bonded never touch D-Bus.
+    """
+
+    def __init__(self):
+        self.bus = None
+        self.lock = asyncio.Lock()
+        self.pairings = 0
+
+    @property
+    def registered(self) -> bool:
+        return self.bus is not None and self.bus.connected
+
+    async def async_register(self) -> bool:
+        async with self.lock:
+            if self.registered:
+                return True
+            try:
+                bus = await MessageBus(bus_type=BusType.SYSTEM, negotiate_unix_fd=True).connect()
+            except (OSError, DBusError) as err:
+                # No local BlueZ, such as when only proxies are used
+                LOGGER.debug("Could not connect to the system bus: %s", err)
+                return False
+            try:
+                bus.export(AGENT_PATH, AgentInterface("org.bluez.Agent1"))
+                introspection = await bus.introspect("org.bluez", "/org/bluez")
+                obj = bus.get_proxy_object("org.bluez", "/org/bluez", introspection)
+                agent_manager = obj.get_interface("org.bluez.AgentManager1")
+                await agent_manager.call_register_agent(AGENT_PATH, "NoInputNoOutput")
+            except DBusError as err:
+                LOGGER.debug("Could not register the pairing agent: %s", err)
+                bus.disconnect()
+                return False
+            self.bus = bus
+            LOGGER.debug("Registered the pairing agent")
+            return True
+
+    async def async_pair(self, client):
+        """Pair client with the agent in place to authorize it."""
+        await self.async_register()
+        self.pairings += 1
+        await client.pair()
+
+    def close(self, *_):
+        if self.bus is not None:
+            self.bus.disconnect()
+            self.bus = None
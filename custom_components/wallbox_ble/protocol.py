@@ -0,0 +1,387 @@
+"""Wallbox BLE UART framing."""
+from __future__ import annotations
+
+import json
+import re
+
+from .const import LOGGER
+
+FRAME_HEADER = b"EaE"
+HEADER_SIZE = len(FRAME_HEADER) + 1
+
+# A bare JSON object that has not closed after this many bytes is treated as lost
+MAX_BARE_FRAME_SIZE = 8192
+
+# Bytes that can change the JSON nesting state, everything else is skipped in bulk
+_JSON_TOKENS = re.compile(rb'[{}"\\]')
+_OPEN, _CLOSE, _QUOTE, _BACKSLASH = b'{}"\\'
+
+
+class WallboxBLEApiConst:
+    UART_SERVICE_UUID = "331a36f5-2459-45ea-9d95-6142f0c4b307"
+    UART_RX_CHAR_UUID = "a9da6040-0823-4995-94ec-9ce41ca28833"
+    UART_TX_CHAR_UUID = "a73e9a10-628f-4494-a099-12efaf72258f"
+
+    GET_AUTOLOCK = "g_alo"
+    GET_BATTERY_CONFIG = "r_socr"
+    GET_CHARGER_VERSIONS = "fw_v_"
+    GET_DISCHARGE_SESSION = "r_dis"
+    GET_DYNAMIC_GRID_CODE = "ggcds"
+    GET_DYNAMIC_GRID_CODE_REGULATIONS = "r_gcdl"
+    GET_DYNAMIC_GRID_CODE_FEATURES = "r_gcdf"
+    GET_DYNAMIC_GRID_CODE_LOGS = "r_gcli"
+    GET_DYNAMIC_GRID_CODE_LOGS_DETAIL = "r_gcld"
+    GET_DYNAMIC_GRID_CODE_LOGS_SIZE = "r_gcls"
+    GET_DYNAMIC_GRID_CODE_ALERT = "r_gcai"
+    GET_DYNAMIC_GRID_CODE_ALERT_SIZE = "r_gcas"
+    GET_ECO_SMART_CONFIGURATION = "g_ecos"
+    GET_GESTURE_CONFIGURATION = "ggsta"
+    GET_GRID_CODE = "r_gcd"
+    GET_HALO_CONFIG = "g_halocfg"
+    GET_HOTSPOT_UPDATE_STATUS = "r_hup"
+    GET_IP_MODE = "gimod"
+    GET_LOCK_STATUS = "r_lck"
+    GET_MAC_ADDRESSES = "g_mac"
+    GET_MAX_AVAILABLE_CURRENT = "r_fsI"
+    GET_MID_CONFIGURATION = "g_mid"
+    GET_MOBILE_CONNECTIVITY = "gmcon"
+    GET_NETWORKS_STATUS = "gnsta"
+    GET_OCPP = "g_ocpp"
+    GET_POWER_BOOST = "r_hsh"
+    GET_POWER_BOOST_STATUS = "r_dca"
+    GET_POWER_INFUSION = "g_pwi"
+    GET_POWER_SHARING = "g_psh"
+    GET_PROXY_MODE = "gpmod"
+    GET_SCHEDULE = "r_sch"
+    GET_SERIAL_NUMBER = "r_sn_"
+    GET_SESSIONS_INFO = "r_ses"
+    GET_SESSION = "r_log"
+    GET_STATUS = "r_dat"
+    GET_TIMEZONE = "g_tzn"
+    GET_GROUNDING_STATUS = "r_wel"
+    GET_WIFI_NETWORKS = "gwnet"
+    GET_WIFI_STATUS = "gwsta"
+    LOCK = "w_lck"
+    REBOOT = "rebot"
+    SET_AUTOLOCK = "s_alo"
+    SET_BATTERY_CONFIG = "w_socr"
+    SEND_TRANSACTION_DATA = "w_td"
+    SET_DATA_TRANSACTION_STATUS = "s_dts"
+    SET_DYNAMIC_GRID_CODE = "sgcds"
+    SET_DYNAMIC_GRID_CODE_REGULATION = "w_gcdr"
+    SET_DYNAMIC_GRID_CODE_FEATURE = "w_gcdf"
+    SET_ECO_SMART_CONFIGURATION = "s_ecos"
+    SET_GESTURE_CONFIGURATION = "sgsta"
+    SET_GRID_CODE = "w_gcd"
+    SET_HALO_CONFIG = "s_halocfg"
+    SET_HOTSPOT_UPDATE = "s_hup"
+    SET_HOTSPOT_UPDATE_INFO = "s_deb"
+    SET_IP_MODE = "simod"
+    SET_MAX_CHARGING_CURRENT = "w_mxI"
+    SET_MID_CONFIGURATION = "s_mid"
+    SET_MOBILE_CONNECTIVITY = "smcon"
+    SET_MOBILE_CONNECTIVITY_STATUS = "smcen"
+    SET_MULTIUSER = "s_mus"
+    SET_OCPP = "s_ocpp"
+    SET_POWER_BOOST = "w_hsh"
+    SET_POWER_INFUSION = "s_pwi"
+    SET_POWER_SHARING = "s_psh"
+    SET_PROXY_MODE = "spmod"
+    SET_SCHEDULE = "w_sch"
+    SET_TIME = "Wtime"
+    SET_TIMEZONE = "s_tzn"
+    SET_USER = "suser"
+    SET_USER_LIST = "sulis"
+    SET_GROUNDING_STATUS = "w_wel"
+    SET_WIFI = "swcon"
+    SET_WIFI_STATUS = "swsta"
+    SOFTWARE_CHECK = "gupdc"
+    START_STOP_CHARGING = "w_cha"
+    UNLOCK_MOBILE_SIM = "smpuk"
+    UPDATE_SOFTWARE_PROGRESS = "supdp"
+    UPDATE_SOFTWARE = "supds"
+
+    STATUS_CODES = [
+        "READY",  # 0
+        "CHARGING",  # 1
+        "CONNECTED_WAITING_CAR",  # 2
+        "CONNECTED_WAITING_SCHEDULE",  # 3
+        "PAUSED",  # 4
+        "SCHEDULE_END",  # 5
+        "LOCKED",  # 6
+        "ERROR",  # 7
+        "CONNECTED_WAITING_CURRENT_ASSIGNATION",  # 8
+        "UNCONFIGURED_POWER_SHARING",  # 9
+        "QUEUE_BY_POWER_BOOST",  # 10
+        "DISCHARGING",  # 11
+        "CONNECTED_WAITING_ADMIN_AUTH_FOR_MID",  # 12
+        "CONNECTED_MID_SAFETY_MARGIN_EXCEEDED",  # 13
+        "OCPP_UNAVAILABLE",  # 14
+        "OCPP_CHARGE_FINISHING",  # 15
+        "OCPP_RESERVED",  # 16
+        "UPDATING",  # 17
+        "QUEUE_BY_ECO_SMART",  # 18
+    ]
+
+
+# ATT header bytes that count against the MTU of a GATT write
+ATT_HEADER_SIZE = 3
+
+# Write size used when the link does not report its MTU, the BLE minimum of 23
+DEFAULT_WRITE_SIZE = 23 - ATT_HEADER_SIZE
+
+
+def _encode_parameter(parameter) -> bytes:
+    if parameter is None:
+        return b"null"
+    if parameter is True:
+        return b"true"
+    if parameter is False:
+        return b"false"
+    if type(parameter) is int:
+        return b"%d" % parameter
+    return json.dumps(parameter, separators=(",", ":")).encode()
+
+
+class WallboxBLEFrameEncoder:
+    """Builds request frames into a reusable buffer.
+
+    The frame header, method and their checksum are computed once per method,
+    so encoding a request only serialises the parameter and request id.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray(256)
+        self.prefixes: dict[str, tuple[bytes, int]] = {}
+
+    def prefix(self, method: str) -> tuple[bytes, int]:
+        """The JSON before the parameter and the checksum of the constant header bytes."""
+        prefix = self.prefixes.get(method)
+        if prefix is None:
+            data = b'{"met":' + json.dumps(method).encode() + b',"par":'
+            prefix = self.prefixes[method] = (data, sum(FRAME_HEADER) + sum(data))
+        return prefix
+
+    def encode(self, method: str, parameter, request_id: int) -> bytes:
+        prefix, checksum = self.prefix(method)
+        parameter = _encode_parameter(parameter)
+        suffix = b',"id":%d}' % request_id
+        length = len(prefix) + len(parameter) + len(suffix)
+        size = HEADER_SIZE + length + 1
+
+        buffer = self.buffer
+        if len(buffer) < size:
+            buffer = self.buffer = bytearray(max(size, 2 * len(buffer)))
+        # The length field only holds the low byte, the decoder finds the end
+        # of longer payloads by checking the checksum at each 256 byte step
+        buffer[: len(FRAME_HEADER)] = FRAME_HEADER
+        buffer[len(FRAME_HEADER)] = length & 0xFF
+        end = HEADER_SIZE + len(prefix)
+        buffer[HEADER_SIZE:end] = prefix
+        buffer[end : end + len(parameter)] = parameter
+        end += len(parameter)
+        buffer[end : end + len(suffix)] = suffix
+        end += len(suffix)
+        buffer[end] = (checksum + (length & 0xFF) + sum(parameter) + sum(suffix)) & 0xFF
+        return bytes(memoryview(buffer)[:size])
+
+
+def split_writes(frame: bytes, write_size: int) -> list[bytes]:
+    """Split a frame into GATT writes of at most write_size bytes."""
+    if len(frame) <= write_size:
+        return [frame]
+    return [frame[i : i + write_size] for i in range(0, len(frame), write_size)]
+
+
+def _frame_end(buffer, start, length):
+    """The offset of the checksum byte if buffer[:end] + checksum is a valid frame."""
+    end = start + length
+    if buffer[end - 1] == _CLOSE and buffer[end] == sum(buffer[:end]) & 0xFF:
+        return end
+    return None
+
+
+class WallboxBLEFrameDecoder:
+    """Incremental decoder for the notification stream on the UART TX characteristic.
+
+    Frames are either ``EaE`` + length byte + JSON + checksum byte, the same framing
+    used for requests, or a bare JSON object. Framed messages are delimited by their
+    length byte and checksum, so a lost or corrupted chunk only costs the frame it
+    belonged to. Bare objects are found by scanning every byte once, no matter how
+    many notifications they are split over.
+    """
+
+    def __init__(self):
+        self.frames = 0
+        self.errors = 0
+        self.reset()
+
+    def reset(self):
+        self.buffer = bytearray()
+        self._scanning = False
+        self._scan = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, data) -> list[dict]:
+        """Add a chunk and return every message completed by it."""
+        if not self.buffer and (message := self._decode_whole(data)) is not None:
+            self.frames += 1
+            return [message]
+
+        self.buffer += data
+        messages = []
+        while (message := self._next_message()) is not None:
+            messages.append(message)
+        return messages
+
+    def _decode_whole(self, data):
+        """Fast path for a chunk holding exactly one frame, the usual case with a large MTU."""
+        if data[:1] == b"{" and data[-1:] == b"}":
+            payload = data
+        elif (
+            data[: len(FRAME_HEADER)] == FRAME_HEADER
+            and len(data) > HEADER_SIZE
+            and len(data) == HEADER_SIZE + data[len(FRAME_HEADER)] + 1
+            and _frame_end(data, HEADER_SIZE, data[len(FRAME_HEADER)]) is not None
+        ):
+            payload = data[HEADER_SIZE:-1]
+        else:
+            return None
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            return None  # Possibly several objects, let the slow path split them
+        return message if isinstance(message, dict) else None
+
+    def _next_message(self):
+        while self.buffer:
+            if self.buffer[:1] == b"{":
+                end = self._find_bare_end()
+                if end is None:
+                    return None
+                payload = bytes(self.buffer[:end])
+                del self.buffer[:end]
+            elif self.buffer[: len(FRAME_HEADER)] == FRAME_HEADER:
+                end = self._find_framed_end()
+                if end is None:
+                    return None
+                if end is False:
+                    continue  # Dropped a broken frame, try the next one
+                payload = bytes(self.buffer[HEADER_SIZE:end])
+                del self.buffer[: end + 1]
+            elif not self._skip_garbage():
+                return None
+            else:
+                continue
+
+            try:
+                message = json.loads(payload)
+            except ValueError:
+                LOGGER.debug("Dropping undecodable frame %s", payload)
+                self.errors += 1
+                continue
+            if not isinstance(message, dict):
+                LOGGER.debug("Dropping non-object frame %s", payload)
+                self.errors += 1
+                continue
+
+            self.frames += 1
+            return message
+        return None
+
+    def _find_framed_end(self):
+        """Returns the checksum offset, None when more data is needed or False
+        when the frame at the head of the buffer was dropped as broken.
+
+        The length byte only holds the low eight bits, so the payload is length,
+        length + 256, ... bytes long. While a frame is incomplete, the start of
+        another frame behind it means a chunk was lost and the stream resyncs there.
+        """
+        buffer = self.buffer
+        if len(buffer) < HEADER_SIZE:
+            return None
+        length = buffer[len(FRAME_HEADER)] or 256
+        while HEADER_SIZE + length < len(buffer):
+            if _frame_end(buffer, HEADER_SIZE, length) is not None:
+                return HEADER_SIZE + length
+            length += 256
+
+        next_frame = self._find_next_frame()
+        if next_frame is None:
+            return None
+        LOGGER.debug("Dropping broken frame of %d bytes", next_frame)
+        self.errors += 1
+        del buffer[:next_frame]
+        return False
+
+    def _find_next_frame(self):
+        """The offset of the next header followed by the start of a JSON object."""
+        buffer = self.buffer
+        position = 1
+        while (position := buffer.find(FRAME_HEADER, position)) != -1:
+            if buffer[position + HEADER_SIZE : position + HEADER_SIZE + 1] == b"{":
+                return position
+            position += 1
+        return None
+
+    def _skip_garbage(self):
+        """Drop bytes up to the next possible frame start, returns False if more data is needed."""
+        buffer = self.buffer
+        if FRAME_HEADER.startswith(bytes(buffer[: len(FRAME_HEADER)])):
+            return False  # Possibly a header split over two chunks
+        header = buffer.find(FRAME_HEADER, 1)
+        brace = buffer.find(b"{", 1)
+        candidates = [i for i in (header, brace) if i != -1]
+        skip = min(candidates) if candidates else len(buffer)
+        LOGGER.debug("Skipping %d bytes of garbage", skip)
+        self.errors += 1
+        del buffer[:skip]
+        return True
+
+    def _find_bare_end(self):
+        """Continue scanning the bare JSON object at the head of the buffer,
+        returns the offset past its closing brace."""
+        buffer = self.buffer
+        if not self._scanning:
+            self._scanning = True
+            self._scan = 0
+            self._depth = 0
+            self._in_string = False
+            self._escape = False
+
+        position = self._scan
+        if self._escape:
+            if position >= len(buffer):
+                return None
+            self._escape = False
+            position += 1
+
+        while (match := _JSON_TOKENS.search(buffer, position)) is not None:
+            token = buffer[match.start()]
+            position = match.end()
+            if self._in_string:
+                if token == _BACKSLASH:
+                    if position >= len(buffer):
+                        self._escape = True
+                        break
+                    position += 1  # Skip the escaped byte
+                elif token == _QUOTE:
+                    self._in_string = False
+            elif token == _QUOTE:
+                self._in_string = True
+            elif token == _OPEN:
+                self._depth += 1
+            elif token == _CLOSE:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._scanning = False
+                    return position
+        self._scan = len(buffer)
+
+        if len(buffer) > MAX_BARE_FRAME_SIZE:
+            LOGGER.debug("Dropping unterminated frame of %d bytes", len(buffer))
+            self.errors += 1
+            self.reset()
+        return None
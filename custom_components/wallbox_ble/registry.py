@@ -0,0 +1,320 @@
+"""Entity descriptions of every platform, keyed to the data they show."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.lock import LockEntityDescription
+from homeassistant.components.number import NumberDeviceClass, NumberEntityDescription
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.components.switch import SwitchEntityDescription
+from homeassistant.components.update import UpdateEntityDescription
+from homeassistant.const import (
+    EntityCategory,
+    UnitOfElectricCurrent,
+    UnitOfEnergy,
+    UnitOfPower,
+    UnitOfTime,
+)
+
+from .coordinator import WallboxBLEDataUpdateCoordinator
+from .protocol import WallboxBLEApiConst
+
+
+def has_status_field(name):
+    """Supported when the charger reports the status field."""
+    return lambda coordinator: getattr(coordinator.state, name) is not None
+
+
+def has_read(key):
+    """Supported once the snapshot read has returned a value."""
+    return lambda coordinator: getattr(coordinator.snapshot_reader.snapshot, key) is not None
+
+
+def read_value(key):
+    """A snapshot read as a sensor value, settings objects show their enabled flag."""
+
+    def value_fn(coordinator):
+        value = getattr(coordinator.snapshot_reader.snapshot, key)
+        if isinstance(value, dict):
+            for name in ("enabled", "status", "fw", "version"):
+                if name in value:
+                    return value[name]
+            return None
+        return value
+
+    return value_fn
+
+
+@dataclass(frozen=True, kw_only=True)
+class WallboxBLEEntityDescriptionMixin:
+    # Suffix of the unique id, None for the entities that predate suffixes
+    unique_key: str | None = None
+    # Coordinator fields the state depends on, None to write the state on every update
+    fields: frozenset[str] | None = None
+    # Entities are only added once this returns True
+    supported_fn: Callable[[WallboxBLEDataUpdateCoordinator], bool] = lambda coordinator: True
+
+
+@dataclass(frozen=True, kw_only=True)
+class WallboxBLESensorEntityDescription(SensorEntityDescription, WallboxBLEEntityDescriptionMixin):
+    value_fn: Callable[[WallboxBLEDataUpdateCoordinator], Any]
+    always_available: bool = False
+
+
+@dataclass(frozen=True, kw_only=True)
+class WallboxBLESwitchEntityDescription(SwitchEntityDescription, WallboxBLEEntityDescriptionMixin):
+    method: str
+    is_on_fn: Callable[[WallboxBLEDataUpdateCoordinator], bool]
+    available_fn: Callable[[WallboxBLEDataUpdateCoordinator], bool] = lambda coordinator: True
+
+
+@dataclass(frozen=True, kw_only=True)
+class WallboxBLELockEntityDescription(LockEntityDescription, WallboxBLEEntityDescriptionMixin):
+    method: str
+
+
+@dataclass(frozen=True, kw_only=True)
+class WallboxBLENumberEntityDescription(NumberEntityDescription, WallboxBLEEntityDescriptionMixin):
+    method: str
+    value_fn: Callable[[WallboxBLEDataUpdateCoordinator], float]
+    max_fn: Callable[[WallboxBLEDataUpdateCoordinator], float]
+
+
+@dataclass(frozen=True, kw_only=True)
+class WallboxBLEUpdateEntityDescription(UpdateEntityDescription, WallboxBLEEntityDescriptionMixin):
+    pass
+
+
+SENSORS = (
+    WallboxBLESensorEntityDescription(
+        key="wallbox_ble",
+        name="Status",
+        # icon="mdi:flash",
+        fields=frozenset({"status_code"}),
+        value_fn=lambda coordinator: coordinator.status,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="power",
+        unique_key="power",
+        name="Power",
+        device_class=SensorDeviceClass.POWER,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfPower.WATT,
+        suggested_display_precision=0,
+        fields=frozenset({"power", "energy", "status_code"}),
+        supported_fn=lambda coordinator: coordinator.state.power is not None or coordinator.state.energy is not None,
+        value_fn=lambda coordinator: coordinator.energy.power,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="session_energy",
+        unique_key="session_energy",
+        name="Session energy",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=2,
+        fields=frozenset({"energy"}),
+        supported_fn=has_status_field("energy"),
+        value_fn=lambda coordinator: coordinator.state.energy,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="energy",
+        unique_key="energy",
+        name="Energy",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        native_unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+        suggested_display_precision=2,
+        fields=frozenset({"energy", "status_code", "sessions"}),
+        supported_fn=lambda coordinator: coordinator.state.energy is not None or bool(coordinator.sessions.records),
+        value_fn=lambda coordinator: coordinator.energy.total,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="max_current",
+        unique_key="max_current",
+        name="Max current",
+        device_class=SensorDeviceClass.CURRENT,
+        native_unit_of_measurement=UnitOfElectricCurrent.AMPERE,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        fields=frozenset({"max_current"}),
+        supported_fn=has_status_field("max_current"),
+        value_fn=lambda coordinator: coordinator.state.max_current,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="firmware_version",
+        unique_key="firmware_version",
+        name="Firmware version",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        fields=frozenset({"versions"}),
+        supported_fn=has_read("versions"),
+        value_fn=read_value("versions"),
+    ),
+    WallboxBLESensorEntityDescription(
+        key="power_boost",
+        unique_key="power_boost",
+        name="Power boost",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        fields=frozenset({"power_boost"}),
+        supported_fn=has_read("power_boost"),
+        value_fn=read_value("power_boost"),
+    ),
+    WallboxBLESensorEntityDescription(
+        key="eco_smart",
+        unique_key="eco_smart",
+        name="Eco smart",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        fields=frozenset({"eco_smart"}),
+        supported_fn=has_read("eco_smart"),
+        value_fn=read_value("eco_smart"),
+    ),
+    WallboxBLESensorEntityDescription(
+        key="grounding",
+        unique_key="grounding",
+        name="Grounding check",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        fields=frozenset({"grounding"}),
+        supported_fn=has_read("grounding"),
+        value_fn=read_value("grounding"),
+    ),
+    WallboxBLESensorEntityDescription(
+        key="poll_interval",
+        unique_key="poll_interval",
+        name="Poll interval",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.update_interval.total_seconds(),
+    ),
+    WallboxBLESensorEntityDescription(
+        key="cache_hits",
+        unique_key="cache_hits",
+        name="Cache hits",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.wb.cache.hits,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="cache_misses",
+        unique_key="cache_misses",
+        name="Cache misses",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.wb.cache.misses,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="connect_time",
+        unique_key="connect_time",
+        name="Connect time",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=2,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.wb.connect_time,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="status_round_trip_p50",
+        unique_key="status_round_trip_p50",
+        name="Status round trip p50",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.wb.stats.method(WallboxBLEApiConst.GET_STATUS).round_trip.percentile(0.5),
+    ),
+    WallboxBLESensorEntityDescription(
+        key="status_round_trip_p99",
+        unique_key="status_round_trip_p99",
+        name="Status round trip p99",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.wb.stats.method(WallboxBLEApiConst.GET_STATUS).round_trip.percentile(0.99),
+    ),
+    WallboxBLESensorEntityDescription(
+        key="request_timeouts",
+        unique_key="request_timeouts",
+        name="Request timeouts",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.wb.stats.timeouts,
+    ),
+    WallboxBLESensorEntityDescription(
+        key="poll_wait_p99",
+        unique_key="poll_wait_p99",
+        name="Poll wait p99",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.fleet.register(coordinator.address).wait.percentile(0.99),
+    ),
+    WallboxBLESensorEntityDescription(
+        key="fleet_fairness",
+        unique_key="fleet_fairness",
+        name="Fleet airtime fairness",
+        state_class=SensorStateClass.MEASUREMENT,
+        suggested_display_precision=2,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        always_available=True,
+        value_fn=lambda coordinator: coordinator.fleet.fairness,
+    ),
+)
+
+SWITCHES = (
+    WallboxBLESwitchEntityDescription(
+        key="wallbox_ble",
+        name="Charge",
+        method=WallboxBLEApiConst.START_STOP_CHARGING,
+        fields=frozenset({"status_code", "overlay"}),
+        is_on_fn=lambda coordinator: coordinator.optimistic("charging"),
+        available_fn=lambda coordinator: coordinator.status_code in (1, 4),
+    ),
+)
+
+LOCKS = (
+    WallboxBLELockEntityDescription(
+        key="wallbox_ble",
+        name="Lock",
+        method=WallboxBLEApiConst.LOCK,
+        fields=frozenset({"status_code", "journal", "overlay"}),
+    ),
+)
+
+NUMBERS = (
+    WallboxBLENumberEntityDescription(
+        key="wallbox_ble",
+        name="Charge current",
+        native_min_value=6,
+        device_class=NumberDeviceClass.CURRENT,
+        icon="mdi:flash",
+        method=WallboxBLEApiConst.SET_MAX_CHARGING_CURRENT,
+        fields=frozenset({"charge_current", "max_charge_current", "overlay"}),
+        value_fn=lambda coordinator: coordinator.charge_current,
+        max_fn=lambda coordinator: coordinator.max_charge_current,
+    ),
+)
+
+UPDATES = (
+    WallboxBLEUpdateEntityDescription(
+        key="firmware",
+        unique_key="firmware",
+        name="Firmware",
+        entity_category=EntityCategory.CONFIG,
+        fields=frozenset({"firmware", "versions"}),
+        supported_fn=lambda coordinator: coordinator.firmware.installed is not None,
+    ),
+)
@@ -0,0 +1,82 @@
+"""Adaptive poll interval for the Wallbox BLE coordinator."""
+from __future__ import annotations
+
+import time
+from datetime import timedelta
+
+# Status codes where values change continuously: charging, discharging
+ACTIVE_STATUS_CODES = (1, 11)
+
+# Status code of a charger installing a firmware update
+UPDATING_STATUS_CODE = 17
+
+FAST_INTERVAL = timedelta(seconds=2)
+ACTIVE_INTERVAL = timedelta(seconds=5)
+IDLE_MIN_INTERVAL = timedelta(seconds=10)
+IDLE_MAX_INTERVAL = timedelta(minutes=5)
+
+# How long to keep polling fast after a state change or a command
+FAST_WINDOW = 30
+
+# Safety net poll interval while a firmware update has the link
+UPDATING_INTERVAL = timedelta(minutes=5)
+
+# Safety net poll interval while the charger pushes its status
+PUSH_INTERVAL = timedelta(minutes=5)
+# Seconds after the last pushed status that pushes count as arriving
+PUSH_WINDOW = 120
+
+
+class WallboxBLEPollScheduler:
+    """Picks the next poll interval from the charger status.
+
+    Polls fast right after a status change or a command, at a steady rate while
+    charging and backs off exponentially while the charger sits idle. While the
+    charger pushes its status or installs an update only a slow safety net
+    poll is kept.
+    """
+
+    def __init__(self):
+        self.interval = IDLE_MIN_INTERVAL
+        self.status_code = None
+        self.idle_interval = IDLE_MIN_INTERVAL
+        self.fast_until = 0.0
+        self.pushed_at = None
+
+    def command_sent(self) -> timedelta:
+        self.fast_until = time.monotonic() + FAST_WINDOW
+        self.idle_interval = IDLE_MIN_INTERVAL
+        self.interval = FAST_INTERVAL
+        return self.interval
+
+    def update(self, status_code) -> timedelta:
+        """Record a successful poll, returns the interval until the next one."""
+        now = time.monotonic()
+        if status_code != self.status_code:
+            if self.status_code is not None:
+                self.fast_until = now + FAST_WINDOW
+            self.status_code = status_code
+            self.idle_interval = IDLE_MIN_INTERVAL
+
+        if status_code == UPDATING_STATUS_CODE:
+            self.interval = UPDATING_INTERVAL
+        elif now < self.fast_until:
+            self.interval = FAST_INTERVAL
+        elif self.pushed_at is not None and now - self.pushed_at < PUSH_WINDOW:
+            self.interval = PUSH_INTERVAL
+        elif status_code in ACTIVE_STATUS_CODES:
+            self.interval = ACTIVE_INTERVAL
+        else:
+            self.interval = self.idle_interval
+            self.idle_interval = min(self.idle_interval * 2, IDLE_MAX_INTERVAL)
+        return self.interval
+
+    def pushed(self, status_code) -> timedelta:
+        """Record a status pushed by the charger, returns the interval until the next poll."""
+        self.pushed_at = time.monotonic()
+        return self.update(status_code)
+
+    def failed(self) -> timedelta:
+        """Record a failed poll, retry at the idle base rate."""
+        self.interval = IDLE_MIN_INTERVAL
+        return self.interval
@@ -1,46 +1,24 @@
 from __future__ import annotations
 
-from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorEntityDescription
+from homeassistant.components.sensor import SensorEntity
 
-from .const import DOMAIN, LOGGER
-from .coordinator import WallboxBLEDataUpdateCoordinator
-from .entity import WallboxBLEEntity
-
-ENTITY_DESCRIPTIONS = (
-    SensorEntityDescription(
-        key="wallbox_ble",
-        name="Status",
-        # icon="mdi:flash",
-    ),
-)
+from .const import DOMAIN
+from .entity import WallboxBLEEntity, async_add_supported_entities
+from .registry import SENSORS, WallboxBLESensorEntityDescription
 
 
 async def async_setup_entry(hass, entry, async_add_devices):
     coordinator = hass.data[DOMAIN][entry.entry_id]
-    async_add_devices(
-        WallboxBLESensor(
-            coordinator=coordinator,
-            entity_description=entity_description,
-        )
-        for entity_description in ENTITY_DESCRIPTIONS
-    )
+    async_add_supported_entities(coordinator, SENSORS, WallboxBLESensor, async_add_devices)
 
 
 class WallboxBLESensor(WallboxBLEEntity, SensorEntity):
-    native_value = 6
-
-    def __init__(
-        self,
-        coordinator: WallboxBLEDataUpdateCoordinator,
-        entity_description: SensorEntityDescription,
-    ) -> None:
-        super().__init__(coordinator)
-        self.entity_description = entity_description
+    entity_description: WallboxBLESensorEntityDescription
 
     @property
     def available(self):
-        return self.coordinator.available
+        return self.entity_description.always_available or self.coordinator.available
 
     @property
-    def native_value(self) -> bool:
-        return self.coordinator.status
+    def native_value(self):
+        return self.entity_description.value_fn(self.coordinator)
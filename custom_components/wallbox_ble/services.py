@@ -0,0 +1,136 @@
+"""Services of Wallbox BLE."""
+from __future__ import annotations
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+import voluptuous as vol
+
+from .config import async_run_limited, profile_settings
+from .const import CONFIG_CONCURRENCY, DOMAIN, NOMINAL_VOLTAGE
+from .tariff import plan_charging, price_slots, schedule_payload
+
+SERVICE_READ_CONFIG = "read_config"
+SERVICE_APPLY_CONFIG = "apply_config"
+SERVICE_OPTIMIZE_SCHEDULE = "optimize_schedule"
+SERVICE_CAPTURE = "capture"
+
+ATTR_ADDRESS = "address"
+ATTR_PROFILE = "profile"
+ATTR_DRY_RUN = "dry_run"
+ATTR_PRICE_ENTITY = "price_entity"
+ATTR_ENERGY = "energy"
+ATTR_POWER = "power"
+ATTR_DEADLINE = "deadline"
+ATTR_DURATION = "duration"
+
+READ_CONFIG_SCHEMA = vol.Schema({vol.Optional(ATTR_ADDRESS): vol.All(cv.ensure_list, [cv.string])})
+APPLY_CONFIG_SCHEMA = READ_CONFIG_SCHEMA.extend(
+    {
+        vol.Required(ATTR_PROFILE): dict,
+        vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+    }
+)
+OPTIMIZE_SCHEDULE_SCHEMA = READ_CONFIG_SCHEMA.extend(
+    {
+        vol.Required(ATTR_PRICE_ENTITY): cv.entity_id,
+        vol.Required(ATTR_ENERGY): vol.All(vol.Coerce(float), vol.Range(min=0)),
+        vol.Optional(ATTR_POWER): vol.All(vol.Coerce(float), vol.Range(min=0.1)),
+        vol.Optional(ATTR_DEADLINE): cv.datetime,
+        vol.Optional(ATTR_DRY_RUN, default=False): cv.boolean,
+    }
+)
+CAPTURE_SCHEMA = READ_CONFIG_SCHEMA.extend(
+    {vol.Optional(ATTR_DURATION, default=60): vol.All(vol.Coerce(float), vol.Range(min=1, max=3600))}
+)
+
+
+def coordinators(hass: HomeAssistant, call: ServiceCall) -> dict:
+    """The coordinators of the chargers a call targets, every charger by default."""
+    loaded = {coordinator.address: coordinator for coordinator in hass.data.get(DOMAIN, {}).values()}
+    addresses = call.data.get(ATTR_ADDRESS)
+    if addresses is None:
+        return loaded
+    missing = [address for address in addresses if address not in loaded]
+    if missing:
+        raise ServiceValidationError(f"No Wallbox BLE charger with address {', '.join(missing)}")
+    return {address: loaded[address] for address in addresses}
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services once, they serve every charger."""
+    if hass.services.has_service(DOMAIN, SERVICE_READ_CONFIG):
+        return
+
+    async def read_config(call: ServiceCall) -> ServiceResponse:
+        jobs = {address: coordinator.async_configure for address, coordinator in coordinators(hass, call).items()}
+        return await async_run_limited(jobs, CONFIG_CONCURRENCY)
+
+    async def apply_config(call: ServiceCall) -> ServiceResponse:
+        profile = call.data[ATTR_PROFILE]
+        try:
+            profile_settings(profile)
+        except ValueError as err:
+            raise ServiceValidationError(str(err)) from err
+        dry_run = call.data[ATTR_DRY_RUN]
+        jobs = {
+            address: lambda coordinator=coordinator: coordinator.async_configure(profile, dry_run)
+            for address, coordinator in coordinators(hass, call).items()
+        }
+        return await async_run_limited(jobs, CONFIG_CONCURRENCY)
+
+    async def optimize_schedule(call: ServiceCall) -> ServiceResponse:
+        state = hass.states.get(call.data[ATTR_PRICE_ENTITY])
+        slots = price_slots(state.attributes) if state is not None else []
+        if not slots:
+            raise ServiceValidationError(f"{call.data[ATTR_PRICE_ENTITY]} has no price forecast")
+        deadline = call.data.get(ATTR_DEADLINE)
+        deadline = dt_util.as_timestamp(deadline) if deadline is not None else None
+        tz = dt_util.get_default_time_zone()
+        dry_run = call.data[ATTR_DRY_RUN]
+
+        async def optimize(coordinator):
+            current = coordinator.charge_current
+            # Without a power the charger is taken to charge on one phase
+            power = call.data.get(ATTR_POWER, current * NOMINAL_VOLTAGE / 1000)
+            plan = plan_charging(slots, call.data[ATTR_ENERGY], power, dt_util.utcnow().timestamp(), deadline)
+            result = plan.as_dict(tz)
+            result["written"] = False
+            if not dry_run:
+                result["written"] = await coordinator.async_write_schedule(
+                    schedule_payload(plan.windows, current, tz)
+                )
+            return result
+
+        jobs = {
+            address: lambda coordinator=coordinator: optimize(coordinator)
+            for address, coordinator in coordinators(hass, call).items()
+        }
+        return await async_run_limited(jobs, CONFIG_CONCURRENCY)
+
+    async def capture(call: ServiceCall) -> ServiceResponse:
+        duration = call.data[ATTR_DURATION]
+        jobs = {
+            address: lambda coordinator=coordinator: coordinator.async_capture(duration)
+            for address, coordinator in coordinators(hass, call).items()
+        }
+        # Captures only listen, so every charger records at once
+        return await async_run_limited(jobs, len(jobs) or 1)
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_READ_CONFIG, read_config, READ_CONFIG_SCHEMA, supports_response=SupportsResponse.ONLY
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_APPLY_CONFIG, apply_config, APPLY_CONFIG_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_OPTIMIZE_SCHEDULE,
+        optimize_schedule,
+        OPTIMIZE_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN, SERVICE_CAPTURE, capture, CAPTURE_SCHEMA, supports_response=SupportsResponse.OPTIONAL
+    )
@@ -0,0 +1,102 @@
+"""Session log download for Wallbox BLE."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from .const import LOGGER
+from .protocol import WallboxBLEApiConst
+
+# Session records fetched per page. Kept below the request window so a status
+# poll running at the same time still gets a slot.
+SESSION_PAGE_SIZE = 2
+
+# Seconds to batch cursor updates before writing them to storage
+SESSION_SAVE_DELAY = 10
+
+
+def session_count(info) -> int | None:
+    """Number of records in the session log from a GET_SESSIONS_INFO response."""
+    if isinstance(info, dict):
+        info = info.get("count", info.get("n"))
+    if isinstance(info, (int, float)) and not isinstance(info, bool):
+        return int(info)
+    return None
+
+
+class WallboxBLESessionLog:
+    """Incrementally mirrors the charger session log.
+
+    Records are fetched in pages of GET_SESSION reads starting at a cursor that
+    is persisted after every page, so an interrupted download resumes where it
+    stopped and later syncs only fetch new sessions.
+    """
+
+    def __init__(self, client, store, page_size=SESSION_PAGE_SIZE):
+        self.client = client
+        self.store = store
+        self.page_size = page_size
+        self.cursor = 0
+        self.count = None
+        self.records: list[dict] = []
+        self.listeners: list[Callable[[list[dict]], None]] = []
+        self.lock = asyncio.Lock()
+
+    async def async_load(self):
+        data = await self.store.async_load() or {}
+        self.cursor = data.get("cursor", 0)
+        self.records = data.get("records", [])
+
+    def as_dict(self) -> dict:
+        return {"cursor": self.cursor, "records": self.records}
+
+    def add_listener(self, listener: Callable[[list[dict]], None]):
+        """Call listener with every page of new records."""
+        self.listeners.append(listener)
+
+    async def async_sync(self) -> int:
+        """Fetch the records added since the last sync, returns how many were added."""
+        if self.lock.locked():
+            return 0
+        async with self.lock:
+            ok, info = await self.client.request(WallboxBLEApiConst.GET_SESSIONS_INFO)
+            count = session_count(info) if ok else None
+            if count is None:
+                return 0
+            self.count = count
+
+            if count < self.cursor:
+                LOGGER.debug("Session log shrank from %d to %d records, starting over", self.cursor, count)
+                self.cursor = 0
+                self.records = []
+
+            added = 0
+            while self.cursor < count:
+                indexes = range(self.cursor, min(self.cursor + self.page_size, count))
+                results = await asyncio.gather(
+                    *(self.client.request(WallboxBLEApiConst.GET_SESSION, index) for index in indexes)
+                )
+                # Only the leading successful reads count, so the cursor stays contiguous
+                page = []
+                fetched = 0
+                for ok, record in results:
+                    if not ok:
+                        break
+                    fetched += 1
+                    if isinstance(record, dict):
+                        page.append(record)
+
+                if fetched:
+                    self.cursor += fetched
+                    self.records.extend(page)
+                    added += len(page)
+                    self.store.async_delay_save(self.as_dict, SESSION_SAVE_DELAY)
+                    for listener in self.listeners:
+                        listener(page)
+                if fetched < len(indexes):
+                    LOGGER.debug("Session sync interrupted at record %d of %d", self.cursor, count)
+                    break
+
+            await self.store.async_save(self.as_dict())
+            LOGGER.debug("Synced %d new sessions, %d of %d", added, self.cursor, count)
+            return added
@@ -0,0 +1,108 @@
+"""Batched reads of charger state."""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from .api import WallboxBLEApiClient, WallboxBLEApiConst
+from .const import LOGGER
+
+# Seconds to wait before retrying an optional read that failed, doubled per failure
+READ_RETRY_MIN_DELAY = 60.0
+READ_RETRY_MAX_DELAY = 3600.0
+
+
+@dataclass(frozen=True)
+class WallboxBLESnapshotRead:
+    """A read method and the snapshot field its response goes to.
+
+    How fresh the value is kept is up to the client response cache, reads of
+    methods it caches are answered without using the radio until they expire
+    or a write invalidates them.
+    """
+
+    key: str
+    method: str
+    required: bool = False
+
+
+SNAPSHOT_READS = (
+    WallboxBLESnapshotRead("status", WallboxBLEApiConst.GET_STATUS, required=True),
+    WallboxBLESnapshotRead("max_available_current", WallboxBLEApiConst.GET_MAX_AVAILABLE_CURRENT),
+    WallboxBLESnapshotRead("versions", WallboxBLEApiConst.GET_CHARGER_VERSIONS),
+    WallboxBLESnapshotRead("power_boost", WallboxBLEApiConst.GET_POWER_BOOST),
+    WallboxBLESnapshotRead("eco_smart", WallboxBLEApiConst.GET_ECO_SMART_CONFIGURATION),
+    WallboxBLESnapshotRead("grounding", WallboxBLEApiConst.GET_GROUNDING_STATUS),
+)
+
+
+@dataclass
+class WallboxBLESnapshot:
+    """Last known response of every snapshot read, None until first read."""
+
+    status: dict | None = None
+    max_available_current: int | None = None
+    versions: dict | None = None
+    power_boost: Any = None
+    eco_smart: Any = None
+    grounding: Any = None
+
+
+class WallboxBLESnapshotReader:
+    """Issues the snapshot reads back to back over the current connection."""
+
+    def __init__(self, client: WallboxBLEApiClient, reads=SNAPSHOT_READS):
+        self.client = client
+        self.reads = reads
+        self.snapshot = WallboxBLESnapshot()
+        self.failures: dict[str, int] = {}
+        self.retry_at: dict[str, float] = {}
+        self.unsupported: set[str] = set()
+
+    def due(self, now: float) -> list[WallboxBLESnapshotRead]:
+        """Every read except unsupported ones and optional ones backing off after a failure."""
+        return [
+            read
+            for read in self.reads
+            if read.required or (read.key not in self.unsupported and now >= self.retry_at.get(read.key, 0.0))
+        ]
+
+    def restore(self, data: dict) -> WallboxBLESnapshot:
+        """Load a saved snapshot, unknown keys are ignored."""
+        names = {field.name for field in dataclasses.fields(WallboxBLESnapshot)}
+        self.snapshot = WallboxBLESnapshot(**{key: value for key, value in data.items() if key in names})
+        return self.snapshot
+
+    def push(self, key, value) -> WallboxBLESnapshot:
+        """Store a value the charger sent unasked, returns a copy of the snapshot."""
+        setattr(self.snapshot, key, value)
+        return dataclasses.replace(self.snapshot)
+
+    async def async_read(self) -> tuple[set[str], WallboxBLESnapshot]:
+        """Fetch every due read, returns the keys that were refreshed and a copy of the snapshot."""
+        now = time.monotonic()
+        due = self.due(now)
+        # The client pipelines these up to its request window
+        results = await asyncio.gather(*(self.client.request(read.method) for read in due))
+
+        refreshed = set()
+        for read, (ok, data) in zip(due, results):
+            if ok and data is None and not read.required:
+                # The charger answered without a value, a feature this model lacks
+                LOGGER.debug("Snapshot read %s is not supported", read.method)
+                self.unsupported.add(read.key)
+            elif ok:
+                setattr(self.snapshot, read.key, data)
+                refreshed.add(read.key)
+                self.failures.pop(read.key, None)
+                self.retry_at.pop(read.key, None)
+            elif not read.required and self.client.ready:
+                # The charger did not answer, possibly a method this model lacks
+                failures = self.failures[read.key] = self.failures.get(read.key, 0) + 1
+                delay = min(READ_RETRY_MIN_DELAY * 2 ** (failures - 1), READ_RETRY_MAX_DELAY)
+                self.retry_at[read.key] = now + delay
+                LOGGER.debug("Snapshot read %s failed, retrying in %.0fs", read.method, delay)
+        return refreshed, dataclasses.replace(self.snapshot)
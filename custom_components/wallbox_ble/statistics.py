@@ -0,0 +1,42 @@
+"""Long-term energy statistics for Wallbox BLE."""
+from __future__ import annotations
+
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics
+from homeassistant.const import UnitOfEnergy
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN, LOGGER, NAME
+from .energy import cumulative_energy
+
+
+def energy_statistic_id(address) -> str:
+    return f"{DOMAIN}:energy_{address.replace(':', '').lower()}"
+
+
+@callback
+def async_import_energy_statistics(hass: HomeAssistant, address, records, since=None):
+    """Import hourly energy from session records in one batch.
+
+    Hours before since are left as they are, importing an hour again
+    overwrites it, so gaps from BLE outages are filled in once the session
+    log has synced.
+    """
+    points = cumulative_energy(records, since)
+    if not points:
+        return
+    metadata = StatisticMetaData(
+        has_mean=False,
+        has_sum=True,
+        name=f"{NAME} energy",
+        source=DOMAIN,
+        statistic_id=energy_statistic_id(address),
+        unit_of_measurement=UnitOfEnergy.KILO_WATT_HOUR,
+    )
+    LOGGER.debug("Importing %d hours of energy statistics", len(points))
+    async_add_external_statistics(
+        hass,
+        metadata,
+        [StatisticData(start=dt_util.utc_from_timestamp(hour), state=total, sum=total) for hour, total in points],
+    )
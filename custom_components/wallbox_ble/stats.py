@@ -0,0 +1,112 @@
+"""Request timing statistics for the Wallbox BLE link."""
+from __future__ import annotations
+
+from bisect import bisect_left
+
+# Upper bucket edges in milliseconds, the last bucket holds everything slower
+BUCKET_EDGES_MS = (5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+# Number of most recent samples each histogram covers
+HISTOGRAM_WINDOW = 256
+
+
+class RollingHistogram:
+    """Bucketed histogram over the most recent samples.
+
+    Adding a sample is O(1): it lands in a bucket and the oldest sample in the
+    window is taken out of its bucket again.
+    """
+
+    __slots__ = ("counts", "ring", "position", "total", "last", "maximum")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_EDGES_MS) + 1)
+        self.ring: list[int] = []
+        self.position = 0
+        self.total = 0
+        self.last = None
+        self.maximum = 0.0
+
+    def add(self, seconds: float):
+        milliseconds = seconds * 1000
+        bucket = bisect_left(BUCKET_EDGES_MS, milliseconds)
+        if len(self.ring) < HISTOGRAM_WINDOW:
+            self.ring.append(bucket)
+        else:
+            self.counts[self.ring[self.position]] -= 1
+            self.ring[self.position] = bucket
+            self.position = (self.position + 1) % HISTOGRAM_WINDOW
+        self.counts[bucket] += 1
+        self.total += 1
+        self.last = milliseconds
+        self.maximum = max(self.maximum, milliseconds)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Upper edge in milliseconds of the bucket holding the given fraction of samples."""
+        samples = len(self.ring)
+        if not samples:
+            return None
+        seen = 0
+        for bucket, count in enumerate(self.counts):
+            seen += count
+            if seen >= fraction * samples:
+                return BUCKET_EDGES_MS[bucket] if bucket < len(BUCKET_EDGES_MS) else self.maximum
+        return self.maximum
+
+    def as_dict(self) -> dict:
+        return {
+            "samples": self.total,
+            "last_ms": self.last,
+            "max_ms": self.maximum,
+            "p50_ms": self.percentile(0.5),
+            "p99_ms": self.percentile(0.99),
+            "buckets": dict(zip([*map(str, BUCKET_EDGES_MS), "inf"], self.counts)),
+        }
+
+
+class WallboxBLEMethodStats:
+    """Timings and counters of one method code."""
+
+    __slots__ = ("write", "first_notification", "round_trip", "requests", "chunks", "retries", "timeouts", "failures")
+
+    def __init__(self):
+        self.write = RollingHistogram()
+        self.first_notification = RollingHistogram()
+        self.round_trip = RollingHistogram()
+        self.requests = 0
+        self.chunks = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "chunks": self.chunks,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+            "write": self.write.as_dict(),
+            "first_notification": self.first_notification.as_dict(),
+            "round_trip": self.round_trip.as_dict(),
+        }
+
+
+class WallboxBLELinkStats:
+    """Per method statistics of the requests sent over a link."""
+
+    def __init__(self):
+        self.methods: dict[str, WallboxBLEMethodStats] = {}
+
+    def method(self, method: str) -> WallboxBLEMethodStats:
+        stats = self.methods.get(method)
+        if stats is None:
+            stats = self.methods[method] = WallboxBLEMethodStats()
+        return stats
+
+    @property
+    def timeouts(self) -> int:
+        return sum(stats.timeouts for stats in self.methods.values())
+
+    def as_dict(self) -> dict:
+        return {method: stats.as_dict() for method, stats in self.methods.items()}
@@ -0,0 +1,112 @@
+"""Charger status model."""
+from __future__ import annotations
+
+import dataclasses
+from dataclasses import dataclass, field
+
+from .protocol import WallboxBLEApiConst
+
+# r_dat keys and the WallboxBLEStatus field they are decoded into
+STATUS_FIELDS = {
+    "st": "status_code",
+    "cur": "charge_current",
+    "mxI": "max_current",
+    "l": "lock",
+    "pw": "power",
+    "en": "energy",
+}
+
+# Status values a write sets, shown optimistically until a status confirms them
+OPTIMISTIC_VALUES = {
+    WallboxBLEApiConst.LOCK: ("locked", bool),
+    WallboxBLEApiConst.START_STOP_CHARGING: ("charging", bool),
+    WallboxBLEApiConst.SET_MAX_CHARGING_CURRENT: ("charge_current", int),
+}
+
+# Seconds an optimistic value is shown without being confirmed
+OPTIMISTIC_TTL = 60.0
+
+
+@dataclass(frozen=True, slots=True)
+class WallboxBLEStatus:
+    """A decoded GET_STATUS response.
+
+    Keys without a field of their own are kept in extra, so no part of the
+    response is lost.
+    """
+
+    status_code: int = 0
+    charge_current: int = 6
+    max_current: int | None = None
+    lock: int | None = None
+    power: float | None = None
+    energy: float | None = None
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> WallboxBLEStatus:
+        values = {}
+        extra = {}
+        for key, value in data.items():
+            name = STATUS_FIELDS.get(key)
+            if name is None:
+                extra[key] = value
+            else:
+                values[name] = value
+        return cls(**values, extra=extra)
+
+    @property
+    def status(self) -> str:
+        codes = WallboxBLEApiConst.STATUS_CODES
+        if isinstance(self.status_code, int) and 0 <= self.status_code < len(codes):
+            return codes[self.status_code]
+        # Newer firmware may report codes this integration does not know yet
+        return f"UNKNOWN_{self.status_code}"
+
+    @property
+    def locked(self) -> bool:
+        return self.status_code == 6
+
+    @property
+    def charging(self) -> bool:
+        return self.status_code == 1
+
+    def diff(self, other: WallboxBLEStatus) -> set[str]:
+        """Names of the fields that differ from other."""
+        return {name for name in _FIELD_NAMES if getattr(self, name) != getattr(other, name)}
+
+
+_FIELD_NAMES = tuple(status_field.name for status_field in dataclasses.fields(WallboxBLEStatus))
+
+
+class WallboxBLEOverlay:
+    """Written values the charger has not confirmed yet, on top of the published status.
+
+    The status itself is never modified, so a poll that was already running
+    when a value was written can not make it flicker back.
+    """
+
+    def __init__(self, ttl=OPTIMISTIC_TTL):
+        self.ttl = ttl
+        self.values: dict[str, tuple[object, float]] = {}
+
+    def set(self, name, value, now):
+        self.values[name] = (value, now + self.ttl)
+
+    def discard(self, name) -> bool:
+        return self.values.pop(name, None) is not None
+
+    def get(self, status: WallboxBLEStatus, name, now):
+        entry = self.values.get(name)
+        if entry is None or now >= entry[1]:
+            return getattr(status, name)
+        return entry[0]
+
+    def update(self, status: WallboxBLEStatus, now) -> bool:
+        """Drop the values status confirms and the expired ones, returns True if any were dropped."""
+        dropped = [
+            name for name, (value, expires) in self.values.items() if now >= expires or getattr(status, name) == value
+        ]
+        for name in dropped:
+            del self.values[name]
+        return bool(dropped)
@@ -0,0 +1,154 @@
+"""Charging schedules planned against tariff prices."""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, tzinfo
+import math
+
+HOUR = 3600
+
+# Attributes of a price forecast sensor that list price slots, as used by the
+# Nord Pool, ENTSO-e and Tibber style integrations
+PRICE_LIST_KEYS = ("raw_today", "raw_tomorrow", "prices", "forecast")
+SLOT_START_KEYS = ("start", "start_time", "startsAt", "time")
+SLOT_PRICE_KEYS = ("value", "price", "total")
+
+# Windows written to the charger schedule, more are merged over the shortest gaps
+SCHEDULE_WINDOWS = 4
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+
+def _timestamp(value) -> float | None:
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str):
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return None
+    return None
+
+
+def _first(entry: dict, keys):
+    for key in keys:
+        if entry.get(key) is not None:
+            return entry[key]
+    return None
+
+
+def price_slots(attributes: dict) -> list[tuple[float, float, float]]:
+    """(start, end, price) of every slot in the attributes of a price sensor.
+
+    Slots without an end last until the next slot, the last one an hour.
+    """
+    slots = {}
+    for key in PRICE_LIST_KEYS:
+        for entry in attributes.get(key) or ():
+            if not isinstance(entry, dict):
+                continue
+            start = _timestamp(_first(entry, SLOT_START_KEYS))
+            price = _first(entry, SLOT_PRICE_KEYS)
+            if start is None or not isinstance(price, (int, float)):
+                continue
+            slots[start] = (_timestamp(entry.get("end")), float(price))
+
+    starts = sorted(slots)
+    result = []
+    for index, start in enumerate(starts):
+        end, price = slots[start]
+        if end is None:
+            end = starts[index + 1] if index + 1 < len(starts) else start + HOUR
+        result.append((start, end, price))
+    return result
+
+
+def merge_windows(windows: list[tuple[float, float]], limit: int) -> list[tuple[float, float]]:
+    """Join touching windows, then the ones with the shortest gaps until at most limit are left."""
+    merged = []
+    for start, end in sorted(windows):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    while len(merged) > limit:
+        index = min(range(len(merged) - 1), key=lambda index: merged[index + 1][0] - merged[index][1])
+        merged[index : index + 2] = [(merged[index][0], merged[index + 1][1])]
+    return merged
+
+
+@dataclass
+class WallboxBLEChargePlan:
+    """Windows to charge in, with the energy they deliver and what it costs."""
+
+    windows: list[tuple[float, float]] = field(default_factory=list)
+    energy: float = 0.0
+    cost: float = 0.0
+
+    def as_dict(self, tz: tzinfo) -> dict:
+        return {
+            "windows": [
+                {"start": datetime.fromtimestamp(start, tz).isoformat(), "end": datetime.fromtimestamp(end, tz).isoformat()}
+                for start, end in self.windows
+            ],
+            "energy": round(self.energy, 3),
+            "cost": round(self.cost, 4),
+        }
+
+
+def plan_charging(slots, energy, power, now, deadline=None, limit=SCHEDULE_WINDOWS) -> WallboxBLEChargePlan:
+    """Cheapest windows before deadline to charge energy kWh at power kW.
+
+    Slots are taken cheapest first, the last one only for as many whole
+    minutes as are still needed. When the forecast does not reach far enough
+    the plan delivers less than energy.
+    """
+    needed = math.ceil(energy / power * HOUR / 60) * 60 if power > 0 else 0
+    usable = []
+    for start, end, price in slots:
+        start = max(start, math.floor(now / 60) * 60)
+        if deadline is not None:
+            end = min(end, deadline)
+        if end > start:
+            usable.append((start, end, price))
+
+    plan = WallboxBLEChargePlan()
+    chosen = []
+    for start, end, price in sorted(usable, key=lambda slot: (slot[2], slot[0])):
+        if needed <= 0:
+            break
+        end = min(end, start + needed)
+        needed -= end - start
+        chosen.append((start, end))
+        plan.energy += power * (end - start) / HOUR
+        plan.cost += price * power * (end - start) / HOUR
+    plan.windows = merge_windows(chosen, limit)
+    return plan
+
+
+def schedule_payload(windows, current, tz: tzinfo) -> dict:
+    """SET_SCHEDULE parameter charging in windows at current amps.
+
+    Charger schedules repeat weekly by day and time of day, so windows are
+    split at midnight and each part is enabled on its weekday only.
+    """
+    schedules = []
+    for start, end in windows:
+        begin = datetime.fromtimestamp(start, tz)
+        finish = datetime.fromtimestamp(end, tz)
+        while begin < finish:
+            midnight = (begin + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+            stop = min(finish, midnight)
+            schedules.append(
+                {
+                    "id": len(schedules),
+                    "enable": 1,
+                    "max_current": current,
+                    "max_energy": 0,
+                    "days": {day: index == begin.weekday() for index, day in enumerate(WEEKDAYS)},
+                    "start": begin.strftime("%H%M"),
+                    "stop": "2359" if stop == midnight else stop.strftime("%H%M"),
+                }
+            )
+            begin = stop
+    return {"schedules": schedules}
@@ -0,0 +1,43 @@
+from __future__ import annotations
+
+from homeassistant.components.update import UpdateEntity, UpdateEntityFeature
+from homeassistant.exceptions import HomeAssistantError
+
+from .const import DOMAIN
+from .entity import WallboxBLEEntity, async_add_supported_entities
+from .registry import UPDATES, WallboxBLEUpdateEntityDescription
+
+
+async def async_setup_entry(hass, entry, async_add_devices):
+    coordinator = hass.data[DOMAIN][entry.entry_id]
+    async_add_supported_entities(coordinator, UPDATES, WallboxBLEUpdate, async_add_devices)
+
+
+class WallboxBLEUpdate(WallboxBLEEntity, UpdateEntity):
+    entity_description: WallboxBLEUpdateEntityDescription
+
+    _attr_supported_features = UpdateEntityFeature.INSTALL | UpdateEntityFeature.PROGRESS
+
+    @property
+    def available(self):
+        return self.coordinator.available or self.coordinator.firmware.in_progress
+
+    @property
+    def installed_version(self) -> str | None:
+        return self.coordinator.firmware.installed
+
+    @property
+    def latest_version(self) -> str | None:
+        return self.coordinator.firmware.latest
+
+    @property
+    def in_progress(self) -> bool:
+        return self.coordinator.firmware.in_progress
+
+    @property
+    def update_percentage(self) -> int | None:
+        return self.coordinator.firmware.progress
+
+    async def async_install(self, version, backup, **_: any) -> None:
+        if not await self.coordinator.async_install_firmware():
+            raise HomeAssistantError("The charger did not start the update")
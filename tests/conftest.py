@@ -0,0 +1,16 @@
+"""Test configuration for wallbox_ble."""
+import sys
+import types
+from pathlib import Path
+
+try:
+    import homeassistant  # noqa: F401
+except ImportError:
+    # Without Home Assistant the package __init__ can not be imported, register the
+    # package without running it so the modules that do not need it can be tested.
+    root = Path(__file__).parent.parent / "custom_components"
+    for name, path in (("custom_components", root), ("custom_components.wallbox_ble", root / "wallbox_ble")):
+        if name not in sys.modules:
+            module = types.ModuleType(name)
+            module.__path__ = [str(path)]
+            sys.modules[name] = module
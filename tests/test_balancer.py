@@ -0,0 +1,109 @@
+"""Tests for the site load balancer."""
+import asyncio
+
+from custom_components.wallbox_ble.balancer import WallboxBLESiteBalancer, allocate
+
+
+def test_allocate_splits_evenly_up_to_maximums():
+    assert allocate(40, {"a": 32, "b": 32}) == {"a": 20, "b": 20}
+    assert allocate(40, {"a": 10, "b": 32}) == {"a": 10, "b": 30}
+    assert allocate(100, {"a": 16, "b": 16}) == {"a": 16, "b": 16}
+
+
+def test_allocate_pauses_chargers_that_do_not_fit():
+    assert allocate(13, {"a": 32, "b": 32, "c": 32}) == {"a": 6, "b": 7, "c": 0}
+    assert allocate(5, {"a": 32}) == {"a": 0}
+
+
+class Charger:
+    def __init__(self):
+        self.writes = []
+
+    async def write(self, current):
+        self.writes.append(current)
+        return True
+
+
+def site(limit=32):
+    balancer = WallboxBLESiteBalancer(limit, margin=0)
+    chargers = {address: Charger() for address in "ab"}
+    for address, charger in chargers.items():
+        balancer.add(address, charger.write)
+    return balancer, chargers
+
+
+def test_decreases_are_written_and_unchanged_setpoints_are_not():
+    async def run():
+        balancer, chargers = site()
+        balancer.update_charger("a", 1, 16, 32)
+        balancer.update_charger("b", 1, 16, 32)
+        balancer.cancel()
+        balancer.site_current = 32
+        await balancer.async_rebalance()
+        assert chargers["a"].writes == chargers["b"].writes == []
+
+        # Other load came on, the chargers have to make room at once
+        balancer.site_current = 40
+        await balancer.async_rebalance()
+        assert chargers["a"].writes == [12]
+        assert chargers["b"].writes == [12]
+
+    asyncio.run(run())
+
+
+def test_increases_respect_deadband_and_rate_limit():
+    async def run():
+        balancer, chargers = site()
+        balancer.deadband = 2
+        balancer.update_charger("a", 1, 10, 32)
+        balancer.cancel()
+        # Only one amp more is available, within the deadband
+        balancer.site_current = 31
+        await balancer.async_rebalance()
+        assert chargers["a"].writes == []
+
+        balancer.site_current = 20
+        await balancer.async_rebalance()
+        assert chargers["a"].writes == [22]
+
+        # Another increase right after is held back by the rate limit
+        balancer.site_current = 22
+        await balancer.async_rebalance()
+        assert chargers["a"].writes == [22]
+
+    asyncio.run(run())
+
+
+def test_pause_and_resume():
+    async def run():
+        balancer, chargers = site(limit=20)
+        balancer.update_charger("a", 1, 10, 32)
+        balancer.update_charger("b", 1, 10, 32)
+        balancer.cancel()
+        balancer.site_current = 30
+        await balancer.async_rebalance()
+        assert chargers["a"].writes == []
+        assert chargers["b"].writes == [0]
+
+        balancer.update_charger("b", 4, 10, 32)
+        balancer.cancel()
+        balancer.site_current = 12
+        await balancer.async_rebalance()
+        assert chargers["a"].writes == [9]
+        assert chargers["b"].writes == [0, 9]
+
+    asyncio.run(run())
+
+
+def test_over_limit_rebalances_without_waiting():
+    async def run():
+        balancer, chargers = site()
+        balancer.reaction_time = 60
+        balancer.update_charger("a", 1, 16, 32)
+        balancer.update_site(40)
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert chargers["a"].writes == [8]
+        balancer.cancel()
+
+    asyncio.run(run())
@@ -0,0 +1,50 @@
+"""Tests for the response cache."""
+from datetime import timedelta
+
+from custom_components.wallbox_ble.cache import FOREVER, WallboxBLEResponseCache
+
+TTLS = {"r_sn_": FOREVER, "g_ecos": timedelta(minutes=15)}
+INVALIDATES = {"s_ecos": ("g_ecos",)}
+
+
+def test_hit_and_miss_counters():
+    cache = WallboxBLEResponseCache(TTLS, INVALIDATES)
+    assert cache.get("g_ecos") == (False, None)
+    cache.put("g_ecos", {"enabled": 1})
+    assert cache.get("g_ecos") == (True, {"enabled": 1})
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_only_parameterless_reads_with_a_ttl_are_cacheable():
+    cache = WallboxBLEResponseCache(TTLS, INVALIDATES)
+    assert cache.cacheable("g_ecos", None)
+    assert not cache.cacheable("g_ecos", 1)
+    assert not cache.cacheable("r_dat", None)
+
+
+def test_expired_entry_is_a_miss(monkeypatch):
+    cache = WallboxBLEResponseCache(TTLS, INVALIDATES)
+    monkeypatch.setattr("time.time", lambda: 1000.0)
+    cache.put("g_ecos", 1)
+    cache.put("r_sn_", "123")
+    monkeypatch.setattr("time.time", lambda: 1000.0 + 16 * 60)
+    assert cache.get("g_ecos") == (False, None)
+    assert cache.get("r_sn_") == (True, "123")
+
+
+def test_write_invalidates_stale_entries():
+    cache = WallboxBLEResponseCache(TTLS, INVALIDATES)
+    cache.put("g_ecos", 1)
+    cache.put("r_sn_", "123")
+    cache.written("s_ecos")
+    assert cache.get("g_ecos") == (False, None)
+    assert cache.get("r_sn_") == (True, "123")
+
+
+def test_persist_and_restore():
+    cache = WallboxBLEResponseCache(TTLS, INVALIDATES)
+    cache.put("r_sn_", "123")
+    restored = WallboxBLEResponseCache(TTLS, INVALIDATES)
+    restored.restore({**cache.as_dict(), "unknown": [0.0, 1]})
+    assert restored.get("r_sn_") == (True, "123")
+    assert "unknown" not in restored.entries
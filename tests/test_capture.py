@@ -0,0 +1,46 @@
+"""Tests for traffic captures and their replay."""
+import asyncio
+
+import pytest
+
+from custom_components.wallbox_ble.capture import RX, TX, WallboxBLECapture, async_replay
+from custom_components.wallbox_ble.protocol import WallboxBLEFrameDecoder, WallboxBLEFrameEncoder, split_writes
+
+
+def test_capture_round_trips_through_text():
+    capture = WallboxBLECapture("AA:BB:CC:DD:EE:FF")
+    capture.record(TX, b"EaE\x01")
+    capture.record(RX, bytearray(b"\x00\xff"))
+    loaded = WallboxBLECapture.loads(capture.dumps())
+    assert loaded.address == "AA:BB:CC:DD:EE:FF"
+    assert [(direction, data) for _, direction, data in loaded.records] == [(TX, b"EaE\x01"), (RX, b"\x00\xff")]
+    assert loaded.chunks(RX) == [b"\x00\xff"]
+
+
+def test_capture_refuses_other_files():
+    with pytest.raises(ValueError):
+        WallboxBLECapture.loads('{"format": "pcap"}\n')
+    with pytest.raises(ValueError):
+        WallboxBLECapture.loads('{"format": "wallbox-ble-capture", "version": 99}\n')
+
+
+def test_capture_limit_counts_dropped_records():
+    capture = WallboxBLECapture(limit=2)
+    for _ in range(5):
+        capture.record(RX, b"x")
+    assert len(capture.records) == 2
+    assert capture.dropped == 3
+
+
+def test_replay_feeds_records_in_order():
+    frame = WallboxBLEFrameEncoder().encode("r_dat", None, 7)
+    capture = WallboxBLECapture()
+    for chunk in split_writes(frame, 5):
+        capture.record(RX, chunk)
+    capture.records = [(index * 10.0, direction, data) for index, (_, direction, data) in enumerate(capture.records)]
+
+    decoder = WallboxBLEFrameDecoder()
+    messages = []
+    # At speed 0 the recorded gaps of ten seconds are not waited for
+    asyncio.run(async_replay(capture, lambda at, direction, data: messages.extend(decoder.feed(data)), speed=0))
+    assert messages == [{"met": "r_dat", "par": None, "id": 7}]
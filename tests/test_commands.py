@@ -0,0 +1,147 @@
+"""Tests for the write command queue."""
+import asyncio
+
+from custom_components.wallbox_ble.commands import (
+    OUTCOME_EXPIRED,
+    OUTCOME_SENT,
+    WallboxBLECommandJournal,
+    WallboxBLECommandQueue,
+)
+from custom_components.wallbox_ble.protocol import WallboxBLEApiConst
+
+SET_CURRENT = WallboxBLEApiConst.SET_MAX_CHARGING_CURRENT
+LOCK = WallboxBLEApiConst.LOCK
+START_STOP = WallboxBLEApiConst.START_STOP_CHARGING
+
+
+class Charger:
+    def __init__(self):
+        self.sent = []
+        self.idle = 0
+
+    async def send(self, method, parameter):
+        self.sent.append((method, parameter))
+        await asyncio.sleep(0)
+        return True
+
+    def on_idle(self):
+        self.idle += 1
+
+
+async def submit_all(queue, commands):
+    tasks = [asyncio.create_task(queue.submit(method, parameter)) for method, parameter in commands]
+    return await asyncio.gather(*tasks)
+
+
+def test_superseded_setpoints_are_merged():
+    async def run():
+        charger = Charger()
+        queue = WallboxBLECommandQueue(charger.send, charger.on_idle)
+        results = await submit_all(queue, [(SET_CURRENT, current) for current in range(6, 17)])
+        assert results == [True] * 11
+        assert charger.sent == [(SET_CURRENT, 16)]
+        assert queue.merged == 10
+        assert charger.idle == 1
+
+    asyncio.run(run())
+
+
+def test_ordered_commands_keep_their_order():
+    async def run():
+        charger = Charger()
+        queue = WallboxBLECommandQueue(charger.send, charger.on_idle)
+        await submit_all(queue, [(SET_CURRENT, 10), (LOCK, 0), (START_STOP, 1), (LOCK, 1), (SET_CURRENT, 12)])
+        # The setpoint may move ahead, the lock and start commands may not
+        assert charger.sent == [(SET_CURRENT, 12), (LOCK, 0), (START_STOP, 1), (LOCK, 1)]
+
+        charger.sent = []
+        await submit_all(queue, [(SET_CURRENT, 10), (LOCK, 0), (LOCK, 1), (START_STOP, 1)])
+        assert charger.sent == [(SET_CURRENT, 10), (LOCK, 1), (START_STOP, 1)]
+
+    asyncio.run(run())
+
+
+def test_failures_reach_every_waiter():
+    async def run():
+        async def send(method, parameter):
+            await asyncio.sleep(0)
+            return False
+
+        queue = WallboxBLECommandQueue(send)
+        assert await submit_all(queue, [(SET_CURRENT, 6), (SET_CURRENT, 7), (SET_CURRENT, 8)]) == [False] * 3
+
+    asyncio.run(run())
+
+
+def test_command_in_flight_is_not_replaced():
+    async def run():
+        charger = Charger()
+        queue = WallboxBLECommandQueue(charger.send, charger.on_idle)
+        first = asyncio.create_task(queue.submit(SET_CURRENT, 6))
+        await asyncio.sleep(0)
+        await asyncio.gather(first, queue.submit(SET_CURRENT, 7))
+        assert charger.sent == [(SET_CURRENT, 6), (SET_CURRENT, 7)]
+
+    asyncio.run(run())
+
+
+class MemoryStore:
+    def __init__(self, data=None):
+        self.data = data
+
+    async def async_load(self):
+        return self.data
+
+    def async_delay_save(self, data_func, delay=0):
+        self.data = data_func()
+
+
+def test_journal_merges_and_replays_in_order():
+    async def run():
+        charger = Charger()
+        journal = WallboxBLECommandJournal(MemoryStore())
+        waiters = [
+            journal.add(LOCK, 0, 0.0),
+            journal.add(SET_CURRENT, 10, 0.0),
+            journal.add(START_STOP, 1, 0.0),
+            journal.add(SET_CURRENT, 12, 0.0),
+        ]
+        outcomes = await journal.async_replay(charger.send, lambda: True, 1.0)
+        assert charger.sent == [(LOCK, 0), (SET_CURRENT, 12), (START_STOP, 1)]
+        assert [outcome for _, outcome in outcomes] == [OUTCOME_SENT] * 3
+        assert [waiter.result() for waiter in waiters] == [True] * 4
+        assert journal.store.data == []
+
+    asyncio.run(run())
+
+
+def test_journal_survives_restart_and_drops_expired():
+    async def run():
+        store = MemoryStore()
+        journal = WallboxBLECommandJournal(store)
+        journal.add(START_STOP, 1, 0.0)
+        journal.add(LOCK, 1, 0.0)
+        restarted = WallboxBLECommandJournal(store)
+        await restarted.async_load(60.0)
+        assert [command.method for command in restarted.commands] == [START_STOP, LOCK]
+
+        charger = Charger()
+        outcomes = await restarted.async_replay(charger.send, lambda: True, 20 * 60.0)
+        assert [outcome for _, outcome in outcomes] == [OUTCOME_EXPIRED, OUTCOME_SENT]
+        assert charger.sent == [(LOCK, 1)]
+
+    asyncio.run(run())
+
+
+def test_journal_keeps_commands_when_the_link_drops_again():
+    async def run():
+        async def send(method, parameter):
+            return False
+
+        journal = WallboxBLECommandJournal(MemoryStore())
+        journal.add(LOCK, 1, 0.0)
+        journal.add(START_STOP, 1, 0.0)
+        assert await journal.async_replay(send, lambda: False, 1.0) == []
+        assert [command.method for command in journal.commands] == [LOCK, START_STOP]
+
+    asyncio.run(run())
@@ -0,0 +1,109 @@
+"""Tests for configuration profiles."""
+import asyncio
+
+import pytest
+
+from custom_components.wallbox_ble.config import (
+    CONFIG_VERSION,
+    async_apply_config,
+    async_read_config,
+    async_run_limited,
+    diff_config,
+)
+from custom_components.wallbox_ble.protocol import WallboxBLEApiConst
+
+
+class FakeClient:
+    def __init__(self, settings, failing=()):
+        self.settings = settings
+        self.failing = failing
+        self.writes = []
+
+    async def request(self, method, parameter=None):
+        if parameter is None:
+            return method in self.settings, self.settings.get(method)
+        self.writes.append((method, parameter))
+        return method not in self.failing, None
+
+
+def charger():
+    return FakeClient(
+        {
+            WallboxBLEApiConst.GET_AUTOLOCK: {"enabled": 0, "timeout": 60},
+            WallboxBLEApiConst.GET_TIMEZONE: "Europe/Stockholm",
+            WallboxBLEApiConst.GET_ECO_SMART_CONFIGURATION: {"enabled": 1, "mode": 0},
+        }
+    )
+
+
+def test_read_config_leaves_out_unsupported_settings():
+    document = asyncio.run(async_read_config(charger()))
+    assert document == {
+        "version": CONFIG_VERSION,
+        "settings": {
+            "autolock": {"enabled": 0, "timeout": 60},
+            "timezone": "Europe/Stockholm",
+            "eco_smart": {"enabled": 1, "mode": 0},
+        },
+    }
+
+
+def test_diff_only_reports_fields_that_differ():
+    current = {"version": 1, "settings": {"autolock": {"enabled": 0, "timeout": 60}, "timezone": "UTC"}}
+    assert diff_config(current, {"autolock": {"enabled": 1}, "timezone": "UTC"}) == {
+        "autolock": {"enabled": 1, "timeout": 60}
+    }
+    assert diff_config(current, {"settings": {"autolock": {"timeout": 60}}}) == {}
+    # Settings the charger does not have are skipped
+    assert diff_config(current, {"halo": {"brightness": 50}}) == {}
+
+
+def test_diff_refuses_unknown_profiles():
+    current = {"version": 1, "settings": {}}
+    with pytest.raises(ValueError):
+        diff_config(current, {"wifi": {}})
+    with pytest.raises(ValueError):
+        diff_config(current, {"version": CONFIG_VERSION + 1, "settings": {}})
+
+
+def test_apply_writes_only_changes():
+    client = charger()
+    client.failing = (WallboxBLEApiConst.SET_TIMEZONE,)
+    result = asyncio.run(
+        async_apply_config(client, {"autolock": {"enabled": 1}, "timezone": "UTC", "eco_smart": {"enabled": 1}})
+    )
+    assert client.writes == [
+        (WallboxBLEApiConst.SET_AUTOLOCK, {"enabled": 1, "timeout": 60}),
+        (WallboxBLEApiConst.SET_TIMEZONE, "UTC"),
+    ]
+    assert result == {"changes": {"autolock": {"enabled": 1, "timeout": 60}, "timezone": "UTC"}, "failed": ["timezone"]}
+
+
+def test_apply_dry_run_writes_nothing():
+    client = charger()
+    result = asyncio.run(async_apply_config(client, {"timezone": "UTC"}, dry_run=True))
+    assert result == {"changes": {"timezone": "UTC"}, "failed": []}
+    assert client.writes == []
+
+
+def test_run_limited_caps_concurrency_and_reports_errors():
+    running = 0
+    peak = 0
+
+    async def job():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return {"ok": True}
+
+    async def broken():
+        raise asyncio.TimeoutError
+
+    jobs = {f"charger{index}": job for index in range(10)}
+    jobs["broken"] = broken
+    results = asyncio.run(async_run_limited(jobs, 3))
+    assert peak == 3
+    assert results["charger0"] == {"ok": True}
+    assert results["broken"] == {"error": "TimeoutError"}
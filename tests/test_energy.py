@@ -0,0 +1,46 @@
+"""Tests for the energy meter and statistics backfill."""
+import pytest
+
+from custom_components.wallbox_ble.energy import WallboxBLEEnergyMeter, cumulative_energy, hourly_energy
+
+HOUR = 3600
+DAY = 1_700_000_000 - 1_700_000_000 % HOUR
+
+
+def test_sessions_are_spread_over_the_hours_they_ran():
+    records = [{"st": DAY + HOUR // 2, "en": 3.0, "d": 3 * HOUR}]
+    assert hourly_energy(records) == pytest.approx({DAY: 0.5, DAY + HOUR: 1.0, DAY + 2 * HOUR: 1.0, DAY + 3 * HOUR: 0.5})
+
+
+def test_cumulative_energy_since():
+    records = [{"st": DAY, "en": 2.0, "d": 0}, {"st": DAY + 5 * HOUR, "en": 1.0, "d": 0}, {"en": 9.0}]
+    assert cumulative_energy(records) == [(DAY, 2.0), (DAY + 5 * HOUR, 3.0)]
+    assert cumulative_energy(records, since=DAY + HOUR) == [(DAY + 5 * HOUR, 3.0)]
+
+
+def test_total_never_drops_between_session_end_and_its_record():
+    meter = WallboxBLEEnergyMeter()
+    meter.add_sessions([{"en": 10.0}])
+    meter.update(1, 2.0, None, 0.0)
+    assert meter.total == 12.0
+    meter.update(0, 2.0, None, 10.0)
+    assert meter.total == 12.0
+    assert meter.power == 0.0
+    meter.add_sessions([{"en": 2.0}])
+    assert meter.total == 12.0
+
+
+def test_new_session_keeps_the_previous_one():
+    meter = WallboxBLEEnergyMeter()
+    meter.update(1, 5.0, None, 0.0)
+    meter.update(1, 0.5, None, 60.0)
+    assert meter.total == 5.5
+
+
+def test_power_is_derived_from_energy_when_not_reported():
+    meter = WallboxBLEEnergyMeter()
+    meter.update(1, 1.0, None, 0.0)
+    meter.update(1, 1.1, None, 36.0)
+    assert meter.power == pytest.approx(10_000)
+    meter.update(1, 1.2, 7400, 72.0)
+    assert meter.power == 7400
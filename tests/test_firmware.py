@@ -0,0 +1,92 @@
+"""Tests for firmware updates."""
+import asyncio
+
+from custom_components.wallbox_ble import firmware
+from custom_components.wallbox_ble.firmware import (
+    PROGRESS_MAX_INTERVAL,
+    PROGRESS_MIN_INTERVAL,
+    WallboxBLEFirmwareUpdater,
+    next_progress_interval,
+    parse_progress,
+    parse_version,
+)
+from custom_components.wallbox_ble.protocol import WallboxBLEApiConst
+
+
+class FakeClient:
+    def __init__(self, progress=(), responses=None):
+        self.progress = list(progress)
+        self.responses = responses or {}
+        self.ready = True
+        self.requested = []
+
+    async def request(self, method, parameter=None):
+        self.requested.append(method)
+        if method == WallboxBLEApiConst.UPDATE_SOFTWARE_PROGRESS:
+            progress = self.progress.pop(0)
+            if progress is None:
+                self.ready = False
+                return False, None
+            return True, {"progress": progress}
+        return method in self.responses, self.responses.get(method)
+
+
+def test_parse_version_and_progress():
+    assert parse_version({"fw": "6.2.1", "hw": "2"}) == "6.2.1"
+    assert parse_version("6.2.1") == "6.2.1"
+    assert parse_version({}) is None
+    assert parse_progress({"progress": 42}) == 42
+    assert parse_progress(120) == 100
+    assert parse_progress(True) is None
+    assert parse_progress({"state": "idle"}) is None
+
+
+def test_progress_interval_follows_the_rate():
+    # 5% took 10s, so aim for the next 5% in 10s
+    assert next_progress_interval(2.0, 5, 10.0) == 10.0
+    # Fast progress never polls faster than the minimum
+    assert next_progress_interval(2.0, 50, 1.0) == PROGRESS_MIN_INTERVAL
+    # Stalled progress backs off up to the maximum
+    assert next_progress_interval(20.0, 0, 40.0) == PROGRESS_MAX_INTERVAL
+
+
+def test_check_reads_installed_and_latest():
+    client = FakeClient(
+        responses={
+            WallboxBLEApiConst.GET_CHARGER_VERSIONS: {"fw": "6.1.0"},
+            WallboxBLEApiConst.SOFTWARE_CHECK: {"version": "6.2.0"},
+        }
+    )
+    updater = WallboxBLEFirmwareUpdater(client)
+    asyncio.run(updater.async_check())
+    assert (updater.installed, updater.latest) == ("6.1.0", "6.2.0")
+
+    client.responses[WallboxBLEApiConst.SOFTWARE_CHECK] = {}
+    asyncio.run(updater.async_check())
+    assert updater.latest == "6.1.0"
+
+
+def test_watch_reports_progress_until_restart(monkeypatch):
+    sleeps = []
+
+    async def sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(firmware.asyncio, "sleep", sleep)
+    client = FakeClient(progress=[10, 10, 40, None], responses={WallboxBLEApiConst.UPDATE_SOFTWARE: None})
+    seen = []
+    finished = []
+    updater = WallboxBLEFirmwareUpdater(client, lambda: seen.append(updater.progress), lambda: finished.append(True))
+
+    async def run():
+        assert await updater.async_install()
+        assert updater.in_progress
+        await updater.task
+
+    asyncio.run(run())
+    assert seen == [10, 40]
+    assert finished == [True]
+    assert not updater.in_progress and updater.progress is None
+    assert client.requested.count(WallboxBLEApiConst.UPDATE_SOFTWARE_PROGRESS) == 4
+    # Stalled at 10% the second poll backed off
+    assert sleeps[2] > sleeps[1]
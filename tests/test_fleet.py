@@ -0,0 +1,88 @@
+"""Tests for the fleet connection broker."""
+import asyncio
+
+from custom_components.wallbox_ble.fleet import PRIORITY_ACTIVE, WallboxBLEFleetBroker
+
+
+def test_connection_cap_per_adapter():
+    async def run():
+        broker = WallboxBLEFleetBroker(connections_per_adapter=2)
+        await broker.acquire_connection("a", "hci0")
+        await broker.acquire_connection("b", "hci0")
+        await broker.acquire_connection("c", "hci1")
+        waiting = asyncio.create_task(broker.acquire_connection("d", "hci0"))
+        await asyncio.sleep(0)
+        assert not waiting.done()
+        broker.release_connection("a")
+        await asyncio.wait_for(waiting, 1)
+        assert set(broker.connections["hci0"].holders) == {"b", "d"}
+
+    asyncio.run(run())
+
+
+def test_holder_yields_after_its_turn():
+    async def run():
+        broker = WallboxBLEFleetBroker(connections_per_adapter=1)
+        broker.turn_time = 0
+        yielded = asyncio.Event()
+        await broker.acquire_connection("a", "hci0", yielded.set)
+        waiting = asyncio.create_task(broker.acquire_connection("b", "hci0"))
+        await asyncio.sleep(0)
+        broker.rotate("hci0")
+        assert yielded.is_set()
+        broker.release_connection("a")
+        await asyncio.wait_for(waiting, 1)
+
+    asyncio.run(run())
+
+
+def test_polls_go_by_priority_then_round_robin():
+    async def run():
+        broker = WallboxBLEFleetBroker(polls_per_adapter=1)
+        order = []
+
+        async def poll(address):
+            async with broker.poll(address):
+                order.append(address)
+                await asyncio.sleep(0)
+
+        for address in "abc":
+            broker.register(address)
+        broker.members["a"].last_grant = 3
+        broker.members["b"].last_grant = 1
+        broker.set_priority("c", PRIORITY_ACTIVE)
+        broker.members["c"].last_grant = 5
+        async with broker.poll("x"):
+            tasks = [asyncio.create_task(poll(address)) for address in "abc"]
+            await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        assert order == ["c", "b", "a"]
+        assert broker.members["a"].polls == 1
+
+    asyncio.run(run())
+
+
+def test_cancelled_waiter_does_not_take_a_slot():
+    async def run():
+        broker = WallboxBLEFleetBroker(connections_per_adapter=1)
+        await broker.acquire_connection("a", "hci0")
+        cancelled = asyncio.create_task(broker.acquire_connection("b", "hci0"))
+        waiting = asyncio.create_task(broker.acquire_connection("c", "hci0"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        broker.release_connection("a")
+        await asyncio.wait_for(waiting, 1)
+        assert list(broker.connections["hci0"].holders) == ["c"]
+
+    asyncio.run(run())
+
+
+def test_fairness():
+    broker = WallboxBLEFleetBroker()
+    assert broker.fairness is None
+    broker.register("a").airtime = 1.0
+    broker.register("b").airtime = 1.0
+    assert broker.fairness == 1.0
+    broker.register("b").airtime = 0.0
+    assert broker.fairness == 0.5
@@ -0,0 +1,21 @@
+"""Seeded run of the frame decoder fuzzer, more cases with python -m benchmarks.fuzz."""
+import random
+
+from benchmarks.fuzz import check_corrupt, check_valid, fuzz
+from custom_components.wallbox_ble import protocol
+
+
+def test_fuzz_finds_no_failures():
+    assert fuzz(300, seed=1) == []
+
+
+def test_checks_catch_a_broken_decoder(monkeypatch):
+    # A decoder that loses every other message must fail the properties
+    feed = protocol.WallboxBLEFrameDecoder.feed
+
+    def lossy(self, data):
+        return feed(self, data)[1:]
+
+    monkeypatch.setattr(protocol.WallboxBLEFrameDecoder, "feed", lossy)
+    assert any(check_valid(random.Random(seed)) for seed in range(20))
+    assert any(check_corrupt(random.Random(seed)) for seed in range(20))
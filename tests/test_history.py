@@ -0,0 +1,28 @@
+"""Tests for benchmark regression tracking."""
+from benchmarks.history import compare, load, track
+
+
+def run(results, args=None):
+    return {"benchmark": "protocol", "args": args or {"mtu": 20}, "results": results}
+
+
+def test_compare_against_median_of_matching_runs():
+    history = [
+        run({"requests_per_second": 100, "p99_ms": 10}),
+        run({"requests_per_second": 110, "p99_ms": 12}),
+        run({"requests_per_second": 90, "p99_ms": 11}),
+        # Other arguments are not a baseline
+        run({"requests_per_second": 1000, "p99_ms": 1}, {"mtu": 244}),
+    ]
+    assert compare(history, "protocol", {"mtu": 20}, {"requests_per_second": 95, "p99_ms": 12}) == []
+    regressions = compare(history, "protocol", {"mtu": 20}, {"requests_per_second": 70, "p99_ms": 20, "failures": 9})
+    assert len(regressions) == 2
+    assert regressions[0].startswith("requests_per_second dropped")
+    assert regressions[1].startswith("p99_ms rose")
+
+
+def test_track_appends_runs(tmp_path):
+    path = tmp_path / "history.jsonl"
+    assert track(path, "protocol", {"mtu": 20}, {"p99_ms": 10}) == []
+    assert track(path, "protocol", {"mtu": 20}, {"p99_ms": 30}) == ["p99_ms rose to 30.00 from 10.00"]
+    assert [entry["results"]["p99_ms"] for entry in load(path)] == [10, 30]
@@ -0,0 +1,155 @@
+"""Tests for the UART frame decoder."""
+import json
+
+import pytest
+
+from custom_components.wallbox_ble.protocol import (
+    WallboxBLEFrameDecoder,
+    WallboxBLEFrameEncoder,
+    split_writes,
+)
+
+
+def frame(message) -> bytes:
+    data = json.dumps(message, separators=(",", ":")).encode()
+    data = b"EaE" + bytes([len(data) & 0xFF]) + data
+    return data + bytes([sum(data) & 0xFF])
+
+
+def bare(message) -> bytes:
+    return json.dumps(message, separators=(",", ":")).encode()
+
+
+def feed_chunks(decoder, data, size):
+    messages = []
+    for i in range(0, len(data), size):
+        messages += decoder.feed(data[i : i + size])
+    return messages
+
+
+STATUS = {"id": 1, "r": {"st": 1, "cur": 16}}
+
+
+@pytest.mark.parametrize("encode", [frame, bare])
+@pytest.mark.parametrize("size", [1, 3, 20, 244])
+def test_split_frame(encode, size):
+    decoder = WallboxBLEFrameDecoder()
+    assert feed_chunks(decoder, encode(STATUS), size) == [STATUS]
+    assert decoder.errors == 0
+    assert not decoder.buffer
+
+
+@pytest.mark.parametrize("encode", [frame, bare])
+def test_concatenated_frames(encode):
+    messages = [{"id": i, "r": i} for i in range(5)]
+    decoder = WallboxBLEFrameDecoder()
+    assert decoder.feed(b"".join(encode(message) for message in messages)) == messages
+
+
+def test_length_byte_wraps_past_255():
+    messages = [{"id": 1, "r": "x" * size} for size in (230, 300, 600)]
+    data = b"".join(frame(message) for message in messages)
+    assert any(len(bare(message)) > 255 for message in messages)
+    decoder = WallboxBLEFrameDecoder()
+    assert feed_chunks(decoder, data, 20) == messages
+    assert decoder.errors == 0
+
+
+def test_escaped_quotes_and_braces_in_strings():
+    message = {"id": 2, "r": 'a"}{\\"b\\'}
+    for encode in (frame, bare):
+        decoder = WallboxBLEFrameDecoder()
+        assert feed_chunks(decoder, encode(message), 1) == [message]
+
+
+def test_bad_checksum_is_dropped():
+    broken = bytearray(frame(STATUS))
+    broken[-1] ^= 0xFF
+    decoder = WallboxBLEFrameDecoder()
+    assert feed_chunks(decoder, bytes(broken) + frame({"id": 2, "r": None}), 20) == [{"id": 2, "r": None}]
+    assert decoder.errors == 1
+
+
+def test_bad_length_byte_is_dropped():
+    broken = bytearray(frame(STATUS))
+    broken[3] += 1
+    decoder = WallboxBLEFrameDecoder()
+    assert decoder.feed(bytes(broken) + frame({"id": 2, "r": None})) == [{"id": 2, "r": None}]
+    assert decoder.errors == 1
+
+
+def test_garbage_before_header():
+    decoder = WallboxBLEFrameDecoder()
+    assert feed_chunks(decoder, b"\x00garbageE" + frame(STATUS), 4) == [STATUS]
+    assert decoder.errors > 0
+
+
+def test_header_split_across_chunks():
+    data = frame(STATUS)
+    decoder = WallboxBLEFrameDecoder()
+    assert decoder.feed(data[:1]) == []
+    assert decoder.feed(data[1:2]) == []
+    assert decoder.feed(data[2:4]) == []
+    assert decoder.feed(data[4:]) == [STATUS]
+
+
+def test_recovers_after_lost_chunk():
+    first = frame({"id": 1, "r": {"st": 1, "cur": 16, "pad": "x" * 40}})
+    lost = first[:10] + first[20:]
+    following = [{"id": i, "r": {"st": 0}} for i in range(2, 200)]
+    decoder = WallboxBLEFrameDecoder()
+    messages = feed_chunks(decoder, lost + b"".join(frame(message) for message in following), 20)
+    assert messages == following
+    assert decoder.errors == 1
+    assert len(decoder.buffer) == 0
+
+
+def test_unterminated_bare_object_is_dropped():
+    decoder = WallboxBLEFrameDecoder()
+    assert feed_chunks(decoder, b'{"id": 1, "r": ' + b"[1," * 4000, 244) == []
+    assert decoder.errors > 0
+    assert len(decoder.buffer) < 8192
+    assert decoder.feed(bare(STATUS)) == [STATUS]
+
+
+def test_non_object_frame_is_dropped():
+    decoder = WallboxBLEFrameDecoder()
+    data = b"[1,2]"
+    data = b"EaE" + bytes([len(data)]) + data
+    data += bytes([sum(data) & 0xFF])
+    assert decoder.feed(data + frame(STATUS)) == [STATUS]
+
+
+def legacy_encode(method, parameter, request_id) -> bytes:
+    data = json.dumps({"met": method, "par": parameter, "id": request_id}, separators=(",", ":")).encode()
+    data = b"EaE" + bytes([len(data) & 0xFF]) + data
+    return data + bytes([sum(data) & 0xFF])
+
+
+@pytest.mark.parametrize(
+    "parameter",
+    [None, True, False, 0, 32, -1, 1.5, "on", [1, 2], {"a": [1, {"b": None}]}],
+)
+def test_encoder_matches_json_encoding(parameter):
+    encoder = WallboxBLEFrameEncoder()
+    for request_id in (1, 999):
+        assert encoder.encode("r_dat", parameter, request_id) == legacy_encode("r_dat", parameter, request_id)
+
+
+def test_encoder_handles_long_payloads():
+    schedule = [{"id": i, "start": "0000", "stop": "0600", "days": [1] * 7} for i in range(20)]
+    encoder = WallboxBLEFrameEncoder()
+    data = encoder.encode("s_sch", schedule, 5)
+    assert len(data) > 512
+    decoder = WallboxBLEFrameDecoder()
+    assert feed_chunks(decoder, data, 20) == [{"met": "s_sch", "par": schedule, "id": 5}]
+    # The buffer grew, shorter frames after it are still correct
+    assert encoder.encode("r_dat", None, 6) == legacy_encode("r_dat", None, 6)
+
+
+def test_split_writes():
+    data = bytes(range(50))
+    assert split_writes(data, 64) == [data]
+    chunks = split_writes(data, 20)
+    assert [len(chunk) for chunk in chunks] == [20, 20, 10]
+    assert b"".join(chunks) == data
@@ -0,0 +1,42 @@
+"""Tests for the adaptive poll scheduler."""
+from custom_components.wallbox_ble import scheduler
+from custom_components.wallbox_ble.scheduler import (
+    ACTIVE_INTERVAL,
+    FAST_INTERVAL,
+    IDLE_MIN_INTERVAL,
+    PUSH_INTERVAL,
+    WallboxBLEPollScheduler,
+)
+
+
+def test_idle_backs_off_and_charging_polls_steadily():
+    poll = WallboxBLEPollScheduler()
+    assert poll.update(0) == IDLE_MIN_INTERVAL
+    assert poll.update(0) == IDLE_MIN_INTERVAL * 2
+    poll.fast_until = 0
+    assert poll.update(1) == FAST_INTERVAL
+    poll.fast_until = 0
+    assert poll.update(1) == ACTIVE_INTERVAL
+
+
+def test_pushes_drop_to_safety_net_poll(monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(scheduler.time, "monotonic", lambda: now)
+    poll = WallboxBLEPollScheduler()
+    poll.update(1)
+    assert poll.pushed(1) == PUSH_INTERVAL
+    # A command still gets fast polls to confirm it
+    assert poll.command_sent() == FAST_INTERVAL
+    now += scheduler.FAST_WINDOW
+    assert poll.update(1) == PUSH_INTERVAL
+    # Pushes stopped arriving, back to normal polling
+    now += scheduler.PUSH_WINDOW
+    assert poll.update(1) == ACTIVE_INTERVAL
+
+
+def test_updating_suspends_polling():
+    poll = WallboxBLEPollScheduler()
+    poll.update(0)
+    # Not even the fast window after the status change polls during an update
+    assert poll.update(scheduler.UPDATING_STATUS_CODE) == scheduler.UPDATING_INTERVAL
+    assert scheduler.UPDATING_STATUS_CODE not in scheduler.ACTIVE_STATUS_CODES
@@ -0,0 +1,90 @@
+"""Tests for the session log download."""
+import asyncio
+
+from custom_components.wallbox_ble.protocol import WallboxBLEApiConst
+from custom_components.wallbox_ble.sessions import WallboxBLESessionLog, session_count
+
+
+class MemoryStore:
+    def __init__(self, data=None):
+        self.data = data
+
+    async def async_load(self):
+        return self.data
+
+    def async_delay_save(self, data_func, delay=0):
+        self.data = data_func()
+
+    async def async_save(self, data):
+        self.data = data
+
+
+class FakeClient:
+    def __init__(self, sessions, fail_at=None):
+        self.sessions = sessions
+        self.fail_at = fail_at
+        self.requested = []
+
+    async def request(self, method, parameter=None):
+        if method == WallboxBLEApiConst.GET_SESSIONS_INFO:
+            return True, {"count": len(self.sessions)}
+        self.requested.append(parameter)
+        if parameter == self.fail_at:
+            return False, None
+        return True, self.sessions[parameter]
+
+
+def sessions(count):
+    return [{"id": index, "en": index * 1.5} for index in range(count)]
+
+
+def test_session_count():
+    assert session_count({"count": 3}) == 3
+    assert session_count(7) == 7
+    assert session_count(None) is None
+    assert session_count({"other": 1}) is None
+
+
+def test_full_then_incremental_sync():
+    store = MemoryStore()
+    client = FakeClient(sessions(5))
+    log = WallboxBLESessionLog(client, store)
+    assert asyncio.run(log.async_sync()) == 5
+    assert log.records == sessions(5)
+
+    client.sessions = sessions(7)
+    client.requested = []
+    assert asyncio.run(log.async_sync()) == 2
+    assert client.requested == [5, 6]
+    assert store.data["cursor"] == 7
+
+
+def test_interrupted_sync_resumes_from_cursor():
+    store = MemoryStore()
+    client = FakeClient(sessions(6), fail_at=3)
+    assert asyncio.run(WallboxBLESessionLog(client, store).async_sync()) == 3
+    assert store.data["cursor"] == 3
+
+    client.fail_at = None
+    client.requested = []
+    resumed = WallboxBLESessionLog(client, store)
+    asyncio.run(resumed.async_load())
+    assert asyncio.run(resumed.async_sync()) == 3
+    assert client.requested == [3, 4, 5]
+    assert resumed.records == sessions(6)
+
+
+def test_shrunk_log_starts_over():
+    store = MemoryStore({"cursor": 10, "records": sessions(10)})
+    log = WallboxBLESessionLog(FakeClient(sessions(2)), store)
+    asyncio.run(log.async_load())
+    assert asyncio.run(log.async_sync()) == 2
+    assert log.records == sessions(2)
+
+
+def test_listeners_get_each_page():
+    pages = []
+    log = WallboxBLESessionLog(FakeClient(sessions(3)), MemoryStore(), page_size=2)
+    log.add_listener(pages.append)
+    asyncio.run(log.async_sync())
+    assert pages == [sessions(3)[:2], sessions(3)[2:]]
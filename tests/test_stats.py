@@ -0,0 +1,36 @@
+"""Tests for the request timing statistics."""
+from custom_components.wallbox_ble.stats import HISTOGRAM_WINDOW, RollingHistogram, WallboxBLELinkStats
+
+
+def test_percentiles_use_bucket_edges():
+    histogram = RollingHistogram()
+    for _ in range(98):
+        histogram.add(0.008)
+    histogram.add(0.150)
+    histogram.add(0.150)
+    assert histogram.percentile(0.5) == 10
+    assert histogram.percentile(0.99) == 200
+    assert histogram.maximum == 150
+
+
+def test_window_evicts_oldest_samples():
+    histogram = RollingHistogram()
+    for _ in range(HISTOGRAM_WINDOW):
+        histogram.add(3.0)
+    for _ in range(HISTOGRAM_WINDOW):
+        histogram.add(0.001)
+    assert sum(histogram.counts) == HISTOGRAM_WINDOW
+    assert histogram.percentile(0.99) == 5
+    assert histogram.total == 2 * HISTOGRAM_WINDOW
+
+
+def test_empty_histogram():
+    assert RollingHistogram().percentile(0.5) is None
+
+
+def test_link_stats_group_by_method():
+    stats = WallboxBLELinkStats()
+    stats.method("r_dat").timeouts += 2
+    stats.method("w_lck").timeouts += 1
+    assert stats.timeouts == 3
+    assert set(stats.as_dict()) == {"r_dat", "w_lck"}
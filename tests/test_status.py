@@ -0,0 +1,71 @@
+"""Tests for the charger status model."""
+import dataclasses
+
+import pytest
+
+from custom_components.wallbox_ble.status import WallboxBLEOverlay, WallboxBLEStatus
+
+
+def test_from_dict_decodes_every_field():
+    status = WallboxBLEStatus.from_dict({"st": 6, "cur": 16, "mxI": 32, "l": 1, "pw": 0, "en": 1.5, "new": "x"})
+    assert status.status_code == 6
+    assert status.charge_current == 16
+    assert status.max_current == 32
+    assert status.energy == 1.5
+    assert status.extra == {"new": "x"}
+    assert status.locked
+    assert status.status == "LOCKED"
+
+
+def test_missing_fields_keep_defaults():
+    status = WallboxBLEStatus.from_dict({})
+    assert status.status_code == 0
+    assert status.charge_current == 6
+    assert status.power is None
+
+
+def test_diff():
+    before = WallboxBLEStatus.from_dict({"st": 1, "cur": 16, "pw": 11000})
+    assert before.diff(WallboxBLEStatus.from_dict({"st": 1, "cur": 16, "pw": 11000})) == set()
+    assert before.diff(WallboxBLEStatus.from_dict({"st": 1, "cur": 10, "pw": 7000})) == {"charge_current", "power"}
+    assert before.diff(WallboxBLEStatus.from_dict({"st": 1, "cur": 16, "pw": 11000, "x": 1})) == {"extra"}
+
+
+def test_slotted():
+    assert not hasattr(WallboxBLEStatus(), "__dict__")
+
+
+def test_status_is_immutable():
+    status = WallboxBLEStatus.from_dict({"st": 6})
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        status.status_code = 0
+
+
+def test_overlay_holds_until_confirmed():
+    overlay = WallboxBLEOverlay(ttl=60)
+    unlocked = WallboxBLEStatus.from_dict({"st": 0})
+    overlay.set("locked", True, 0)
+    assert overlay.get(unlocked, "locked", 1)
+    # A poll that started before the write does not confirm it
+    assert not overlay.update(unlocked, 2)
+    assert overlay.get(unlocked, "locked", 2)
+    locked = WallboxBLEStatus.from_dict({"st": 6})
+    assert overlay.update(locked, 3)
+    assert overlay.values == {}
+    assert overlay.get(locked, "locked", 3)
+
+
+def test_overlay_expires():
+    overlay = WallboxBLEOverlay(ttl=60)
+    status = WallboxBLEStatus.from_dict({"st": 4, "cur": 10})
+    overlay.set("charge_current", 16, 0)
+    assert overlay.get(status, "charge_current", 30) == 16
+    assert overlay.get(status, "charge_current", 60) == 10
+    assert overlay.update(status, 60)
+    assert not overlay.discard("charge_current")
+
+
+def test_unknown_status_codes_do_not_raise():
+    assert WallboxBLEStatus.from_dict({"st": 42}).status == "UNKNOWN_42"
+    assert WallboxBLEStatus.from_dict({"st": -1}).status == "UNKNOWN_-1"
+    assert WallboxBLEStatus.from_dict({"st": None}).status == "UNKNOWN_None"
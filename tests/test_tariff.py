@@ -0,0 +1,80 @@
+"""Tests for tariff based charging plans."""
+from datetime import datetime, timedelta, timezone
+
+from custom_components.wallbox_ble.tariff import (
+    HOUR,
+    merge_windows,
+    plan_charging,
+    price_slots,
+    schedule_payload,
+)
+
+MIDNIGHT = datetime(2024, 1, 1, tzinfo=timezone.utc)  # A Monday
+T0 = MIDNIGHT.timestamp()
+
+
+def hourly(prices, start=T0):
+    return [(start + index * HOUR, start + (index + 1) * HOUR, price) for index, price in enumerate(prices)]
+
+
+def test_price_slots_of_common_attribute_formats():
+    nordpool = {
+        "raw_today": [
+            {"start": MIDNIGHT, "end": MIDNIGHT + timedelta(hours=1), "value": 1.5},
+            {"start": MIDNIGHT + timedelta(hours=1), "end": MIDNIGHT + timedelta(hours=2), "value": 0.5},
+        ],
+        "raw_tomorrow": [],
+    }
+    assert price_slots(nordpool) == hourly([1.5, 0.5])
+
+    tibber = {
+        "prices": [
+            {"startsAt": "2024-01-01T00:00:00+00:00", "total": 1.5},
+            {"startsAt": "2024-01-01T01:00:00+00:00", "total": 0.5},
+            {"startsAt": "not a time", "total": 9.0},
+        ]
+    }
+    assert price_slots(tibber) == hourly([1.5, 0.5])
+
+
+def test_plan_takes_cheapest_hours_before_deadline():
+    slots = hourly([3, 1, 2, 5, 0.5, 0.1])
+    # 3 hours at 10kW, the two cheapest hours are after the deadline
+    plan = plan_charging(slots, 30, 10, T0, deadline=T0 + 4 * HOUR)
+    assert plan.windows == [(T0, T0 + 3 * HOUR)]
+    assert plan.energy == 30
+    assert plan.cost == 60
+
+
+def test_plan_charges_partial_slot_and_short_forecast():
+    slots = hourly([2, 1])
+    plan = plan_charging(slots, 15, 10, T0)
+    assert plan.windows == [(T0, T0 + HOUR / 2), (T0 + HOUR, T0 + 2 * HOUR)]
+    assert plan.cost == 20
+
+    # The forecast ends before the car is full
+    plan = plan_charging(slots, 30, 10, T0)
+    assert plan.windows == [(T0, T0 + 2 * HOUR)]
+    assert plan.energy == 20
+
+
+def test_plan_ignores_the_past():
+    slots = hourly([0.1, 5, 5])
+    plan = plan_charging(slots, 10, 10, T0 + HOUR + 30)
+    assert plan.windows == [(T0 + HOUR, T0 + 2 * HOUR)]
+
+
+def test_merge_windows_joins_shortest_gaps():
+    windows = [(0, 10), (10, 20), (30, 40), (100, 110), (115, 120)]
+    assert merge_windows(windows, 5) == [(0, 20), (30, 40), (100, 110), (115, 120)]
+    assert merge_windows(windows, 2) == [(0, 40), (100, 120)]
+
+
+def test_schedule_payload_splits_at_midnight():
+    payload = schedule_payload([(T0 - HOUR, T0 + 2 * HOUR)], 16, timezone.utc)
+    sunday, monday = payload["schedules"]
+    assert sunday["start"] == "2300" and sunday["stop"] == "2359"
+    assert sunday["days"]["sunday"] and not sunday["days"]["monday"]
+    assert monday["start"] == "0000" and monday["stop"] == "0200"
+    assert monday["days"]["monday"] and monday["max_current"] == 16
+    assert [schedule["id"] for schedule in payload["schedules"]] == [0, 1]